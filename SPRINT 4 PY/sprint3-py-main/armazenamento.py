@@ -0,0 +1,75 @@
+from contextlib import contextmanager
+
+# Estados da gravação exibidos na interface
+SALVO = "Salvo"
+SALVANDO = "Salvando..."
+ERRO_AO_SALVAR = "Erro ao salvar"
+
+
+class Armazenamento:
+    """
+    Interface comum dos meios de armazenamento dos dados dos pacientes.
+
+    Um armazenamento abre os dados em um RepositorioPacientes e recebe, por meio de
+    registrar, cada alteração feita nele ("checkin", "diagnostico", "chamada" e
+    "alta", com os mesmos dados de diario.aplicar_evento). Implementações:
+    DiarioPacientes (arquivo JSON com diário) e ArmazenamentoSQLite.
+    """
+
+    def abrir(self):
+        """
+        Carrega os dados.
+
+        Returns:
+            RepositorioPacientes: Repositório com os pacientes ativos e o histórico.
+        """
+        raise NotImplementedError
+
+    def registrar(self, operacao, **dados):
+        """
+        Persiste uma alteração, antes que ela seja aplicada ao repositório.
+
+        Se a gravação falhar (por exemplo, um CPF já cadastrado por outra estação),
+        a exceção chega a quem fez a alteração, que não a aplica.
+
+        Args:
+            operacao (str): Operação realizada.
+            **dados: Dados da operação.
+        """
+        raise NotImplementedError
+
+    @contextmanager
+    def transacao(self):
+        """
+        Acesso exclusivo aos dados entre processos, para uma alteração.
+
+        Implementações compartilhadas entre processos aplicam ao repositório, ao
+        entrar, as alterações gravadas pelos outros.
+
+        Yields:
+            list: Eventos de outros processos aplicados ao repositório desde a última transação.
+        """
+        yield []
+
+    def houve_alteracao(self):
+        """
+        Verifica, de forma barata, se outro processo alterou os dados desde a última transação.
+
+        Returns:
+            bool: True se há alterações a aplicar (ver transacao).
+        """
+        return False
+
+    def compactar(self):
+        """Consolida o armazenamento, se a implementação precisar disso."""
+
+    def esperar(self):
+        """Aguarda até que todas as gravações pendentes tenham terminado."""
+
+    def fechar(self):
+        """Grava o que estiver pendente e libera os recursos do armazenamento."""
+
+    @property
+    def estado(self):
+        """str: SALVO, SALVANDO ou ERRO_AO_SALVAR, para exibição na interface."""
+        return SALVO
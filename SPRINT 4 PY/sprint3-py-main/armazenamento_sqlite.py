@@ -0,0 +1,401 @@
+import json
+import logging
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+from armazenamento import Armazenamento
+from diario import DiarioPacientes
+from fila import chave_prioridade, posto_prioridade
+from logica import normalizar_cpf
+from repositorio import RepositorioPacientes
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS pacientes (
+    id INTEGER PRIMARY KEY,
+    cpf TEXT NOT NULL,
+    cpf_informado TEXT,
+    name TEXT,
+    birth_date TEXT,
+    alergias TEXT,
+    ativo INTEGER NOT NULL DEFAULT 1,
+    em_atendimento INTEGER NOT NULL DEFAULT 0,
+    gravidade TEXT,
+    prioridade INTEGER,
+    ordem_alta INTEGER,
+    extras TEXT
+);
+CREATE TABLE IF NOT EXISTS sintomas (
+    paciente_id INTEGER NOT NULL REFERENCES pacientes(id),
+    posicao INTEGER NOT NULL,
+    nome TEXT NOT NULL,
+    valor TEXT,
+    PRIMARY KEY (paciente_id, posicao)
+);
+CREATE TABLE IF NOT EXISTS diagnosticos (
+    id INTEGER PRIMARY KEY,
+    paciente_id INTEGER NOT NULL REFERENCES pacientes(id),
+    diagnostico TEXT,
+    observacoes TEXT,
+    medicacoes_preferidas TEXT,
+    alergias TEXT,
+    extras TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_pacientes_cpf_ativo ON pacientes(cpf) WHERE ativo = 1;
+CREATE INDEX IF NOT EXISTS idx_pacientes_cpf ON pacientes(cpf, ativo);
+CREATE INDEX IF NOT EXISTS idx_pacientes_ordem_alta ON pacientes(ordem_alta);
+CREATE INDEX IF NOT EXISTS idx_diagnosticos_paciente ON diagnosticos(paciente_id);
+"""
+
+# Campos do paciente guardados em colunas próprias; os demais vão para "extras"
+CAMPOS_PACIENTE = ("name", "cpf", "birth_date", "alergias", "sintomas", "diagnosticos", "em_atendimento")
+CAMPOS_DIAGNOSTICO = ("diagnostico", "observacoes", "medicacoes_preferidas", "alergias")
+
+# Intervalo, em registros, entre as mensagens de progresso da migração
+INTERVALO_PROGRESSO = 10000
+
+
+def _prioridade(paciente, motor=None):
+    """Converte a chave de prioridade da fila em um inteiro indexável (menor é atendido antes)."""
+    prioridade, gravidade = chave_prioridade(paciente, motor)
+    return posto_prioridade(prioridade), gravidade
+
+
+class HistoricoSQLite:
+    """Histórico de altas consultado no banco SQLite pelo índice de CPF."""
+
+    # As altas são gravadas no banco pelo armazenamento: o repositório não guarda cópia em memória
+    grava_altas = True
+
+    def __init__(self, armazenamento):
+        self.armazenamento = armazenamento
+
+    def registros_do_cpf(self, cpf):
+        """
+        Busca os registros de alta do paciente com o CPF informado.
+
+        Args:
+            cpf (str): CPF do paciente, com ou sem pontuação.
+
+        Returns:
+            list: Registros do paciente, na ordem das altas.
+        """
+        return self.armazenamento._consultar_pacientes(
+            "ativo = 0 AND cpf = ? ORDER BY ordem_alta", (normalizar_cpf(cpf or ""),)
+        )
+
+    def __iter__(self):
+        return iter(self.armazenamento._consultar_pacientes("ativo = 0 ORDER BY ordem_alta"))
+
+    def __len__(self):
+        with self.armazenamento.trava:
+            return self.armazenamento.conexao.execute("SELECT COUNT(*) FROM pacientes WHERE ativo = 0").fetchone()[0]
+
+
+class ArmazenamentoSQLite(Armazenamento):
+    """
+    Armazenamento em um banco SQLite com tabelas de pacientes, sintomas e diagnósticos.
+
+    Cada alteração é gravada em uma transação própria. O banco usa o modo WAL, que
+    permite leituras enquanto outro processo grava, e um índice único parcial
+    impede dois pacientes ativos com o mesmo CPF mesmo entre processos.
+
+    As colunas gravidade e prioridade acompanham a triagem guardada no paciente,
+    para relatórios feitos direto no banco; a fila exibida continua sendo a
+    mantida em memória (ver FilaTriagem), que considera a espera de cada paciente.
+
+    Outras estações podem usar o mesmo banco: transacao mantém o banco reservado
+    para gravação durante a alteração e, se outra conexão gravou desde a última
+    leitura (PRAGMA data_version), recarrega os pacientes ativos antes dela.
+    """
+
+    def __init__(self, arquivo, motor=None):
+        """
+        Args:
+            arquivo (str): Caminho do banco SQLite.
+            motor (MotorRegras): Regras usadas na gravidade e na prioridade gravadas nas colunas.
+                Padrão: as regras do arquivo regras_triagem.json.
+        """
+        self.arquivo = arquivo
+        self.motor = motor
+        self.repositorio = None
+        # Versão dos dados (PRAGMA data_version) quando os pacientes ativos foram lidos
+        self._versao = None
+        self.trava = threading.RLock()
+        self.conexao = sqlite3.connect(arquivo, check_same_thread=False, isolation_level=None)
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        self.conexao.execute("PRAGMA synchronous=NORMAL")
+        self.conexao.execute("PRAGMA foreign_keys=ON")
+        self.conexao.executescript(ESQUEMA)
+
+    def abrir(self):
+        """
+        Carrega os pacientes ativos; o histórico é consultado no banco sob demanda.
+
+        Returns:
+            RepositorioPacientes: Repositório com os pacientes ativos e o histórico.
+        """
+        with self.trava:
+            self._versao = self._versao_dados()
+            pacientes = self._consultar_pacientes("ativo = 1 ORDER BY id")
+            self.repositorio = RepositorioPacientes(pacientes, HistoricoSQLite(self))
+        logging.info(f"{len(pacientes)} pacientes ativos carregados do banco {self.arquivo}.")
+        return self.repositorio
+
+    def _versao_dados(self):
+        """Número que muda quando outra conexão grava no banco (não muda com as gravações desta)."""
+        return self.conexao.execute("PRAGMA data_version").fetchone()[0]
+
+    def houve_alteracao(self):
+        """
+        Verifica se outra conexão gravou no banco desde a última leitura dos pacientes ativos.
+
+        Returns:
+            bool: True se os dados devem ser recarregados (ver transacao).
+        """
+        with self.trava:
+            return self.repositorio is not None and self._versao_dados() != self._versao
+
+    @contextmanager
+    def transacao(self):
+        """
+        Reserva o banco para gravação durante uma alteração, com os dados das outras conexões já lidos.
+
+        Se outra conexão gravou desde a última leitura, os pacientes ativos são
+        recarregados em um novo repositório (atributo repositorio), que substitui o
+        anterior. As gravações feitas por registrar dentro da transação só são
+        confirmadas no fim dela e são desfeitas se ela falhar.
+
+        Yields:
+            list: Sempre vazia; as alterações das outras conexões chegam pela recarga.
+        """
+        with self.trava:
+            cursor = self.conexao.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                if self.repositorio is not None and self._versao_dados() != self._versao:
+                    logging.info(f"Banco {self.arquivo} alterado por outra estação; recarregando os pacientes ativos.")
+                    self.abrir()
+                yield []
+            except BaseException:
+                cursor.execute("ROLLBACK")
+                raise
+            cursor.execute("COMMIT")
+
+    def registrar(self, operacao, **dados):
+        """
+        Grava uma alteração no banco, em uma transação.
+
+        Args:
+            operacao (str): Operação realizada ("checkin", "importacao", "diagnostico", "sintomas",
+                "chamada" ou "alta").
+            **dados: Dados da operação, como em diario.aplicar_evento.
+
+        Raises:
+            ValueError: Caso a operação seja desconhecida.
+        """
+        with self._transacao() as cursor:
+            if operacao == "checkin":
+                try:
+                    self._inserir_paciente(cursor, dados["paciente"], ativo=True)
+                except sqlite3.IntegrityError:
+                    raise ValueError("Este CPF já está cadastrado.")
+            elif operacao == "importacao":
+                # Todos os pacientes entram na mesma transação: um CPF repetido desfaz a importação inteira
+                for paciente in dados["pacientes"]:
+                    try:
+                        self._inserir_paciente(cursor, paciente, ativo=True)
+                    except sqlite3.IntegrityError:
+                        raise ValueError(f"O CPF {paciente.get('cpf')} já está cadastrado.")
+            elif operacao == "diagnostico":
+                paciente_id = self._id_ativo(cursor, dados["cpf"])
+                self._inserir_diagnosticos(cursor, paciente_id, [dados["diagnostico"]])
+            elif operacao == "sintomas":
+                paciente_id = self._id_ativo(cursor, dados["cpf"])
+                paciente = {"sintomas": dados["sintomas"]}
+                if dados.get("triagem"):
+                    paciente["triagem"] = dados["triagem"]
+                prioridade, gravidade = _prioridade(paciente, self.motor)
+                cursor.execute("DELETE FROM sintomas WHERE paciente_id = ?", (paciente_id,))
+                self._inserir_sintomas(cursor, paciente_id, dados["sintomas"])
+                # Atualiza a gravidade guardada nas colunas e nos extras do paciente
+                extras = cursor.execute("SELECT extras FROM pacientes WHERE id = ?", (paciente_id,)).fetchone()[0]
+                extras = json.loads(extras) if extras else {}
+                extras["triagem"] = paciente["triagem"]
+                cursor.execute(
+                    "UPDATE pacientes SET gravidade = ?, prioridade = ?, extras = ? WHERE id = ?",
+                    (gravidade, prioridade, json.dumps(extras), paciente_id)
+                )
+            elif operacao == "chamada":
+                paciente_id = self._id_ativo(cursor, dados["cpf"])
+                cursor.execute("UPDATE pacientes SET em_atendimento = 1 WHERE id = ?", (paciente_id,))
+                if dados.get("instante") is not None:
+                    self._gravar_instante(cursor, paciente_id, "atendimento", dados["instante"], substituir=False)
+            elif operacao == "alta":
+                paciente_id = self._id_ativo(cursor, dados["cpf"])
+                cursor.execute(
+                    "UPDATE pacientes SET ativo = 0, ordem_alta = (SELECT COALESCE(MAX(ordem_alta), 0) + 1 FROM pacientes) WHERE id = ?",
+                    (paciente_id,)
+                )
+                if dados.get("instante") is not None:
+                    self._gravar_instante(cursor, paciente_id, "alta", dados["instante"])
+            else:
+                raise ValueError(f"Operação desconhecida: {operacao}")
+
+    def compactar(self):
+        """Transfere o conteúdo do WAL para o arquivo principal do banco."""
+        with self.trava:
+            self.conexao.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def fechar(self):
+        """Fecha a conexão com o banco."""
+        with self.trava:
+            self.conexao.close()
+
+    @contextmanager
+    def _transacao(self):
+        with self.trava:
+            cursor = self.conexao.cursor()
+            # Dentro de transacao, a alteração é um ponto de salvamento da transação já aberta
+            aninhada = self.conexao.in_transaction
+            cursor.execute("SAVEPOINT alteracao" if aninhada else "BEGIN IMMEDIATE")
+            try:
+                yield cursor
+            except BaseException:
+                if aninhada:
+                    cursor.execute("ROLLBACK TO alteracao")
+                    cursor.execute("RELEASE alteracao")
+                else:
+                    cursor.execute("ROLLBACK")
+                raise
+            cursor.execute("RELEASE alteracao" if aninhada else "COMMIT")
+
+    def _id_ativo(self, cursor, cpf):
+        linha = cursor.execute("SELECT id FROM pacientes WHERE cpf = ? AND ativo = 1", (normalizar_cpf(cpf or ""),)).fetchone()
+        if not linha:
+            raise ValueError("Paciente não encontrado.")
+        return linha[0]
+
+    def _gravar_instante(self, cursor, paciente_id, campo, instante, substituir=True):
+        """Guarda um instante do atendimento ("atendimento" ou "alta") nos extras do paciente."""
+        extras = cursor.execute("SELECT extras FROM pacientes WHERE id = ?", (paciente_id,)).fetchone()[0]
+        extras = json.loads(extras) if extras else {}
+        if substituir or campo not in extras:
+            extras[campo] = instante
+            cursor.execute("UPDATE pacientes SET extras = ? WHERE id = ?", (json.dumps(extras), paciente_id))
+
+    def _inserir_paciente(self, cursor, paciente, ativo, ordem_alta=None):
+        prioridade, gravidade = _prioridade(paciente, self.motor)
+        cursor.execute(
+            "INSERT INTO pacientes (cpf, cpf_informado, name, birth_date, alergias, ativo, em_atendimento, "
+            "gravidade, prioridade, ordem_alta, extras) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                normalizar_cpf(paciente.get("cpf") or ""), paciente.get("cpf"), paciente.get("name"),
+                paciente.get("birth_date"), paciente.get("alergias"), int(ativo),
+                int(bool(paciente.get("em_atendimento"))), gravidade, prioridade, ordem_alta,
+                self._extras(paciente, CAMPOS_PACIENTE)
+            )
+        )
+        paciente_id = cursor.lastrowid
+        self._inserir_sintomas(cursor, paciente_id, paciente.get("sintomas", {}))
+        self._inserir_diagnosticos(cursor, paciente_id, paciente.get("diagnosticos", []))
+
+    def _inserir_sintomas(self, cursor, paciente_id, sintomas):
+        cursor.executemany(
+            "INSERT INTO sintomas (paciente_id, posicao, nome, valor) VALUES (?, ?, ?, ?)",
+            [(paciente_id, i, nome, json.dumps(valor)) for i, (nome, valor) in enumerate(sintomas.items())]
+        )
+
+    def _inserir_diagnosticos(self, cursor, paciente_id, diagnosticos):
+        cursor.executemany(
+            "INSERT INTO diagnosticos (paciente_id, diagnostico, observacoes, medicacoes_preferidas, alergias, extras) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(paciente_id, *(d.get(campo) for campo in CAMPOS_DIAGNOSTICO), self._extras(d, CAMPOS_DIAGNOSTICO)) for d in diagnosticos]
+        )
+
+    @staticmethod
+    def _extras(registro, campos):
+        extras = {k: v for k, v in registro.items() if k not in campos}
+        return json.dumps(extras) if extras else None
+
+    def _consultar_pacientes(self, condicao, parametros=()):
+        with self.trava:
+            linhas = self.conexao.execute(
+                "SELECT id, cpf_informado, name, birth_date, alergias, em_atendimento, extras "
+                f"FROM pacientes WHERE {condicao}", parametros
+            ).fetchall()
+            if not linhas:
+                return []
+            ids = [linha[0] for linha in linhas]
+            sintomas, diagnosticos = {}, {}
+            for inicio in range(0, len(ids), 500):
+                marcadores = ",".join("?" * len(ids[inicio:inicio + 500]))
+                for paciente_id, nome, valor in self.conexao.execute(
+                    f"SELECT paciente_id, nome, valor FROM sintomas WHERE paciente_id IN ({marcadores}) "
+                    "ORDER BY paciente_id, posicao", ids[inicio:inicio + 500]
+                ):
+                    sintomas.setdefault(paciente_id, {})[nome] = json.loads(valor)
+                for paciente_id, *campos, extras in self.conexao.execute(
+                    "SELECT paciente_id, diagnostico, observacoes, medicacoes_preferidas, alergias, extras "
+                    f"FROM diagnosticos WHERE paciente_id IN ({marcadores}) ORDER BY id", ids[inicio:inicio + 500]
+                ):
+                    diagnostico = dict(zip(CAMPOS_DIAGNOSTICO, campos))
+                    diagnostico.update(json.loads(extras) if extras else {})
+                    diagnosticos.setdefault(paciente_id, []).append(diagnostico)
+
+        pacientes = []
+        for paciente_id, cpf, nome, nascimento, alergias, em_atendimento, extras in linhas:
+            paciente = {
+                "name": nome,
+                "cpf": cpf,
+                "birth_date": nascimento,
+                "alergias": alergias,
+                "sintomas": sintomas.get(paciente_id, {}),
+                "diagnosticos": diagnosticos.get(paciente_id, [])
+            }
+            if em_atendimento:
+                paciente["em_atendimento"] = True
+            paciente.update(json.loads(extras) if extras else {})
+            pacientes.append(paciente)
+        return pacientes
+
+
+def migrar_json_para_sqlite(arquivo_json, arquivo_sqlite, motor=None):
+    """
+    Copia os dados do arquivo JSON (e do seu diário) para um banco SQLite.
+
+    Todos os registros são inseridos em uma única transação: se a migração falhar,
+    o banco fica como estava. A origem é apenas lida (ver DiarioPacientes.ler_estado).
+
+    Args:
+        arquivo_json (str): Caminho do arquivo JSON de origem.
+        arquivo_sqlite (str): Caminho do banco SQLite de destino.
+        motor (MotorRegras): Regras de triagem. Padrão: as regras do arquivo regras_triagem.json.
+
+    Returns:
+        int: Número de registros migrados (ativos e histórico).
+    """
+    repositorio = DiarioPacientes(arquivo_json).ler_estado()
+    destino = ArmazenamentoSQLite(arquivo_sqlite, motor)
+    total = 0
+    try:
+        with destino._transacao() as cursor:
+            for paciente in repositorio:
+                destino._inserir_paciente(cursor, paciente, ativo=True)
+                total += 1
+            for ordem, paciente in enumerate(repositorio.iterar_historico(), start=1):
+                destino._inserir_paciente(cursor, paciente, ativo=False, ordem_alta=ordem)
+                total += 1
+                if total % INTERVALO_PROGRESSO == 0:
+                    logging.info(f"{total} registros migrados para {arquivo_sqlite}.")
+    finally:
+        destino.fechar()
+    logging.info(f"Migração concluída: {total} registros de {arquivo_json} para {arquivo_sqlite}.")
+    return total
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Uso: python armazenamento_sqlite.py dados_pacientes.json dados_pacientes.db")
+        sys.exit(1)
+    print(f"{migrar_json_para_sqlite(sys.argv[1], sys.argv[2])} registros migrados.")
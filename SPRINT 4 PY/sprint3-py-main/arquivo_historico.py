@@ -0,0 +1,251 @@
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from logica import normalizar_cpf
+from metricas import cronometrado
+
+# Extensão dos segmentos mensais do histórico
+EXTENSAO_SEGMENTO = ".jsonl.gz"
+
+
+def _gravar_com_fsync(caminho, conteudo, modo="ab"):
+    with open(caminho, modo) as f:
+        f.write(conteudo)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _mes_da_alta(registro, padrao):
+    """Segmento (AAAA-MM) do instante da alta guardado no registro, ou o padrão se não houver."""
+    alta = registro.get("alta")
+    if isinstance(alta, (int, float)) and not isinstance(alta, bool):
+        try:
+            return time.strftime("%Y-%m", time.localtime(alta))
+        except (OverflowError, OSError, ValueError):
+            pass
+    return padrao
+
+
+def _truncar(caminho, tamanho):
+    """Descarta o que foi gravado depois do tamanho confirmado (gravação interrompida)."""
+    if os.path.exists(caminho) and os.path.getsize(caminho) > tamanho:
+        logging.warning(f"Descartando a gravação incompleta de {caminho}.")
+        with open(caminho, "r+b") as f:
+            f.truncate(tamanho)
+
+
+class ArquivoHistorico:
+    """
+    Histórico de altas arquivado em segmentos mensais comprimidos com gzip.
+
+    Cada segmento (por exemplo, 2024-05.jsonl.gz) guarda um registro por linha e
+    recebe as altas dadas naquele mês (chave "alta" do registro; sem ela, o mês do
+    arquivamento) como novos membros gzip, sem regravar o que já estava nele. O índice CPF -> segmentos (indice.jsonl) também só recebe
+    linhas novas e é lido na primeira busca, de modo que a busca de um paciente
+    descomprime apenas os segmentos em que ele aparece.
+
+    O arquivo estado.json guarda os tamanhos confirmados dos segmentos e do índice
+    e o último evento do diário já arquivado. Ele é regravado atomicamente ao fim
+    de cada arquivamento: o que tiver sido gravado depois dele, por uma queda no
+    meio do arquivamento, é descartado na abertura.
+
+    Quando vários processos usam a mesma pasta, arquivar, confirmar e
+    atualizar devem ser chamados com a trava entre processos do diário adquirida (ver DiarioPacientes).
+    """
+
+    def __init__(self, pasta, somente_leitura=False):
+        """
+        Args:
+            pasta (str): Pasta dos segmentos; é criada no primeiro arquivamento.
+            somente_leitura (bool): Se True, o que passou dos tamanhos confirmados não
+                é descartado dos arquivos, apenas ignorado na leitura.
+        """
+        self.pasta = pasta
+        self.somente_leitura = somente_leitura
+        self.arquivo_estado = os.path.join(pasta, "estado.json")
+        self.arquivo_indice = os.path.join(pasta, "indice.jsonl")
+        self._trava = threading.Lock()
+        self._indice = None
+        self._estado = {"ultimo_evento": None, "bytes_indice": 0, "segmentos": {}}
+        self.atualizar()
+
+    def atualizar(self):
+        """
+        Relê o estado confirmado, que outro processo pode ter avançado com um novo arquivamento.
+
+        O que foi gravado além dos tamanhos confirmados (arquivamento interrompido)
+        é descartado, a não ser no modo somente leitura.
+
+        Returns:
+            bool: True se o estado mudou.
+        """
+        try:
+            with open(self.arquivo_estado, encoding="utf-8") as f:
+                estado = json.load(f)
+        except FileNotFoundError:
+            return False
+        with self._trava:
+            alterado = estado != self._estado
+            if alterado:
+                self._estado = estado
+                # O índice CPF -> segmentos é lido de novo na próxima busca
+                self._indice = None
+        if self.somente_leitura:
+            return alterado
+        _truncar(self.arquivo_indice, estado["bytes_indice"])
+        for nome, segmento in estado["segmentos"].items():
+            _truncar(self._caminho(nome), segmento["bytes"])
+        return alterado
+
+    def _caminho(self, nome):
+        return os.path.join(self.pasta, nome + EXTENSAO_SEGMENTO)
+
+    @property
+    def ultimo_evento(self):
+        """int or None: Último evento do diário cujas altas já foram arquivadas (None se nada foi arquivado)."""
+        return self._estado["ultimo_evento"]
+
+    @property
+    def segmentos(self):
+        """list: Nomes dos segmentos (AAAA-MM), do mais antigo ao mais recente."""
+        return sorted(self._estado["segmentos"])
+
+    def __len__(self):
+        return sum(segmento["registros"] for segmento in self._estado["segmentos"].values())
+
+    def __iter__(self):
+        for nome in self.segmentos:
+            yield from self._ler_segmento(nome)
+
+    def _ler_segmento(self, nome):
+        with self._trava:
+            tamanho = self._estado["segmentos"][nome]["bytes"]
+        # Lê apenas a parte confirmada, para não encontrar um membro gzip sendo gravado
+        with open(self._caminho(nome), "rb") as f:
+            conteudo = gzip.decompress(f.read(tamanho))
+        for linha in conteudo.splitlines():
+            yield json.loads(linha)
+
+    def _carregar_indice(self):
+        with self._trava:
+            if self._indice is not None:
+                return
+            indice = {}
+            if os.path.exists(self.arquivo_indice):
+                with open(self.arquivo_indice, "rb") as f:
+                    for linha in f.read(self._estado["bytes_indice"]).splitlines():
+                        for cpf, nomes in json.loads(linha).items():
+                            segmentos = indice.setdefault(cpf, [])
+                            segmentos.extend(nome for nome in nomes if nome not in segmentos)
+            self._indice = indice
+        logging.info(f"Índice do histórico arquivado em {self.pasta} carregado: {len(indice)} CPFs.")
+
+    @cronometrado("arquivo_historico_registros_do_cpf")
+    def registros_do_cpf(self, cpf):
+        """
+        Lê os registros de alta do paciente, descomprimindo só os segmentos em que ele aparece.
+
+        Args:
+            cpf (str): CPF do paciente, com ou sem pontuação.
+
+        Returns:
+            list: Registros do paciente, do mais antigo ao mais recente.
+        """
+        self._carregar_indice()
+        chave = normalizar_cpf(cpf or "")
+        registros = []
+        for nome in sorted(self._indice.get(chave, [])):
+            registros.extend(
+                registro for registro in self._ler_segmento(nome)
+                if normalizar_cpf(registro.get("cpf") or "") == chave
+            )
+        return registros
+
+    @cronometrado("arquivo_historico_arquivar")
+    def arquivar(self, registros, ultimo_evento):
+        """
+        Acrescenta registros de alta aos segmentos dos meses das altas e confirma o arquivamento.
+
+        Args:
+            registros (iterable): Registros de alta (dicionários), na ordem das altas.
+            ultimo_evento (int): Último evento do diário incluído nos registros.
+
+        Returns:
+            int: Número de registros arquivados.
+        """
+        return self.confirmar(self.preparar(registros), ultimo_evento)
+
+    def preparar(self, registros):
+        """
+        Comprime os registros de alta sem gravar nada, para arquivá-los depois com confirmar.
+
+        Não lê nem altera os arquivos, e por isso pode ser chamado sem a trava entre
+        processos: a compressão fica fora do tempo em que os outros esperam por ela.
+
+        Args:
+            registros (iterable): Registros de alta (dicionários), na ordem das altas.
+
+        Returns:
+            dict: Membro gzip e número de registros de cada segmento, CPFs e linha do índice,
+                ou None se não há registros.
+        """
+        arquivamento = time.strftime("%Y-%m")
+        linhas = {}
+        cpfs = {}
+        for registro in registros:
+            nome = _mes_da_alta(registro, arquivamento)
+            linhas.setdefault(nome, []).append(json.dumps(registro))
+            segmentos = cpfs.setdefault(normalizar_cpf(registro.get("cpf") or ""), [])
+            if nome not in segmentos:
+                segmentos.append(nome)
+        if not linhas:
+            return None
+        return {
+            "membros": {nome: gzip.compress(("\n".join(do_segmento) + "\n").encode("utf-8"))
+                        for nome, do_segmento in linhas.items()},
+            "registros": {nome: len(do_segmento) for nome, do_segmento in linhas.items()},
+            "cpfs": cpfs,
+            "linha_indice": (json.dumps(cpfs) + "\n").encode("utf-8"),
+        }
+
+    def confirmar(self, preparado, ultimo_evento):
+        """
+        Grava os registros comprimidos por preparar e confirma o arquivamento.
+
+        Args:
+            preparado (dict): Resultado de preparar (None se não há registros).
+            ultimo_evento (int): Último evento do diário incluído nos registros.
+
+        Returns:
+            int: Número de registros arquivados.
+        """
+        if preparado is None:
+            return 0
+        membros, cpfs, linha_indice = preparado["membros"], preparado["cpfs"], preparado["linha_indice"]
+        os.makedirs(self.pasta, exist_ok=True)
+        for nome, membro in membros.items():
+            _gravar_com_fsync(self._caminho(nome), membro)
+        _gravar_com_fsync(self.arquivo_indice, linha_indice)
+
+        with self._trava:
+            estado = json.loads(json.dumps(self._estado))
+            for nome, membro in membros.items():
+                segmento = estado["segmentos"].setdefault(nome, {"bytes": 0, "registros": 0})
+                segmento["bytes"] += len(membro)
+                segmento["registros"] += preparado["registros"][nome]
+            estado["bytes_indice"] += len(linha_indice)
+            estado["ultimo_evento"] = ultimo_evento
+            temporario = f"{self.arquivo_estado}.tmp"
+            _gravar_com_fsync(temporario, json.dumps(estado, indent=4).encode("utf-8"), "wb")
+            os.replace(temporario, self.arquivo_estado)
+            self._estado = estado
+            if self._indice is not None:
+                for cpf, nomes in cpfs.items():
+                    segmentos = self._indice.setdefault(cpf, [])
+                    segmentos.extend(nome for nome in nomes if nome not in segmentos)
+        total = sum(preparado["registros"].values())
+        logging.info(f"{total} registros de alta arquivados em {', '.join(sorted(membros))} de {self.pasta}.")
+        return total
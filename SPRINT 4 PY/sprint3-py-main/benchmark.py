@@ -0,0 +1,244 @@
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from fila import FilaTriagem
+from gerador_pacientes import gerar_dados
+from leitura_incremental import carregar_dados_incremental
+from logica import carregar_dados, classificar_gravidade, salvar_dados
+from regras import motor_padrao
+from repositorio import RepositorioPacientes
+
+TAMANHOS = (1_000, 10_000, 100_000, 1_000_000)
+
+# Quantidade de CPFs procurados em cada medição de busca
+BUSCAS = 10_000
+
+# Operações rápidas são repetidas até somar este tempo, em segundos, ou até o máximo de repetições
+TEMPO_MINIMO = 1.0
+MAXIMO_REPETICOES = 100
+
+# Aumento de tempo, em relação ao resultado anterior, considerado uma regressão
+TOLERANCIA = 0.2
+
+
+def _cronometrar(funcao, repeticoes):
+    """
+    Executa a função várias vezes e retorna o menor tempo e o último resultado.
+
+    Operações rápidas são repetidas até somar TEMPO_MINIMO, para que o menor
+    tempo não dependa de uma única medição ruidosa.
+    """
+    melhor = float("inf")
+    resultado = None
+    total = 0.0
+    execucoes = 0
+    while execucoes < repeticoes or (total < TEMPO_MINIMO and execucoes < MAXIMO_REPETICOES):
+        # Libera o resultado anterior antes de medir de novo, para não manter duas cópias
+        resultado = None
+        gc.collect()
+        inicio = time.perf_counter()
+        resultado = funcao()
+        segundos = time.perf_counter() - inicio
+        melhor = min(melhor, segundos)
+        total += segundos
+        execucoes += 1
+    return melhor, resultado
+
+
+def _carga_calibracao():
+    total = 0
+    dados = {}
+    for i in range(200_000):
+        dados[i % 1000] = str(i)
+        total += len(dados[i % 1000])
+    return total
+
+
+def medir_tamanho(tamanho, pasta, semente=42, repeticoes=3):
+    """
+    Mede as operações principais do sistema com uma população sintética.
+
+    Args:
+        tamanho (int): Número total de registros (pacientes ativos e histórico).
+        pasta (str): Pasta onde o arquivo de dados é gravado.
+        semente (int): Semente do gerador de pacientes.
+        repeticoes (int): Repetições de cada medição; vale o menor tempo.
+
+    Returns:
+        list: Resultados com "tamanho", "operacao", "itens", "segundos", "itens_por_segundo"
+            e "calibracao" (tempo da carga fixa de referência).
+    """
+    resultados = []
+    # Tempo de uma carga fixa, medido junto com cada tamanho, para descontar na
+    # comparação as variações de velocidade da própria máquina
+    calibracao, _ = _cronometrar(_carga_calibracao, repeticoes)
+
+    def registrar(operacao, itens, segundos):
+        resultados.append({
+            "tamanho": tamanho,
+            "operacao": operacao,
+            "itens": itens,
+            "segundos": segundos,
+            "itens_por_segundo": itens / segundos if segundos else None,
+            "calibracao": calibracao,
+        })
+
+    arquivo = os.path.join(pasta, f"dados_{tamanho}.json")
+    dados = gerar_dados(tamanho, semente)
+    segundos, _ = _cronometrar(lambda: salvar_dados(arquivo, dados), repeticoes)
+    registrar("salvar_dados", tamanho, segundos)
+    # Libera a população gerada antes de carregá-la do disco, para não manter duas cópias
+    del dados
+
+    segundos, dados = _cronometrar(lambda: carregar_dados(arquivo), repeticoes)
+    registrar("carregar_dados", tamanho, segundos)
+    segundos, _ = _cronometrar(lambda: carregar_dados_incremental(arquivo), repeticoes)
+    registrar("carregar_dados_incremental", tamanho, segundos)
+
+    segundos, repositorio = _cronometrar(lambda: RepositorioPacientes.de_dados(dados), repeticoes)
+    registrar("indexar_repositorio", tamanho, segundos)
+    rng = random.Random(semente)
+    registros = dados["pacientes"] + dados["historico"]
+    cpfs = [rng.choice(registros)["cpf"] for _ in range(BUSCAS)]
+    segundos, _ = _cronometrar(lambda: [repositorio.buscar_em_todos(cpf) for cpf in cpfs], repeticoes)
+    registrar("buscar_por_cpf", BUSCAS, segundos)
+
+    sintomas = [paciente["sintomas"] for paciente in registros]
+    segundos, _ = _cronometrar(
+        lambda: [classificar_gravidade(s, s.get("tempo_sintomas", 0)) for s in sintomas], repeticoes
+    )
+    registrar("classificar_gravidade", len(sintomas), segundos)
+    segundos, _ = _cronometrar(lambda: motor_padrao().classificar_lote(sintomas), repeticoes)
+    registrar("classificar_lote", len(sintomas), segundos)
+
+    ativos = dados["pacientes"]
+    segundos, _ = _cronometrar(lambda: FilaTriagem(ativos).itens(), repeticoes)
+    registrar("ordenar_fila", len(ativos), segundos)
+
+    def esvaziar_fila():
+        fila = FilaTriagem(ativos)
+        while fila.chamar_proximo():
+            pass
+    segundos, _ = _cronometrar(esvaziar_fila, repeticoes)
+    registrar("chamar_todos_da_fila", len(ativos), segundos)
+
+    os.remove(arquivo)
+    return resultados
+
+
+def _commit_atual():
+    try:
+        saida = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+        return saida.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def executar(tamanhos=TAMANHOS, semente=42, repeticoes=3, progresso=None):
+    """
+    Executa o benchmark em todos os tamanhos.
+
+    Args:
+        tamanhos (iterable): Números de registros medidos.
+        semente (int): Semente do gerador de pacientes.
+        repeticoes (int): Repetições de cada medição; vale o menor tempo.
+        progresso (function): Chamada com cada resultado assim que ele é medido.
+
+    Returns:
+        dict: Ambiente da execução e lista de resultados, pronto para JSON.
+    """
+    resultados = []
+    with tempfile.TemporaryDirectory() as pasta:
+        for tamanho in tamanhos:
+            for resultado in medir_tamanho(tamanho, pasta, semente, repeticoes):
+                resultados.append(resultado)
+                if progresso:
+                    progresso(resultado)
+    return {
+        "data": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit_atual(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "semente": semente,
+        "repeticoes": repeticoes,
+        "resultados": resultados,
+    }
+
+
+def comparar(atual, anterior, tolerancia=TOLERANCIA):
+    """
+    Compara dois resultados do benchmark e aponta as operações que ficaram mais lentas.
+
+    Os tempos são divididos pelo tempo da carga de calibração de cada execução,
+    de modo que uma máquina mais lenta ou mais carregada não pareça uma regressão.
+
+    Args:
+        atual (dict): Resultado de executar().
+        anterior (dict): Resultado de referência, por exemplo, de um commit anterior.
+        tolerancia (float): Aumento de tempo aceito, em fração do tempo anterior.
+
+    Returns:
+        list: Regressões, com "tamanho", "operacao", "antes", "depois" e "variacao".
+    """
+    referencia = {(r["tamanho"], r["operacao"]): r for r in anterior["resultados"]}
+    regressoes = []
+    for resultado in atual["resultados"]:
+        antes = referencia.get((resultado["tamanho"], resultado["operacao"]))
+        if not antes or not antes["segundos"]:
+            continue
+        variacao = (resultado["segundos"] / resultado["calibracao"]) / (antes["segundos"] / antes["calibracao"]) - 1
+        if variacao > tolerancia:
+            regressoes.append({
+                "tamanho": resultado["tamanho"],
+                "operacao": resultado["operacao"],
+                "antes": antes["segundos"],
+                "depois": resultado["segundos"],
+                "variacao": variacao,
+            })
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do sistema de triagem com pacientes sintéticos.")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=list(TAMANHOS), help="Números de registros medidos.")
+    parser.add_argument("--semente", type=int, default=42, help="Semente do gerador de pacientes.")
+    parser.add_argument("--repeticoes", type=int, default=3, help="Repetições de cada medição.")
+    parser.add_argument("--saida", default="resultados_benchmark.json", help="Arquivo JSON com os resultados.")
+    parser.add_argument("--comparar", help="Resultado anterior; termina com erro se alguma operação regredir.")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA, help="Aumento de tempo aceito (0.2 = 20%%).")
+    argumentos = parser.parse_args()
+
+    def mostrar(resultado):
+        print(f"{resultado['tamanho']:>9,} {resultado['operacao']:<28} {resultado['segundos']:>10.4f}s "
+              f"{resultado['itens_por_segundo']:>14,.0f} itens/s", flush=True)
+
+    atual = executar(argumentos.tamanhos, argumentos.semente, argumentos.repeticoes, mostrar)
+    with open(argumentos.saida, "w") as f:
+        json.dump(atual, f, indent=4)
+    print(f"Resultados gravados em {argumentos.saida}")
+
+    if argumentos.comparar:
+        with open(argumentos.comparar) as f:
+            anterior = json.load(f)
+        regressoes = comparar(atual, anterior, argumentos.tolerancia)
+        for r in regressoes:
+            print(f"REGRESSÃO {r['tamanho']:,} {r['operacao']}: {r['antes']:.4f}s -> {r['depois']:.4f}s "
+                  f"(+{r['variacao']:.0%})")
+        if regressoes:
+            sys.exit(1)
+        print(f"Nenhuma regressão em relação a {anterior.get('commit') or argumentos.comparar}.")
+
+
+if __name__ == "__main__":
+    main()
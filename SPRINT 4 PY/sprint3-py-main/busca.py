@@ -0,0 +1,288 @@
+import bisect
+import itertools
+import logging
+import re
+import sys
+import time
+import unicodedata
+from array import array
+from logica import normalizar_cpf
+from metricas import cronometrado
+
+# Número de resultados retornados por padrão em cada busca
+LIMITE_RESULTADOS = 20
+
+_SEPARADORES = re.compile(r"[^0-9a-z]+")
+_CPF_DIGITADO = re.compile(r"[\d.\-\s]+")
+
+
+def normalizar_texto(texto):
+    """
+    Converte o texto para minúsculas e sem acentos, como ele é guardado no índice.
+
+    Args:
+        texto (str): Texto qualquer.
+
+    Returns:
+        str: Texto normalizado.
+    """
+    decomposto = unicodedata.normalize("NFKD", texto.lower())
+    return "".join(c for c in decomposto if not unicodedata.combining(c))
+
+
+def termos_do_texto(texto):
+    """
+    Separa um texto em termos de busca.
+
+    Args:
+        texto (str): Texto qualquer; valores que não são texto são ignorados.
+
+    Returns:
+        list: Termos normalizados, na ordem do texto.
+    """
+    if not isinstance(texto, str):
+        return []
+    return [termo for termo in _SEPARADORES.split(normalizar_texto(texto)) if termo]
+
+
+def termos_da_consulta(consulta):
+    """
+    Separa o texto digitado em termos; um CPF com pontuação vira um único termo.
+
+    Args:
+        consulta (str): Texto digitado pelo funcionário.
+
+    Returns:
+        list: Termos normalizados.
+    """
+    if _CPF_DIGITADO.fullmatch(consulta.strip() or "-") and any(c.isdigit() for c in consulta):
+        return [normalizar_cpf(consulta)]
+    return termos_do_texto(consulta)
+
+
+def _termos_do_registro(registro):
+    termos = termos_do_texto(registro.get("name"))
+    cpf = normalizar_cpf(registro.get("cpf") or "")
+    if cpf:
+        termos.append(cpf)
+    alergias = registro.get("alergias")
+    if alergias != "Nenhuma alergia registrada.":
+        termos.extend(termos_do_texto(alergias))
+    diagnosticos = registro.get("diagnosticos")
+    if isinstance(diagnosticos, list):
+        for diagnostico in diagnosticos:
+            if isinstance(diagnostico, dict):
+                termos.extend(termos_do_texto(diagnostico.get("diagnostico")))
+    return termos
+
+
+class IndiceBusca:
+    """
+    Índice de busca por prefixo sobre nome, CPF, alergias e diagnósticos dos pacientes.
+
+    Cada paciente (CPF) é um documento, ativo ou com alta, que reúne os termos de
+    todos os seus registros. O índice invertido guarda, para cada termo, os
+    documentos em que ele aparece; os termos ficam também em uma lista ordenada, de
+    modo que os termos com um prefixo formam uma faixa contínua, encontrada com
+    bisect. Cada documento guarda seus termos em um único texto, usado para conferir
+    os demais termos da consulta sem montar a interseção das listas.
+
+    Registros nunca saem do índice: a alta apenas marca o documento como inativo.
+    Os documentos ativos, que são poucos perto do histórico, ficam também em um
+    dicionário à parte, percorrido na busca quando custa menos que a faixa.
+    """
+
+    def __init__(self):
+        self._termos = []
+        self._documentos_do_termo = {}
+        self._documentos = []
+        # Documento ativo -> ordem de entrada em atendimento (o dicionário segue essa ordem)
+        self._ativos = {}
+        self._entradas = itertools.count()
+        self._documento_do_cpf = {}
+        self._em_carga = False
+
+    @classmethod
+    def de_repositorio(cls, repositorio):
+        """
+        Indexa os pacientes ativos e o histórico de um repositório.
+
+        Args:
+            repositorio (RepositorioPacientes): Pacientes a indexar.
+
+        Returns:
+            IndiceBusca: Índice pronto para buscas.
+        """
+        return cls.de_registros(repositorio.iterar_historico(), repositorio)
+
+    @classmethod
+    @cronometrado("busca_indexar_repositorio")
+    def de_registros(cls, historico, pacientes):
+        """
+        Indexa registros de alta e pacientes ativos, por exemplo de uma captura do repositório.
+
+        Args:
+            historico (iterable): Registros de alta (dicionários), na ordem das altas.
+            pacientes (iterable): Pacientes ativos (dicionários).
+
+        Returns:
+            IndiceBusca: Índice pronto para buscas.
+        """
+        inicio = time.perf_counter()
+        indice = cls()
+        # Na carga, os termos novos são ordenados uma única vez, no fim
+        indice._em_carga = True
+        for registro in historico:
+            indice.indexar(registro, ativo=False)
+        for paciente in pacientes:
+            indice.indexar(paciente)
+        indice._termos.sort()
+        indice._em_carga = False
+        logging.info(
+            f"Índice de busca montado com {len(indice)} pacientes em {time.perf_counter() - inicio:.2f}s."
+        )
+        return indice
+
+    def __len__(self):
+        return len(self._documentos)
+
+    def _adicionar_termo(self, termo, documento):
+        documentos = self._documentos_do_termo.get(termo)
+        if documentos is None:
+            termo = sys.intern(termo)
+            if self._em_carga:
+                self._termos.append(termo)
+            else:
+                bisect.insort(self._termos, termo)
+            self._documentos_do_termo[termo] = array("I", (documento,))
+        elif documentos[-1] != documento:
+            documentos.append(documento)
+
+    def indexar(self, registro, ativo=True):
+        """
+        Acrescenta um paciente ou um registro de alta ao índice.
+
+        Um CPF já indexado recebe os termos novos, e passa a exibir o nome mais recente.
+
+        Args:
+            registro (dict): Paciente ou registro de alta.
+            ativo (bool): Se o paciente está em atendimento.
+        """
+        cpf = normalizar_cpf(registro.get("cpf") or "")
+        termos = _termos_do_registro(registro)
+        documento = self._documento_do_cpf.get(cpf)
+        if documento is None:
+            documento = len(self._documentos)
+            self._documento_do_cpf[cpf] = documento
+            self._documentos.append((registro.get("name"), registro.get("cpf"), " "))
+        nome, cpf_informado, texto = self._documentos[documento]
+        novos = [termo for termo in dict.fromkeys(termos) if f" {termo} " not in texto]
+        for termo in novos:
+            self._adicionar_termo(termo, documento)
+        if novos or (registro.get("name") and registro.get("name") != nome):
+            texto = texto + " ".join(novos) + " " if novos else texto
+            self._documentos[documento] = (registro.get("name") or nome, registro.get("cpf") or cpf_informado, texto)
+        if ativo and documento not in self._ativos:
+            self._ativos[documento] = next(self._entradas)
+
+    def adicionar_diagnostico(self, cpf, diagnostico):
+        """
+        Acrescenta ao índice os termos de um novo diagnóstico.
+
+        Args:
+            cpf (str): CPF do paciente.
+            diagnostico (dict): Dados do diagnóstico.
+        """
+        documento = self._documento_do_cpf.get(normalizar_cpf(cpf or ""))
+        if documento is not None:
+            self.indexar({"cpf": cpf, "diagnosticos": [diagnostico]}, ativo=documento in self._ativos)
+
+    def marcar_alta(self, cpf):
+        """
+        Marca o paciente como não ativo, mantendo-o na busca do histórico.
+
+        Args:
+            cpf (str): CPF do paciente.
+        """
+        documento = self._documento_do_cpf.get(normalizar_cpf(cpf or ""))
+        if documento is not None:
+            self._ativos.pop(documento, None)
+
+    def _faixa(self, prefixo):
+        inicio = bisect.bisect_left(self._termos, prefixo)
+        fim = bisect.bisect_left(self._termos, prefixo + "\uffff", inicio)
+        return inicio, fim
+
+    def _custo(self, faixa, limite):
+        """Soma os documentos da faixa de termos, parando ao passar do limite."""
+        total = 0
+        for termo in self._termos[faixa[0]:faixa[1]]:
+            total += len(self._documentos_do_termo[termo])
+            if total > limite:
+                break
+        return total
+
+    @cronometrado("busca_buscar")
+    def buscar(self, consulta, limite=LIMITE_RESULTADOS):
+        """
+        Busca pacientes cujos termos começam com cada palavra digitada.
+
+        Os pacientes ativos vêm antes, na ordem em que entraram em atendimento, e
+        depois os que já receberam alta. A faixa de termos só é percorrida até
+        completar o limite: os ativos são conferidos um a um quando são menos que os
+        documentos da faixa.
+
+        Args:
+            consulta (str): Texto digitado (nome, parte do CPF, alergia ou diagnóstico).
+            limite (int): Número máximo de resultados.
+
+        Returns:
+            list: Dicionários com "name", "cpf" e "ativo".
+        """
+        termos = list(dict.fromkeys(termos_da_consulta(consulta or "")))
+        if not termos or limite <= 0:
+            return []
+        # Percorre a faixa do termo com menos documentos; os outros são conferidos no texto
+        melhor = None
+        for termo in sorted(termos, key=len, reverse=True):
+            faixa = self._faixa(termo)
+            custo = self._custo(faixa, melhor[0] if melhor else float("inf"))
+            if melhor is None or custo < melhor[0]:
+                melhor = (custo, termo, faixa)
+        custo, escolhido, (inicio, fim) = melhor
+        outros = [f" {termo}" for termo in termos if termo != escolhido]
+
+        if len(self._ativos) < custo:
+            prefixos = [f" {termo}" for termo in termos]
+            ativos = [
+                documento for documento in self._ativos
+                if all(prefixo in self._documentos[documento][2] for prefixo in prefixos)
+            ]
+        else:
+            ativos = sorted(
+                (documento for documento in self._documentos_da_faixa(inicio, fim, outros) if documento in self._ativos),
+                key=self._ativos.__getitem__,
+            )
+        resultados = [self._resultado(documento, True) for documento in ativos[:limite]]
+        if len(resultados) < limite:
+            for documento in self._documentos_da_faixa(inicio, fim, outros):
+                if documento not in self._ativos:
+                    resultados.append(self._resultado(documento, False))
+                    if len(resultados) >= limite:
+                        break
+        return resultados
+
+    def _documentos_da_faixa(self, inicio, fim, outros):
+        """Percorre, sem repetir, os documentos da faixa de termos que contêm os outros termos."""
+        vistos = set()
+        for termo in self._termos[inicio:fim]:
+            for documento in self._documentos_do_termo[termo]:
+                if documento in vistos:
+                    continue
+                vistos.add(documento)
+                if all(outro in self._documentos[documento][2] for outro in outros):
+                    yield documento
+
+    def _resultado(self, documento, ativo):
+        nome, cpf, _ = self._documentos[documento]
+        return {"name": nome, "cpf": cpf, "ativo": ativo}
@@ -0,0 +1,468 @@
+import itertools
+import json
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from functools import cached_property
+from armazenamento import SALVO
+from armazenamento_sqlite import ArmazenamentoSQLite
+from busca import IndiceBusca
+from diario import DiarioPacientes
+from espera import EstimadorEspera
+from fila import FilaTriagem, chave_prioridade
+from metricas import METRICAS
+from regras import MotorRegras, motor_padrao
+
+# Extensões de arquivo tratadas como bancos SQLite
+EXTENSOES_SQLITE = (".db", ".sqlite", ".sqlite3")
+
+
+def abrir_armazenamento(arquivo, assincrono=False, motor=None):
+    """
+    Escolhe o armazenamento pela extensão do arquivo.
+
+    Args:
+        arquivo (str): Arquivo JSON (com diário) ou banco SQLite (.db, .sqlite, .sqlite3).
+        assincrono (bool): Se True, o diário do arquivo JSON grava em segundo plano.
+        motor (MotorRegras): Regras de triagem da gravidade gravada no banco SQLite.
+
+    Returns:
+        Armazenamento: DiarioPacientes ou ArmazenamentoSQLite.
+    """
+    if arquivo.lower().endswith(EXTENSOES_SQLITE):
+        return ArmazenamentoSQLite(arquivo, motor)
+    return DiarioPacientes(arquivo, assincrono=assincrono)
+
+
+def registrar_medidores_fila(fila, metricas=METRICAS):
+    """
+    Publica o tamanho da fila e o tempo de espera por gravidade no registro de métricas.
+
+    Args:
+        fila (FilaTriagem): Fila de espera observada.
+        metricas (Metricas): Registro de métricas.
+    """
+    def medidor(campo):
+        return lambda: [({"gravidade": gravidade}, grupo[campo]) for gravidade, grupo in sorted(fila.estatisticas().items())]
+
+    # A contagem por gravidade é mantida pela fila e não exige percorrê-la
+    metricas.registrar_medidor(
+        "triagem_fila_pacientes",
+        lambda: [({"gravidade": gravidade}, total) for gravidade, total in sorted(fila.contagem().items())],
+        "Pacientes na fila de espera."
+    )
+    metricas.registrar_medidor(
+        "triagem_fila_espera_media_segundos", medidor("espera_media"), "Tempo médio de espera na fila, em segundos."
+    )
+    metricas.registrar_medidor(
+        "triagem_fila_espera_maxima_segundos", medidor("espera_maxima"), "Maior tempo de espera na fila, em segundos."
+    )
+
+
+class ContextoAplicacao:
+    """
+    Contexto da aplicação, compartilhado pelas telas da interface.
+
+    Nenhum arquivo é lido na criação: o armazenamento, o repositório de pacientes,
+    a fila de espera e as regras de triagem são carregados no primeiro acesso e
+    mantidos em cache.
+
+    Cada alteração é feita em uma transação do armazenamento: outras estações de
+    triagem que usam o mesmo arquivo não gravam ao mesmo tempo, e as alterações
+    delas são aplicadas ao repositório, à fila e ao índice de busca antes da
+    alteração desta. A interface chama atualizar periodicamente para exibir as
+    alterações das outras estações.
+
+    As alterações são gravadas antes de chegar ao repositório, à fila e ao índice:
+    se a gravação falhar (por exemplo, um CPF cadastrado por outra estação no
+    banco SQLite), nada muda em memória.
+    """
+
+    def __init__(self, arquivo="dados_pacientes.json", assincrono=False, arquivo_regras=None):
+        """
+        Args:
+            arquivo (str): Arquivo JSON ou banco SQLite com os dados dos pacientes.
+            assincrono (bool): Se True, as gravações são feitas em segundo plano.
+            arquivo_regras (str): Arquivo de regras de triagem. Padrão: regras_triagem.json.
+        """
+        self.arquivo = arquivo
+        self.assincrono = assincrono
+        self.arquivo_regras = arquivo_regras
+        # Montagem do índice de busca em segundo plano: (thread, alterações feitas durante ela)
+        self._montagem_busca = None
+        self._trava_busca = threading.Lock()
+
+    @cached_property
+    def armazenamento(self):
+        """Armazenamento: Meio de armazenamento escolhido pela extensão do arquivo."""
+        return abrir_armazenamento(self.arquivo, self.assincrono, self.motor)
+
+    @cached_property
+    def repositorio(self):
+        """RepositorioPacientes: Pacientes ativos e histórico, carregados do armazenamento."""
+        return self.armazenamento.abrir()
+
+    @cached_property
+    def motor(self):
+        """MotorRegras: Regras de triagem compiladas."""
+        return MotorRegras(self.arquivo_regras) if self.arquivo_regras else motor_padrao()
+
+    @cached_property
+    def fila(self):
+        """FilaTriagem: Fila de espera com os pacientes que ainda não foram chamados."""
+        fila = FilaTriagem((p for p in self.repositorio if not p.get("em_atendimento")), self.motor)
+        registrar_medidores_fila(fila)
+        return fila
+
+    @property
+    def busca(self):
+        """
+        IndiceBusca: Índice de busca sobre os pacientes ativos e o histórico, mantido a cada alteração.
+
+        Se o índice está sendo montado em segundo plano (ver iniciar_busca), espera o fim
+        da montagem; se ela ainda não foi iniciada, monta o índice na hora.
+        """
+        montagem = self._montagem_busca
+        if montagem is not None:
+            montagem[0].join()
+        if "busca" not in self.__dict__:
+            self.__dict__["busca"] = IndiceBusca.de_repositorio(self.repositorio)
+        return self.__dict__["busca"]
+
+    @property
+    def busca_pronta(self):
+        """bool: True se o índice de busca já pode ser consultado sem esperar a montagem."""
+        return "busca" in self.__dict__
+
+    def iniciar_busca(self):
+        """
+        Monta o índice de busca em uma thread, para que a abertura não espere por ele.
+
+        Os dados são capturados em uma transação (ver RepositorioPacientes.capturar) e
+        indexados fora dela; as alterações feitas durante a montagem são guardadas e
+        aplicadas ao índice antes de ele ficar disponível em busca.
+        """
+        with self._transacao():
+            with self._trava_busca:
+                if "busca" in self.__dict__ or self._montagem_busca is not None:
+                    return
+                captura = self.repositorio.capturar()
+                montador = threading.Thread(target=self._montar_busca, args=(captura,), name="indice-busca", daemon=True)
+                self._montagem_busca = (montador, [])
+                montador.start()
+
+    def _montar_busca(self, captura):
+        montagem = self._montagem_busca
+        indice = None
+        try:
+            historico = itertools.chain(
+                captura["historico_em_disco"] or (), (registro.para_dict() for registro in captura["historico"])
+            )
+            indice = IndiceBusca.de_registros(historico, (json.loads(paciente) for paciente in captura["pacientes"]))
+        except Exception as e:
+            logging.error(f"Erro ao montar o índice de busca: {e}")
+        with self._trava_busca:
+            # Se os dados foram recarregados durante a montagem, o índice montado é descartado
+            if self._montagem_busca is not montagem:
+                return
+            self._montagem_busca = None
+            if indice is not None:
+                for metodo, argumentos in montagem[1]:
+                    getattr(indice, metodo)(*argumentos)
+                self.__dict__["busca"] = indice
+
+    def _atualizar_busca(self, metodo, *argumentos):
+        """Aplica uma alteração ao índice de busca montado, ou a guarda se ele está em montagem."""
+        # O índice ainda não pedido não é atualizado: ele será montado com os dados atuais
+        with self._trava_busca:
+            if "busca" in self.__dict__:
+                getattr(self.__dict__["busca"], metodo)(*argumentos)
+            elif self._montagem_busca is not None:
+                self._montagem_busca[1].append((metodo, argumentos))
+
+    @cached_property
+    def espera(self):
+        """EstimadorEspera: Previsão do tempo de espera, iniciada com as chamadas dos pacientes ainda ativos."""
+        estimador = EstimadorEspera()
+        atendidos = [p for p in self.repositorio if isinstance(p.get("atendimento"), (int, float))]
+        for paciente in sorted(atendidos, key=lambda p: p["atendimento"]):
+            _, gravidade = chave_prioridade(paciente, self.motor)
+            estimador.registrar_atendimento(gravidade, paciente.get("chegada"), paciente["atendimento"])
+        return estimador
+
+    def previsao_espera(self):
+        """
+        Prevê a espera de quem chega agora em cada gravidade, a partir do ritmo recente de chamadas.
+
+        Returns:
+            dict: Gravidade -> resumo, como em EstimadorEspera.prever.
+        """
+        return self.espera.prever(self.fila.itens())
+
+    def _registrar_atendimento(self, paciente):
+        # O estimador só é atualizado se já foi montado; senão, ele parte dos dados atuais
+        if "espera" in self.__dict__ and isinstance(paciente.get("atendimento"), (int, float)):
+            _, gravidade = chave_prioridade(paciente, self.motor)
+            self.espera.registrar_atendimento(gravidade, paciente.get("chegada"), paciente["atendimento"])
+
+    def verificar_regras(self):
+        """
+        Recarrega as regras de triagem se o arquivo mudou e, nesse caso, reordena a fila.
+
+        Returns:
+            bool: True se as regras foram recarregadas.
+        """
+        if not self.motor.recarregar_se_alterado():
+            return False
+        if "fila" in self.__dict__:
+            self.fila.reordenar()
+        return True
+
+    @contextmanager
+    def _transacao(self):
+        repositorio = self.repositorio
+        with self.armazenamento.transacao() as eventos:
+            self._aplicar_eventos_externos(repositorio, eventos)
+            yield
+
+    def _aplicar_eventos_externos(self, repositorio, eventos):
+        """Leva à fila e ao índice de busca os eventos de outras estações já aplicados ao repositório."""
+        novo = getattr(self.armazenamento, "repositorio", repositorio)
+        if novo is not repositorio:
+            # O armazenamento recarregou os dados: a fila e o índice são montados de novo no próximo acesso
+            self.__dict__.pop("fila", None)
+            with self._trava_busca:
+                self.__dict__.pop("busca", None)
+                self._montagem_busca = None
+            self.__dict__["repositorio"] = novo
+            return
+        fila = self.__dict__.get("fila")
+        for evento in eventos:
+            operacao = evento["op"]
+            if operacao in ("checkin", "importacao"):
+                for paciente in [evento["paciente"]] if operacao == "checkin" else evento["pacientes"]:
+                    # Um check-in que não pôde ser aplicado (CPF já cadastrado) não entra na fila
+                    if repositorio.buscar(paciente.get("cpf")) is not paciente:
+                        continue
+                    if fila is not None:
+                        fila.adicionar(paciente)
+                    self._atualizar_busca("indexar", paciente)
+            elif operacao == "sintomas":
+                paciente = repositorio.buscar(evento["cpf"])
+                if fila is not None and paciente and fila.gravidade(evento["cpf"]) is not None:
+                    fila.reclassificar(paciente)
+            elif operacao == "diagnostico":
+                self._atualizar_busca("adicionar_diagnostico", evento["cpf"], evento["diagnostico"])
+            elif operacao in ("chamada", "alta"):
+                paciente = repositorio.buscar(evento["cpf"])
+                if operacao == "chamada" and paciente:
+                    self._registrar_atendimento(paciente)
+                if fila is not None:
+                    fila.remover(evento["cpf"])
+                if operacao == "alta":
+                    self._atualizar_busca("marcar_alta", evento["cpf"])
+
+    def atualizar(self):
+        """
+        Aplica as alterações gravadas por outras estações de triagem desde a última leitura.
+
+        Só o trecho novo do diário é lido; quando nada mudou, a verificação custa uma
+        consulta ao tamanho do arquivo.
+
+        Returns:
+            bool: True se havia alterações de outras estações.
+        """
+        if not self.carregado or not self.armazenamento.houve_alteracao():
+            return False
+        with self._transacao():
+            pass
+        return True
+
+    def registrar_checkin(self, paciente):
+        """
+        Cadastra um paciente, coloca-o na fila de espera e registra o check-in.
+
+        O instante do check-in fica na chave "chegada" (time.time), se ainda não informado.
+
+        Args:
+            paciente (dict): Dados do paciente.
+
+        Raises:
+            ValueError: Caso o CPF já esteja cadastrado.
+            TypeError: Caso os sintomas não possam ser classificados (nada é alterado).
+        """
+        with self._transacao():
+            # Monta a fila antes do cadastro, para que ela não inclua o paciente duas vezes
+            fila = self.fila
+            # Classifica antes de cadastrar: sintomas que as regras não aceitam não deixam o paciente pela metade
+            chave_prioridade(paciente, self.motor)
+            paciente.setdefault("chegada", time.time())
+            if self.repositorio.cpf_cadastrado(paciente.get("cpf")):
+                raise ValueError("Este CPF já está cadastrado.")
+            self.armazenamento.registrar("checkin", paciente=paciente)
+            self.repositorio.adicionar(paciente)
+            fila.adicionar(paciente)
+            METRICAS.incrementar("triagem_checkins", gravidade=fila.gravidade(paciente["cpf"]))
+            self._atualizar_busca("indexar", paciente)
+
+    def importar_pacientes(self, pacientes, recusar_cadastrados=False):
+        """
+        Cadastra vários pacientes de uma vez, com um único registro no armazenamento.
+
+        A importação é gravada antes de alterar o repositório e a fila: se a gravação
+        falhar, nenhum paciente é cadastrado.
+
+        Args:
+            pacientes (list): Pacientes validados, com CPFs distintos.
+            recusar_cadastrados (bool): Se True, os pacientes com CPF já cadastrado (inclusive
+                por outra estação, pois a verificação é feita na transação) ficam de fora e
+                são retornados, em vez de impedir a importação.
+
+        Returns:
+            list: Pacientes recusados por CPF já cadastrado.
+
+        Raises:
+            ValueError: Caso algum CPF já esteja cadastrado e recusar_cadastrados seja False.
+        """
+        if not pacientes:
+            return []
+        with self._transacao():
+            fila = self.fila
+            aceitos, recusados = [], []
+            for paciente in pacientes:
+                (recusados if self.repositorio.cpf_cadastrado(paciente.get("cpf")) else aceitos).append(paciente)
+            if recusados and not recusar_cadastrados:
+                raise ValueError(f"O CPF {recusados[0].get('cpf')} já está cadastrado.")
+            pacientes = aceitos
+            if not pacientes:
+                return recusados
+            agora = time.time()
+            for paciente in pacientes:
+                paciente.setdefault("chegada", agora)
+            self.armazenamento.registrar("importacao", pacientes=pacientes)
+            self.repositorio.adicionar_varios(pacientes)
+            gravidades = Counter()
+            for paciente in pacientes:
+                fila.adicionar(paciente)
+                gravidades[fila.gravidade(paciente["cpf"])] += 1
+            for gravidade, total in gravidades.items():
+                METRICAS.incrementar("triagem_checkins", total, gravidade=gravidade)
+            for paciente in pacientes:
+                self._atualizar_busca("indexar", paciente)
+        return recusados
+
+    def registrar_diagnostico(self, cpf, diagnostico):
+        """
+        Adiciona um diagnóstico a um paciente ativo e o registra.
+
+        Args:
+            cpf (str): CPF do paciente.
+            diagnostico (dict): Dados do diagnóstico.
+
+        Raises:
+            ValueError: Caso o paciente não seja encontrado.
+        """
+        with self._transacao():
+            if not self.repositorio.buscar(cpf):
+                raise ValueError("Paciente não encontrado.")
+            self.armazenamento.registrar("diagnostico", cpf=cpf, diagnostico=diagnostico)
+            self.repositorio.adicionar_diagnostico(cpf, diagnostico)
+            self._atualizar_busca("adicionar_diagnostico", cpf, diagnostico)
+
+    def atualizar_sintomas(self, cpf, sintomas):
+        """
+        Substitui os sintomas de um paciente ativo, reclassifica-o na fila e registra a alteração.
+
+        Args:
+            cpf (str): CPF do paciente.
+            sintomas (dict): Novos sintomas do paciente.
+
+        Returns:
+            dict: Paciente atualizado.
+
+        Raises:
+            ValueError: Caso o paciente não seja encontrado.
+        """
+        with self._transacao():
+            fila = self.fila
+            paciente = self.repositorio.buscar(cpf)
+            if not paciente:
+                raise ValueError("Paciente não encontrado.")
+            # A nova gravidade é calculada em uma cópia, para ser gravada antes de alterar o paciente
+            atualizado = dict(paciente, sintomas=sintomas)
+            atualizado.pop("triagem", None)
+            chave_prioridade(atualizado, self.motor)
+            self.armazenamento.registrar("sintomas", cpf=cpf, sintomas=sintomas, triagem=atualizado["triagem"])
+            self.repositorio.atualizar_sintomas(cpf, sintomas, atualizado["triagem"])
+            if fila.gravidade(cpf) is not None:
+                fila.reclassificar(paciente)
+            return paciente
+
+    def chamar_proximo(self):
+        """
+        Chama o próximo paciente da fila e registra a chamada.
+
+        O instante do primeiro atendimento fica na chave "atendimento" e alimenta a
+        previsão de espera.
+
+        Returns:
+            dict or None: Paciente chamado ou None se a fila estiver vazia.
+        """
+        with self._transacao():
+            paciente = self.fila.proximo()
+            if paciente:
+                instante = time.time()
+                self.armazenamento.registrar("chamada", cpf=paciente["cpf"], instante=instante)
+                self.fila.chamar_proximo()
+                self.repositorio.marcar_em_atendimento(paciente["cpf"], instante)
+                self._registrar_atendimento(paciente)
+            return paciente
+
+    def dar_alta(self, cpf):
+        """
+        Dá alta a um paciente, retirando-o da fila, e registra a alta.
+
+        O instante da alta fica na chave "alta" do registro no histórico.
+
+        Args:
+            cpf (str): CPF do paciente.
+
+        Returns:
+            dict: Paciente que recebeu alta.
+
+        Raises:
+            ValueError: Caso o paciente não seja encontrado.
+        """
+        with self._transacao():
+            if not self.repositorio.buscar(cpf):
+                raise ValueError("Paciente não encontrado.")
+            instante = time.time()
+            self.armazenamento.registrar("alta", cpf=cpf, instante=instante)
+            paciente = self.repositorio.dar_alta(cpf, instante=instante)
+            self.fila.remover(cpf)
+            self._atualizar_busca("marcar_alta", cpf)
+            return paciente
+
+    @property
+    def carregado(self):
+        """bool: True se os dados já foram carregados."""
+        return "repositorio" in self.__dict__
+
+    @property
+    def estado_persistencia(self):
+        """str: Estado da gravação dos dados ("Salvo", "Salvando..." ou "Erro ao salvar")."""
+        return self.armazenamento.estado if "armazenamento" in self.__dict__ else SALVO
+
+    def salvar(self):
+        """Consolida o armazenamento (compacta o diário), se os dados chegaram a ser carregados."""
+        if self.carregado:
+            # Inclui na consolidação as alterações das outras estações
+            with self._transacao():
+                self.armazenamento.compactar()
+
+    def fechar(self):
+        """Aguarda as gravações pendentes e encerra a gravação em segundo plano."""
+        if "armazenamento" in self.__dict__:
+            self.armazenamento.fechar()
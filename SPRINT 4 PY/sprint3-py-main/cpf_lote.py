@@ -0,0 +1,119 @@
+import time
+import numpy as np
+from logica import normalizar_cpf, validar_cpf
+
+# Pesos dos dois dígitos verificadores do CPF
+PESOS_DIGITO1 = np.arange(10, 1, -1)
+PESOS_DIGITO2 = np.arange(11, 1, -1)
+
+
+def _digitos(cpfs):
+    """
+    Converte os CPFs em uma matriz de dígitos.
+
+    Args:
+        cpfs (iterable or numpy.ndarray): CPFs como texto ou um array de inteiros.
+
+    Returns:
+        tuple: Matriz (n, 11) de dígitos e máscara dos CPFs com 11 dígitos.
+    """
+    if isinstance(cpfs, np.ndarray) and np.issubdtype(cpfs.dtype, np.integer):
+        potencias = 10 ** np.arange(10, -1, -1, dtype=np.int64)
+        digitos = (cpfs.astype(np.int64)[:, None] // potencias) % 10
+        return digitos, (cpfs >= 0) & (cpfs < 10 ** 11)
+
+    normalizados = [cpf if len(cpf) == 11 and cpf.isdigit() else normalizar_cpf(cpf) for cpf in cpfs]
+    tamanho_ok = np.fromiter((len(cpf) == 11 for cpf in normalizados), dtype=bool, count=len(normalizados))
+    digitos = np.zeros((len(normalizados), 11), dtype=np.int64)
+    if tamanho_ok.any():
+        validos = "".join(cpf for cpf, ok in zip(normalizados, tamanho_ok.tolist()) if ok)
+        bytes_digitos = np.frombuffer(validos.encode("ascii", "replace"), dtype=np.uint8)
+        digitos[tamanho_ok] = bytes_digitos.reshape(-1, 11).astype(np.int64) - ord("0")
+    # Dígitos Unicode não ASCII (aceitos por str.isdigit) não formam um CPF válido
+    tamanho_ok &= ((digitos >= 0) & (digitos <= 9)).all(axis=1)
+    return digitos, tamanho_ok
+
+
+def validar_cpfs_lote(cpfs):
+    """
+    Valida vários CPFs de uma vez, com aritmética inteira vetorizada.
+
+    Aplica as mesmas regras de validar_cpf a cada CPF.
+
+    Args:
+        cpfs (iterable or numpy.ndarray): CPFs como texto (com ou sem pontuação)
+            ou um array de inteiros.
+
+    Returns:
+        numpy.ndarray: Array booleano com True para cada CPF válido.
+    """
+    if not isinstance(cpfs, np.ndarray) or not np.issubdtype(cpfs.dtype, np.integer):
+        cpfs = list(cpfs)
+    digitos, validos = _digitos(cpfs)
+    validos &= ~(digitos == digitos[:, :1]).all(axis=1)
+    digito1 = (digitos[:, :9] @ PESOS_DIGITO1 * 10 % 11) % 10
+    digito2 = (digitos[:, :10] @ PESOS_DIGITO2 * 10 % 11) % 10
+    return validos & (digitos[:, 9] == digito1) & (digitos[:, 10] == digito2)
+
+
+def gerar_arquivo_benchmark(arquivo, n=1_000_000, semente=42):
+    """
+    Grava um arquivo com n CPFs, um por linha, metade deles com dígitos verificadores corretos.
+
+    Args:
+        arquivo (str): Caminho do arquivo a ser criado.
+        n (int): Número de CPFs.
+        semente (int): Semente do gerador aleatório.
+    """
+    rng = np.random.default_rng(semente)
+    bases = rng.integers(0, 10, (n, 9))
+    digito1 = (bases @ PESOS_DIGITO1 * 10 % 11) % 10
+    digito2 = ((np.column_stack([bases, digito1]) @ PESOS_DIGITO2) * 10 % 11) % 10
+    # Metade dos CPFs recebe um segundo dígito errado
+    digito2 = np.where(rng.random(n) < 0.5, digito2, (digito2 + 1) % 10)
+    digitos = np.column_stack([bases, digito1, digito2])
+    with open(arquivo, "w") as f:
+        f.write("\n".join("".join(map(str, linha)) for linha in digitos.tolist()))
+        f.write("\n")
+
+
+def benchmark(arquivo):
+    """
+    Compara a vazão da validação individual com a validação em lote.
+
+    Args:
+        arquivo (str): Arquivo com um CPF por linha (ver gerar_arquivo_benchmark).
+
+    Returns:
+        dict: CPFs validados por segundo em cada abordagem.
+    """
+    with open(arquivo) as f:
+        cpfs = f.read().split()
+
+    validar_cpf.cache_clear()
+    inicio = time.perf_counter()
+    individuais = [validar_cpf(cpf) for cpf in cpfs]
+    tempo_individual = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    lote = validar_cpfs_lote(cpfs)
+    tempo_lote = time.perf_counter() - inicio
+
+    assert individuais == lote.tolist()
+    return {"individual": len(cpfs) / tempo_individual, "lote": len(cpfs) / tempo_lote}
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+    import tempfile
+
+    if len(sys.argv) > 1:
+        caminho = sys.argv[1]
+    else:
+        caminho = os.path.join(tempfile.mkdtemp(), "cpfs.txt")
+        gerar_arquivo_benchmark(caminho)
+    resultado = benchmark(caminho)
+    print(f"Individual: {resultado['individual']:,.0f} CPFs/s")
+    print(f"Lote:       {resultado['lote']:,.0f} CPFs/s")
+    print(f"Ganho:      {resultado['lote'] / resultado['individual']:.1f}x")
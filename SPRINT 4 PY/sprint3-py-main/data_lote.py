@@ -0,0 +1,95 @@
+import time
+from datetime import datetime
+import numpy as np
+from logica import converter_data_nascimento
+
+# Dias do ano antes do primeiro dia de cada mês, em um ano não bissexto
+DIAS_ANTES_DO_MES = np.array([0, 0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334], dtype=np.int64)
+DIAS_NO_MES = np.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31], dtype=np.int64)
+
+# Posições das barras e dos dígitos em DD/MM/AAAA
+_BARRAS = [2, 5]
+_DIGITOS = [0, 1, 3, 4, 6, 7, 8, 9]
+
+
+def converter_datas_lote(datas):
+    """
+    Converte várias datas DD/MM/AAAA de uma vez, com aritmética inteira vetorizada.
+
+    Aplica as mesmas regras de converter_data_nascimento a cada data. As datas no
+    formato completo (10 caracteres) são convertidas juntas; as demais, como
+    "1/1/1990", uma a uma.
+
+    Args:
+        datas (iterable): Datas como texto.
+
+    Returns:
+        numpy.ndarray: Número do dia (date.toordinal) de cada data, ou 0 se a data for inválida.
+    """
+    datas = [data if isinstance(data, str) else "" for data in datas]
+    completas = np.fromiter(
+        (len(data) == 10 and data.isascii() for data in datas), dtype=bool, count=len(datas)
+    )
+    ordinais = np.zeros(len(datas), dtype=np.int64)
+    if completas.any():
+        texto = "".join(data for data, completa in zip(datas, completas.tolist()) if completa)
+        caracteres = np.frombuffer(texto.encode("ascii"), dtype=np.uint8).reshape(-1, 10)
+        digitos = caracteres[:, _DIGITOS].astype(np.int64) - ord("0")
+        validas = (caracteres[:, _BARRAS] == ord("/")).all(axis=1) & ((digitos >= 0) & (digitos <= 9)).all(axis=1)
+        dia = digitos[:, 0] * 10 + digitos[:, 1]
+        mes = digitos[:, 2] * 10 + digitos[:, 3]
+        ano = digitos[:, 4] * 1000 + digitos[:, 5] * 100 + digitos[:, 6] * 10 + digitos[:, 7]
+        bissexto = (ano % 4 == 0) & ((ano % 100 != 0) | (ano % 400 == 0))
+        validas &= (ano >= 1) & (mes >= 1) & (mes <= 12)
+        mes = np.where(validas, mes, 1)
+        validas &= (dia >= 1) & (dia <= DIAS_NO_MES[mes] + (bissexto & (mes == 2)))
+        anteriores = ano - 1
+        resultado = (
+            anteriores * 365 + anteriores // 4 - anteriores // 100 + anteriores // 400
+            + DIAS_ANTES_DO_MES[mes] + (bissexto & (mes > 2)) + dia
+        )
+        ordinais[completas] = np.where(validas, resultado, 0)
+    for i in np.flatnonzero(~completas).tolist():
+        try:
+            ordinais[i] = converter_data_nascimento(datas[i])
+        except ValueError:
+            pass
+    return ordinais
+
+
+def benchmark(n=1_000_000, semente=42):
+    """
+    Compara a vazão de datetime.strptime, da conversão individual e da conversão em lote.
+
+    Args:
+        n (int): Número de datas.
+        semente (int): Semente do gerador aleatório.
+
+    Returns:
+        dict: Datas convertidas por segundo em cada abordagem.
+    """
+    rng = np.random.default_rng(semente)
+    datas = [datetime.fromordinal(int(o)).strftime("%d/%m/%Y") for o in rng.integers(690_000, 740_000, n)]
+
+    inicio = time.perf_counter()
+    for data in datas:
+        datetime.strptime(data, "%d/%m/%Y")
+    tempo_strptime = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    individuais = [converter_data_nascimento(data) for data in datas]
+    tempo_individual = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    lote = converter_datas_lote(datas)
+    tempo_lote = time.perf_counter() - inicio
+
+    assert individuais == lote.tolist()
+    return {"strptime": n / tempo_strptime, "individual": n / tempo_individual, "lote": n / tempo_lote}
+
+
+if __name__ == "__main__":
+    resultado = benchmark()
+    print(f"strptime:   {resultado['strptime']:,.0f} datas/s")
+    print(f"Individual: {resultado['individual']:,.0f} datas/s")
+    print(f"Lote:       {resultado['lote']:,.0f} datas/s")
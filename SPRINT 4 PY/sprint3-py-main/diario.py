@@ -0,0 +1,602 @@
+import bisect
+import json
+import logging
+import os
+import queue
+import re
+import tempfile
+import threading
+from contextlib import contextmanager
+from armazenamento import ERRO_AO_SALVAR, SALVANDO, SALVO, Armazenamento
+from arquivo_historico import ArquivoHistorico
+from leitura_incremental import carregar_dados_incremental
+from metricas import cronometrado
+from repositorio import RepositorioPacientes
+from trava_arquivo import TravaArquivo
+
+# Número do último evento no início do snapshot, lido sem carregar o arquivo inteiro
+_ULTIMO_EVENTO_SNAPSHOT = re.compile(rb'"ultimo_evento":\s*(\d+)')
+
+
+def aplicar_evento(repositorio, evento):
+    """
+    Aplica um evento do diário ao repositório de pacientes.
+
+    Args:
+        repositorio (RepositorioPacientes): Repositório a ser atualizado.
+        evento (dict): Evento com a chave "op" e os dados da operação.
+
+    Raises:
+        ValueError: Caso a operação seja desconhecida ou inválida para o repositório.
+    """
+    operacao = evento.get("op")
+    if operacao == "checkin":
+        repositorio.adicionar(evento["paciente"])
+    elif operacao == "importacao":
+        repositorio.adicionar_varios(evento["pacientes"])
+    elif operacao == "diagnostico":
+        repositorio.adicionar_diagnostico(evento["cpf"], evento["diagnostico"])
+    elif operacao == "sintomas":
+        repositorio.atualizar_sintomas(evento["cpf"], evento["sintomas"], evento.get("triagem"))
+    elif operacao == "chamada":
+        repositorio.marcar_em_atendimento(evento["cpf"], evento.get("instante"))
+    elif operacao == "alta":
+        repositorio.dar_alta(evento["cpf"], instante=evento.get("instante"))
+    else:
+        raise ValueError(f"Operação desconhecida no diário: {operacao}")
+
+
+class DiarioPacientes(Armazenamento):
+    """
+    Persistência em diário append-only (JSON Lines) com compactação periódica.
+
+    Cada alteração é gravada como uma linha no diário, com custo de I/O constante.
+    De tempos em tempos o estado completo é gravado atomicamente no arquivo de dados
+    (o snapshot) e o diário passa a guardar só os eventos posteriores a ele. Na
+    abertura, o snapshot é carregado e os eventos posteriores a ele são reaplicados.
+
+    O snapshot guarda apenas os pacientes ativos. Na compactação, as altas ainda em
+    memória são acrescentadas ao histórico arquivado em segmentos mensais comprimidos
+    (ver ArquivoHistorico), que nunca é regravado por inteiro.
+
+    Vários processos (estações de triagem) podem usar os mesmos arquivos. Toda
+    gravação é feita com uma trava entre processos (arquivo .trava): antes de
+    acrescentar um evento, o processo lê e aplica os eventos que os outros gravaram
+    depois da sua última leitura, de modo que as alterações de cada estação são
+    somadas, e não sobrescritas. A leitura é incremental, a partir da posição já
+    lida do diário; houve_alteracao informa, com uma consulta ao tamanho do arquivo,
+    se há eventos novos de outros processos.
+
+    No modo assíncrono, o evento é escrito no diário na hora, para que os outros
+    processos o vejam, mas o fsync é feito por uma thread em segundo plano: os
+    eventos de uma rajada são confirmados com um único fsync, e pedidos de
+    compactação seguidos resultam em uma só gravação do snapshot.
+    """
+
+    def __init__(self, arquivo, arquivo_diario=None, intervalo_compactacao=1000, assincrono=False, pasta_historico=None):
+        """
+        Args:
+            arquivo (str): Caminho do snapshot JSON (por exemplo, dados_pacientes.json).
+            arquivo_diario (str): Caminho do diário. Padrão: mesmo nome com extensão .jsonl.
+            intervalo_compactacao (int): Número de eventos entre compactações automáticas.
+            assincrono (bool): Se True, confirma as gravações (fsync) em uma thread em segundo plano.
+            pasta_historico (str): Pasta do histórico arquivado. Padrão: mesmo nome com o sufixo _historico.
+        """
+        self.arquivo = arquivo
+        self.arquivo_diario = arquivo_diario or os.path.splitext(arquivo)[0] + ".jsonl"
+        self.pasta_historico = pasta_historico or os.path.splitext(arquivo)[0] + "_historico"
+        self.trava = TravaArquivo(os.path.splitext(arquivo)[0] + ".trava")
+        self.historico_arquivado = None
+        self.intervalo_compactacao = intervalo_compactacao
+        self.repositorio = None
+        self.ultimo_evento = 0
+        self.eventos_pendentes = 0
+        self.erro = None
+        self._pendentes = 0
+        self._trava_estado = threading.Lock()
+        # Arquivo do diário (inode) e bytes dele já lidos ou escritos por este processo
+        self._identidade = None
+        self._posicao = 0
+        # Último evento incluído no snapshot que este processo conhece
+        self._evento_snapshot = 0
+        # Eventos das altas ainda no histórico em memória, na mesma ordem dele
+        self._eventos_altas = []
+        # Eventos de outros processos já aplicados e ainda não entregues por transacao
+        self._externos = []
+        # Transações abertas por esta thread e compactação adiada para o fim delas
+        self._transacoes = 0
+        self._compactar_no_fim = False
+        self._tarefas = None
+        self._gravador = None
+        if assincrono:
+            self._tarefas = queue.Queue()
+            self._gravador = threading.Thread(target=self._executar_gravador, name="gravador-diario", daemon=True)
+            self._gravador.start()
+
+    @property
+    def estado(self):
+        """str: SALVO, SALVANDO ou ERRO_AO_SALVAR, para exibição na interface."""
+        if self.erro:
+            return ERRO_AO_SALVAR
+        return SALVANDO if self._pendentes else SALVO
+
+    @cronometrado("diario_abrir")
+    def abrir(self):
+        """
+        Carrega o snapshot e reaplica os eventos do diário gravados depois dele.
+
+        Apenas os pacientes ativos são lidos na abertura; o histórico é consultado
+        sob demanda nos segmentos arquivados. Um snapshot antigo, que ainda guarda o
+        histórico, tem o histórico arquivado já na abertura.
+
+        Altas do diário que já foram arquivadas (queda entre o arquivamento e a troca
+        do snapshot) apenas retiram o paciente dos ativos.
+
+        Uma linha final incompleta (queda durante a gravação) é descartada e o diário
+        é truncado no último evento válido.
+
+        Returns:
+            RepositorioPacientes: Repositório com o estado recuperado.
+        """
+        with self.trava:
+            dados = carregar_dados_incremental(self.arquivo)
+            self.ultimo_evento = self._evento_snapshot = dados.get("ultimo_evento", 0)
+            self.eventos_pendentes = 0
+            self._eventos_altas = []
+            self._externos = []
+            self.historico_arquivado = ArquivoHistorico(self.pasta_historico)
+            arquivado_ate = self.historico_arquivado.ultimo_evento
+            if arquivado_ate is None or arquivado_ate < self.ultimo_evento:
+                # Snapshot gravado antes do arquivamento: o histórico dele ainda não foi arquivado
+                self.historico_arquivado.arquivar(dados["historico"], self.ultimo_evento)
+            self.repositorio = RepositorioPacientes(dados["pacientes"], self.historico_arquivado)
+            self._identidade, self._posicao = None, 0
+            eventos = self._ler_eventos(self.historico_arquivado.ultimo_evento or 0)
+        logging.info(f"{len(eventos)} eventos reaplicados do diário {self.arquivo_diario}.")
+        return self.repositorio
+
+    def ler_estado(self):
+        """
+        Lê o snapshot, o histórico arquivado e o diário sem alterar nenhum arquivo.
+
+        Diferente de abrir, não cria a trava, não arquiva o histórico de um snapshot
+        antigo e não trunca o diário: uma linha final incompleta é apenas ignorada.
+        Serve para copiar os dados para outro armazenamento (ver
+        armazenamento_sqlite.migrar_json_para_sqlite) mantendo a origem intacta.
+
+        Returns:
+            RepositorioPacientes: Repositório com o estado lido; o histórico é lido sob demanda.
+        """
+        dados = carregar_dados_incremental(self.arquivo)
+        ultimo_evento = dados.get("ultimo_evento", 0)
+        arquivado = ArquivoHistorico(self.pasta_historico, somente_leitura=True)
+        arquivado_ate = arquivado.ultimo_evento or 0
+        if arquivado.ultimo_evento is None:
+            # Snapshot gravado antes do arquivamento: todo o histórico está nele
+            historico = dados["historico"]
+        elif arquivado_ate < ultimo_evento and len(dados["historico"]):
+            historico = list(arquivado) + list(dados["historico"])
+        else:
+            historico = arquivado
+        repositorio = RepositorioPacientes(dados["pacientes"], historico)
+        try:
+            with open(self.arquivo_diario, "rb") as f:
+                linhas = f.read().splitlines(keepends=True)
+        except FileNotFoundError:
+            linhas = []
+        for linha in linhas:
+            try:
+                if not linha.endswith(b"\n"):
+                    raise ValueError("linha incompleta")
+                evento = json.loads(linha)
+            except ValueError:
+                logging.warning(f"Evento inválido no diário {self.arquivo_diario}; ignorando o restante.")
+                break
+            if evento["seq"] <= ultimo_evento:
+                continue
+            try:
+                if evento["op"] == "alta" and evento["seq"] <= arquivado_ate:
+                    repositorio.dar_alta(evento["cpf"], arquivar=False)
+                else:
+                    aplicar_evento(repositorio, evento)
+            except (KeyError, ValueError) as e:
+                logging.error(f"Erro ao reaplicar o evento {evento['seq']}: {e}")
+            ultimo_evento = evento["seq"]
+        return repositorio
+
+    def _identificar_diario(self):
+        try:
+            estado = os.stat(self.arquivo_diario)
+        except FileNotFoundError:
+            return None, 0
+        return estado.st_ino, estado.st_size
+
+    def _ler_eventos(self, arquivado_ate=0):
+        """
+        Lê o diário a partir da posição já lida e aplica os eventos novos ao repositório.
+
+        Deve ser chamado com a trava adquirida. Uma linha final incompleta só pode
+        ser de um processo que caiu no meio da gravação, e é descartada.
+
+        Returns:
+            list: Eventos aplicados.
+        """
+        identidade, tamanho = self._identificar_diario()
+        if identidade is None:
+            return []
+        with open(self.arquivo_diario, "rb") as f:
+            f.seek(self._posicao)
+            novos = f.read()
+        aplicados = []
+        for linha in novos.splitlines(keepends=True):
+            try:
+                if not linha.endswith(b"\n"):
+                    raise ValueError("linha incompleta")
+                evento = json.loads(linha)
+            except ValueError:
+                logging.warning(f"Evento inválido no diário {self.arquivo_diario}; descartando o restante.")
+                with open(self.arquivo_diario, "r+b") as f:
+                    f.truncate(self._posicao)
+                break
+            self._posicao += len(linha)
+            if evento["seq"] <= self.ultimo_evento:
+                continue
+            try:
+                if evento["op"] == "alta" and evento["seq"] <= arquivado_ate:
+                    self.repositorio.dar_alta(evento["cpf"], arquivar=False)
+                else:
+                    aplicar_evento(self.repositorio, evento)
+                    if evento["op"] == "alta":
+                        self._eventos_altas.append(evento["seq"])
+            except (KeyError, ValueError) as e:
+                logging.error(f"Erro ao reaplicar o evento {evento['seq']}: {e}")
+            self.ultimo_evento = evento["seq"]
+            self.eventos_pendentes += 1
+            aplicados.append(evento)
+        self._identidade = identidade
+        return aplicados
+
+    def _ultimo_evento_do_snapshot(self):
+        try:
+            with open(self.arquivo, "rb") as f:
+                inicio = f.read(64)
+        except FileNotFoundError:
+            return 0
+        encontrado = _ULTIMO_EVENTO_SNAPSHOT.search(inicio)
+        return int(encontrado.group(1)) if encontrado else 0
+
+    def houve_alteracao(self):
+        """
+        Verifica se outro processo gravou no diário desde a última leitura deste.
+
+        Consulta apenas o tamanho e a identidade do diário e o início do snapshot,
+        sem travá-los, e pode ser chamada com frequência (por exemplo, pela interface).
+
+        Returns:
+            bool: True se há eventos novos ou se o diário foi compactado por outro processo.
+        """
+        return self.repositorio is not None and (
+            self._identificar_diario() != (self._identidade, self._posicao)
+            or self._ultimo_evento_do_snapshot() != self._evento_snapshot
+        )
+
+    def _sincronizar(self):
+        """
+        Aplica os eventos gravados por outros processos; deve ser chamado com a trava adquirida.
+
+        Se outro processo compactou o diário, as altas que ele arquivou saem do
+        histórico em memória e a leitura recomeça no novo diário. Só quando este
+        processo ficou para trás de eventos que já saíram do diário é que os dados
+        são recarregados por inteiro (ver abrir).
+        """
+        if self.repositorio is None:
+            return
+        identidade, tamanho = self._identificar_diario()
+        snapshot = self._ultimo_evento_do_snapshot()
+        # O diário regravado pode receber o inode do anterior; o snapshot muda a cada compactação
+        if identidade != self._identidade or tamanho < self._posicao or snapshot != self._evento_snapshot:
+            if snapshot > self.ultimo_evento:
+                logging.warning(f"Eventos do diário {self.arquivo_diario} compactados antes de serem lidos; recarregando.")
+                self.abrir()
+                return
+            if snapshot > self._evento_snapshot:
+                self._concluir_compactacao_externa(snapshot)
+            self._identidade, self._posicao = identidade, 0
+        self._externos.extend(self._ler_eventos())
+
+    def _concluir_compactacao_externa(self, ultimo_evento):
+        """Retira da memória as altas que outro processo arquivou ao compactar até ultimo_evento."""
+        self.historico_arquivado.atualizar()
+        gravados = bisect.bisect_right(self._eventos_altas, ultimo_evento)
+        with self.repositorio.trava_historico:
+            self.repositorio.concluir_compactacao(self.historico_arquivado, gravados)
+        del self._eventos_altas[:gravados]
+        self._evento_snapshot = ultimo_evento
+        self.eventos_pendentes = max(0, self.ultimo_evento - ultimo_evento)
+        logging.info(f"Diário {self.arquivo_diario} compactado por outro processo no evento {ultimo_evento}.")
+
+    @contextmanager
+    def transacao(self):
+        """
+        Acesso exclusivo aos dados entre processos, com os eventos dos outros processos já aplicados.
+
+        Yields:
+            list: Eventos de outros processos aplicados ao repositório desde a última transação.
+        """
+        with self.trava:
+            self._sincronizar()
+            externos, self._externos = self._externos, []
+            self._transacoes += 1
+            try:
+                yield externos
+            finally:
+                self._transacoes -= 1
+            if self._compactar_no_fim and not self._transacoes:
+                self._compactar_no_fim = False
+                self.compactar()
+
+    @cronometrado("diario_registrar")
+    def registrar(self, operacao, **dados):
+        """
+        Acrescenta um evento ao diário.
+
+        Os eventos gravados por outros processos são aplicados antes, e o evento
+        recebe o número seguinte ao último do diário. No modo síncrono, o evento está
+        gravado em disco quando a função retorna; no assíncrono, ele já está no
+        diário, mas o fsync é feito pela thread de gravação. Dentro de transacao, a
+        compactação automática espera o fim dela, quando o evento já foi aplicado ao
+        repositório.
+
+        Args:
+            operacao (str): Operação realizada ("checkin", "importacao", "diagnostico", "sintomas",
+                "chamada" ou "alta").
+            **dados: Dados da operação, como em aplicar_evento.
+        """
+        with self.trava:
+            self._sincronizar()
+            evento = {"seq": self.ultimo_evento + 1, "op": operacao, **dados}
+            self._acrescentar((json.dumps(evento) + "\n").encode("utf-8"))
+            self.ultimo_evento += 1
+            if operacao == "alta":
+                self._eventos_altas.append(self.ultimo_evento)
+            self.eventos_pendentes += 1
+            compactar = self.repositorio is not None and self.eventos_pendentes >= self.intervalo_compactacao
+            if compactar and self._transacoes:
+                # O evento só chega ao repositório depois de gravado: a compactação fica para o fim da transação
+                self._compactar_no_fim, compactar = True, False
+        if compactar:
+            self.compactar()
+
+    @cronometrado("diario_compactar")
+    def compactar(self):
+        """
+        Grava o estado atual como snapshot e retira do diário os eventos incluídos nele.
+
+        O snapshot guarda o número do último evento incluído, de modo que uma queda
+        entre a gravação do snapshot e a limpeza do diário não duplica eventos. As
+        altas ainda em memória são arquivadas antes da troca do snapshot.
+
+        No modo assíncrono, o estado é capturado pela thread de gravação, e não por
+        quem chamou (em geral, a interface), com a trava: as alterações feitas dentro
+        de transacao entram na captura junto com os seus eventos (ver _gravar_snapshot).
+        """
+        self._enviar(("compactacao",))
+        self.eventos_pendentes = 0
+
+    def esperar(self):
+        """Aguarda até que todas as gravações pendentes tenham terminado."""
+        if self._tarefas is not None:
+            self._tarefas.join()
+
+    def fechar(self):
+        """Grava o que estiver pendente e encerra a thread de gravação."""
+        if self._gravador is not None:
+            self._tarefas.put(None)
+            self._gravador.join()
+            self._gravador = None
+
+    def _enviar(self, tarefa):
+        with self._trava_estado:
+            self._pendentes += 1
+        if self._gravador is not None:
+            self._tarefas.put(tarefa)
+        else:
+            self._processar([tarefa])
+
+    def _executar_gravador(self):
+        encerrar = False
+        while not encerrar:
+            lote = [self._tarefas.get()]
+            # Junta as tarefas que chegaram durante a última gravação
+            while True:
+                try:
+                    lote.append(self._tarefas.get_nowait())
+                except queue.Empty:
+                    break
+            encerrar = None in lote
+            tarefas = [tarefa for tarefa in lote if tarefa is not None]
+            try:
+                self._processar(tarefas)
+            except Exception as e:
+                logging.error(f"Erro ao gravar o diário {self.arquivo_diario}: {e}")
+            finally:
+                for _ in lote:
+                    self._tarefas.task_done()
+
+    def _processar(self, tarefas):
+        """
+        Executa um lote de tarefas de gravação.
+
+        Os eventos do lote são confirmados com um único fsync, e as compactações
+        pedidas no lote são feitas uma só vez, com o estado do momento da gravação.
+        """
+        try:
+            if any(t[0] == "eventos" for t in tarefas):
+                self._confirmar_eventos()
+            if any(t[0] == "compactacao" for t in tarefas):
+                self._gravar_snapshot()
+            self.erro = None
+        except Exception as e:
+            self.erro = e
+            raise
+        finally:
+            with self._trava_estado:
+                self._pendentes -= len(tarefas)
+
+    def _acrescentar(self, linha):
+        """Escreve um evento no fim do diário; deve ser chamado com a trava adquirida."""
+        try:
+            with open(self.arquivo_diario, "ab") as f:
+                f.write(linha)
+                f.flush()
+                if self._gravador is None:
+                    os.fsync(f.fileno())
+                self._identidade = os.fstat(f.fileno()).st_ino
+        except OSError as e:
+            self.erro = e
+            raise
+        self._posicao += len(linha)
+        if self._gravador is not None:
+            self._enviar(("eventos",))
+
+    @cronometrado("diario_gravar_eventos")
+    def _confirmar_eventos(self):
+        with open(self.arquivo_diario, "ab") as f:
+            os.fsync(f.fileno())
+
+    @cronometrado("diario_gravar_snapshot")
+    def _gravar_snapshot(self):
+        """
+        Compacta o diário, mantendo a trava apenas na captura e na troca dos arquivos.
+
+        A captura do estado (ver RepositorioPacientes.capturar) e a troca do snapshot
+        e do diário são feitas com a trava; a compressão das altas e a gravação do
+        snapshot em um arquivo temporário, que são a maior parte do custo, ficam fora
+        dela, de modo que a interface e as outras estações continuam registrando
+        eventos nesse meio tempo.
+        """
+        with self.trava:
+            self.historico_arquivado.atualizar()
+            arquivado_ate = self.historico_arquivado.ultimo_evento or 0
+            ultimo_evento = self.ultimo_evento
+            captura = self.repositorio.capturar()
+            eventos_altas = list(self._eventos_altas)
+            lido_ate = (self._identidade, self._posicao, self._evento_snapshot)
+
+        preparado = self._preparar_arquivamento(captura["historico"], eventos_altas, arquivado_ate)
+        temporario = self._gravar_temporario(ultimo_evento, captura["pacientes"])
+        try:
+            with self.trava:
+                if self._ultimo_evento_do_snapshot() > ultimo_evento:
+                    # Outro processo já gravou um snapshot mais recente
+                    return
+                # Aplica antes o que outro processo gravou, inclusive uma compactação
+                # anterior a esta, para que a memória e a leitura do diário estejam em dia
+                self._sincronizar()
+                # As altas vão para o histórico arquivado antes da troca do snapshot; se houver
+                # uma queda entre as duas gravações, a abertura não as duplica (ver abrir). As
+                # que outro processo arquivou depois da captura não são arquivadas de novo
+                self.historico_arquivado.atualizar()
+                if (self.historico_arquivado.ultimo_evento or 0) != arquivado_ate:
+                    arquivado_ate = self.historico_arquivado.ultimo_evento or 0
+                    preparado = self._preparar_arquivamento(captura["historico"], eventos_altas, arquivado_ate)
+                self.historico_arquivado.confirmar(preparado, ultimo_evento)
+
+                # A troca do arquivo e a retirada das altas arquivadas da memória acontecem
+                # juntas; as altas são identificadas pelo número do evento, e não pela
+                # posição na captura, pois outro processo pode ter compactado nesse meio tempo
+                gravados = bisect.bisect_right(self._eventos_altas, ultimo_evento)
+                with self.repositorio.trava_historico:
+                    os.replace(temporario, self.arquivo)
+                    self.repositorio.concluir_compactacao(self.historico_arquivado, gravados)
+                del self._eventos_altas[:gravados]
+                # Se o diário não foi trocado desde a captura, os eventos posteriores a ela
+                # começam na posição lida naquele momento
+                identidade, posicao, evento_snapshot = lido_ate
+                if identidade == self._identidade and evento_snapshot == self._evento_snapshot:
+                    self._reescrever_diario(ultimo_evento, posicao)
+                else:
+                    self._reescrever_diario(ultimo_evento)
+                self._evento_snapshot = ultimo_evento
+        finally:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+        logging.info(f"Diário {self.arquivo_diario} compactado no evento {ultimo_evento}.")
+
+    def _preparar_arquivamento(self, historico, eventos_altas, arquivado_ate):
+        """Comprime as altas capturadas que ainda não estão no histórico arquivado."""
+        arquivadas = bisect.bisect_right(eventos_altas, arquivado_ate)
+        return self.historico_arquivado.preparar(registro.para_dict() for registro in historico[arquivadas:])
+
+    def _gravar_temporario(self, ultimo_evento, pacientes):
+        """
+        Grava o snapshot em um arquivo temporário ao lado do definitivo.
+
+        O nome é único, pois outra compactação (de outra estação ou de outro
+        DiarioPacientes) pode estar gravando ao mesmo tempo, também sem a trava.
+
+        Returns:
+            str: Caminho do arquivo temporário.
+        """
+        pasta, nome = os.path.split(os.path.abspath(self.arquivo))
+        descritor, temporario = tempfile.mkstemp(prefix=f"{nome}.", suffix=".tmp", dir=pasta)
+        try:
+            with os.fdopen(descritor, "wb") as f:
+                f.write(b'{\n    "ultimo_evento": %d,\n    "pacientes": [' % ultimo_evento)
+                if pacientes:
+                    f.write(b"\n        ")
+                    f.write(",\n        ".join(pacientes).encode("utf-8"))
+                    f.write(b"\n    ")
+                # A chave é mantida vazia para quem lê o arquivo com carregar_dados
+                f.write(b'],\n    "historico": []\n}\n')
+                f.flush()
+                os.fsync(f.fileno())
+        except BaseException:
+            os.remove(temporario)
+            raise
+        return temporario
+
+    def _reescrever_diario(self, ultimo_evento, inicio=None):
+        """
+        Mantém no diário apenas os eventos posteriores ao snapshot.
+
+        Os eventos seguintes, deste ou de outros processos, são mantidos, e o diário
+        é trocado atomicamente; os outros processos percebem a troca pela identidade
+        do arquivo (ver _sincronizar). Deve ser chamado com a trava adquirida, logo
+        depois de _sincronizar.
+
+        Args:
+            ultimo_evento (int): Último evento incluído no snapshot.
+            inicio (int): Posição, no diário atual, da linha seguinte à de ultimo_evento,
+                se conhecida; assim só os eventos posteriores a ela são lidos.
+        """
+        if not os.path.exists(self.arquivo_diario):
+            return
+        if inicio is not None:
+            # Tudo o que vem depois já foi lido e validado por _sincronizar
+            with open(self.arquivo_diario, "rb") as f:
+                f.seek(inicio)
+                restantes = [f.read(self._posicao - inicio)]
+            posicao = self._posicao - inicio
+        else:
+            with open(self.arquivo_diario, "rb") as f:
+                linhas = f.readlines()
+            restantes = []
+            inicio = 0
+            posicao = 0
+            for linha in linhas:
+                try:
+                    if json.loads(linha)["seq"] > ultimo_evento:
+                        restantes.append(linha)
+                        if inicio < self._posicao:
+                            posicao += len(linha)
+                except (ValueError, KeyError):
+                    break
+                inicio += len(linha)
+        temporario = f"{self.arquivo_diario}.tmp"
+        with open(temporario, "wb") as f:
+            f.write(b"".join(restantes))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, self.arquivo_diario)
+        self._identidade, self._posicao = self._identificar_diario()[0], posicao
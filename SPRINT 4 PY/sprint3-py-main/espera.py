@@ -0,0 +1,215 @@
+import bisect
+
+# Peso de cada nova observação nas médias móveis exponenciais
+ALFA_MEDIA = 0.2
+
+# Quantil da espera exibido junto com a média (90% dos pacientes esperaram até ele)
+QUANTIL_ESPERA = 0.9
+
+# Intervalos entre chamadas maiores que este, em segundos, são pausas no atendimento
+# (troca de plantão, madrugada) e não entram no ritmo de atendimento
+PAUSA_MAXIMA = 3600
+
+
+class MediaMovel:
+    """Média móvel exponencial: as observações recentes pesam mais, com memória O(1)."""
+
+    __slots__ = ("alfa", "valor")
+
+    def __init__(self, alfa=ALFA_MEDIA):
+        """
+        Args:
+            alfa (float): Peso de cada nova observação, entre 0 e 1.
+        """
+        self.alfa = alfa
+        self.valor = None
+
+    def atualizar(self, x):
+        """
+        Acrescenta uma observação à média.
+
+        Args:
+            x (float): Valor observado.
+        """
+        self.valor = x if self.valor is None else self.valor + self.alfa * (x - self.valor)
+
+
+class QuantilP2:
+    """
+    Estimativa de um quantil sem guardar as observações (algoritmo P², de Jain e Chlamtac).
+
+    Mantém cinco marcadores: o mínimo, o máximo, o quantil desejado e os pontos a
+    meio caminho entre eles. A cada observação, os marcadores intermediários são
+    ajustados por interpolação parabólica, com memória e custo O(1).
+    """
+
+    __slots__ = ("p", "_alturas", "_posicoes", "_desejadas", "_incrementos")
+
+    def __init__(self, p=QUANTIL_ESPERA):
+        """
+        Args:
+            p (float): Quantil estimado, entre 0 e 1 (0.5 é a mediana).
+        """
+        self.p = p
+        self._alturas = []
+        self._posicoes = [0, 1, 2, 3, 4]
+        self._desejadas = [0, 2 * p, 4 * p, 2 + 2 * p, 4]
+        self._incrementos = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def __len__(self):
+        return self._posicoes[4] + 1 if len(self._alturas) == 5 else len(self._alturas)
+
+    @property
+    def valor(self):
+        """float or None: Quantil estimado, ou None se não houve observações."""
+        alturas = self._alturas
+        if not alturas:
+            return None
+        if len(alturas) < 5:
+            return alturas[min(len(alturas) - 1, int(self.p * len(alturas)))]
+        return alturas[2]
+
+    def atualizar(self, x):
+        """
+        Acrescenta uma observação.
+
+        Args:
+            x (float): Valor observado.
+        """
+        q = self._alturas
+        if len(q) < 5:
+            bisect.insort(q, x)
+            return
+        n = self._posicoes
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = bisect.bisect_right(q, x, 1, 4) - 1
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self._desejadas[i] += self._incrementos[i]
+        for i in (1, 2, 3):
+            d = self._desejadas[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                altura = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+                )
+                if not q[i - 1] < altura < q[i + 1]:
+                    # A parábola saiu do intervalo: usa a interpolação linear
+                    altura = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = altura
+                n[i] += d
+
+
+class EstimadorEspera:
+    """
+    Previsão do tempo de espera por gravidade a partir do ritmo recente de atendimento.
+
+    A cada chamada, a espera do paciente (da chegada ao primeiro atendimento)
+    atualiza a média móvel e o quantil da sua gravidade, e o intervalo desde a
+    chamada anterior atualiza a média móvel do intervalo entre chamadas. Nenhuma
+    observação é guardada: a memória é O(1) por gravidade.
+
+    A previsão para quem chega agora em uma gravidade é o número de pacientes que
+    serão chamados antes dele (até o último da mesma gravidade na fila) vezes o
+    intervalo médio entre chamadas. Sem pacientes da gravidade na fila, vale a
+    espera média observada.
+    """
+
+    def __init__(self, alfa=ALFA_MEDIA, quantil=QUANTIL_ESPERA):
+        """
+        Args:
+            alfa (float): Peso de cada nova observação nas médias móveis.
+            quantil (float): Quantil da espera estimado em cada gravidade.
+        """
+        self.alfa = alfa
+        self.quantil = quantil
+        self._esperas = {}
+        self._intervalo = MediaMovel(alfa)
+        self._ultima_chamada = None
+
+    @property
+    def intervalo(self):
+        """float or None: Intervalo médio recente entre chamadas, em segundos."""
+        return self._intervalo.valor
+
+    def registrar_atendimento(self, gravidade, chegada, instante):
+        """
+        Registra a chamada de um paciente.
+
+        Args:
+            gravidade (str): Gravidade do paciente na fila.
+            chegada (float): Instante do check-in (time.time), ou None se desconhecido.
+            instante (float): Instante da chamada (time.time).
+        """
+        if isinstance(chegada, (int, float)):
+            media, quantil = self._esperas.get(gravidade) or self._esperas.setdefault(
+                gravidade, (MediaMovel(self.alfa), QuantilP2(self.quantil))
+            )
+            espera = max(0.0, instante - chegada)
+            media.atualizar(espera)
+            quantil.atualizar(espera)
+        if self._ultima_chamada is not None and 0 <= instante - self._ultima_chamada <= PAUSA_MAXIMA:
+            self._intervalo.atualizar(instante - self._ultima_chamada)
+        if self._ultima_chamada is None or instante > self._ultima_chamada:
+            self._ultima_chamada = instante
+
+    def prever(self, itens):
+        """
+        Resume as esperas observadas e prevê a espera de cada gravidade.
+
+        Args:
+            itens (list): Pares (paciente, gravidade) na ordem de atendimento, como em FilaTriagem.itens.
+
+        Returns:
+            dict: Gravidade -> {"pacientes", "atendidos", "espera_media", "espera_quantil", "previsao"},
+                com os tempos em segundos (None quando ainda não há dados).
+        """
+        ultimas = {}
+        contagem = {}
+        for posicao, (_, gravidade) in enumerate(itens):
+            ultimas[gravidade] = posicao
+            contagem[gravidade] = contagem.get(gravidade, 0) + 1
+        resumo = {}
+        for gravidade in sorted(set(ultimas) | set(self._esperas)):
+            media, quantil = self._esperas.get(gravidade, (None, None))
+            espera_media = media.valor if media else None
+            if gravidade in ultimas and self.intervalo is not None:
+                previsao = (ultimas[gravidade] + 1) * self.intervalo
+            else:
+                previsao = espera_media
+            resumo[gravidade] = {
+                "pacientes": contagem.get(gravidade, 0),
+                "atendidos": len(quantil) if quantil else 0,
+                "espera_media": espera_media,
+                "espera_quantil": quantil.valor if quantil else None,
+                "previsao": previsao,
+            }
+        return resumo
+
+
+def formatar_espera(segundos):
+    """
+    Converte uma espera em texto para exibição.
+
+    Args:
+        segundos (float): Espera em segundos, ou None se desconhecida.
+
+    Returns:
+        str: Por exemplo "menos de 1 min", "12 min" ou "1 h 05 min".
+    """
+    if segundos is None:
+        return "sem dados"
+    minutos = int(segundos // 60)
+    if minutos < 1:
+        return "menos de 1 min"
+    if minutos < 60:
+        return f"{minutos} min"
+    return f"{minutos // 60} h {minutos % 60:02d} min"
@@ -0,0 +1,313 @@
+import heapq
+import time
+from itertools import count
+from logica import calcular_idade, normalizar_cpf
+from metricas import cronometrado
+from regras import motor_padrao
+
+
+def chave_prioridade(paciente, motor=None):
+    """
+    Calcula a chave de ordenação da fila e a gravidade do paciente.
+
+    Com as regras padrão, a ordem é: pacientes graves primeiro, depois lesões
+    físicas e, entre elas, lesões na cabeça; em seguida, idosos e crianças. A idade
+    vem da chave "nascimento" (ver RepositorioPacientes.adicionar).
+
+    O resultado fica guardado no próprio paciente, na chave "triagem", junto com
+    a assinatura das regras usadas, e é gravado com o registro. Ele só é
+    recalculado quando as regras mudam ou quando a chave é removida porque os
+    sintomas mudaram (ver invalidar_triagem).
+
+    Args:
+        paciente (dict): Dados do paciente.
+        motor (MotorRegras): Regras de triagem. Padrão: as regras do arquivo regras_triagem.json.
+
+    Returns:
+        tuple: Chave de prioridade (menor é atendido antes) e a gravidade do paciente.
+    """
+    motor = motor or motor_padrao()
+    triagem = paciente.get("triagem")
+    if isinstance(triagem, dict) and triagem.get("regras") == motor.assinatura:
+        try:
+            return tuple(triagem["prioridade"]), triagem["gravidade"]
+        except (KeyError, TypeError):
+            pass
+    nascimento = paciente.get("nascimento")
+    idade = calcular_idade(nascimento) if isinstance(nascimento, int) else None
+    prioridade, gravidade = motor.chave_prioridade(paciente.get("sintomas", {}), idade)
+    paciente["triagem"] = {"gravidade": gravidade, "prioridade": list(prioridade), "regras": motor.assinatura}
+    return prioridade, gravidade
+
+
+def chave_prioridade_lote(pacientes, motor=None):
+    """
+    Calcula e guarda a triagem de vários pacientes de uma vez, como chave_prioridade.
+
+    A classificação é feita por MotorRegras.chave_prioridade_lote, com uma única
+    passada pelas regras de gravidade para todos os pacientes.
+
+    Args:
+        pacientes (list): Pacientes ainda não classificados.
+        motor (MotorRegras): Regras de triagem. Padrão: as regras do arquivo regras_triagem.json.
+
+    Returns:
+        list: Pares (chave de prioridade, gravidade), na mesma ordem.
+
+    Raises:
+        TypeError, ValueError: Caso as regras não aceitem os sintomas de algum paciente;
+            nesse caso, nenhum paciente é alterado.
+    """
+    motor = motor or motor_padrao()
+    idades = [
+        calcular_idade(paciente["nascimento"]) if isinstance(paciente.get("nascimento"), int) else None
+        for paciente in pacientes
+    ]
+    resultado = motor.chave_prioridade_lote([paciente.get("sintomas", {}) for paciente in pacientes], idades)
+    for paciente, (prioridade, gravidade) in zip(pacientes, resultado):
+        paciente["triagem"] = {"gravidade": gravidade, "prioridade": list(prioridade), "regras": motor.assinatura}
+    return resultado
+
+
+def posto_prioridade(prioridade):
+    """
+    Converte a chave de prioridade em um inteiro com a mesma ordem (menor é atendido antes).
+
+    Cada critério vira um bit, o primeiro critério no bit mais significativo.
+
+    Args:
+        prioridade (tuple): Chave de prioridade calculada por chave_prioridade.
+
+    Returns:
+        int: Posto da prioridade, de 0 a 2 ** len(prioridade) - 1.
+    """
+    return sum(int(criterio) << (len(prioridade) - 1 - i) for i, criterio in enumerate(prioridade))
+
+
+def invalidar_triagem(paciente):
+    """
+    Descarta a gravidade guardada no paciente, para que seja recalculada.
+
+    Args:
+        paciente (dict): Dados do paciente.
+    """
+    paciente.pop("triagem", None)
+
+
+class FilaTriagem:
+    """
+    Fila de espera por prioridade, implementada com um heap.
+
+    Dentro de um mesmo nível de prioridade, os pacientes são atendidos na ordem
+    de chegada. Inserção, chamada, remoção e reclassificação custam O(log n).
+
+    O atributo versao muda a cada alteração, para que as telas só redesenhem a
+    fila quando ela de fato mudou, e a quantidade de pacientes de cada gravidade
+    é mantida a cada alteração, para ser lida em O(1).
+
+    Se as regras definem um envelhecimento, a espera também conta: a chave passa a
+    ser o posto da prioridade (ver posto_prioridade) mais a chegada dividida pelo
+    envelhecimento, de modo que cada envelhecimento de espera vale um posto à
+    frente de quem chega agora. Como todos envelhecem no mesmo ritmo, a ordem entre
+    os pacientes já na fila não muda com o tempo e o heap não precisa ser refeito.
+    """
+
+    # Posições de cada entrada do heap; a versão desempata entradas antigas de um
+    # paciente reclassificado, que mantêm a mesma ordem de chegada
+    _PRIORIDADE, _ORDEM, _VERSAO, _PACIENTE, _GRAVIDADE, _VALIDA, _CHEGADA = range(7)
+
+    def __init__(self, pacientes=(), motor=None):
+        """
+        Args:
+            pacientes (iterable): Pacientes que entram na fila, em ordem de chegada.
+            motor (MotorRegras): Regras de triagem. Padrão: as regras do arquivo regras_triagem.json.
+        """
+        self.motor = motor
+        self._heap = []
+        self._entradas = {}
+        self._contagem = {}
+        self._contador = count()
+        self._versoes = count()
+        self.versao = 0
+        for paciente in pacientes:
+            self.adicionar(paciente)
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def __contains__(self, cpf):
+        return normalizar_cpf(cpf or "") in self._entradas
+
+    @cronometrado("fila_adicionar")
+    def adicionar(self, paciente, ordem=None, chegada=None):
+        """
+        Coloca um paciente na fila.
+
+        Args:
+            paciente (dict): Dados do paciente.
+            ordem (int): Ordem de chegada. Padrão: depois de todos os pacientes atuais.
+            chegada (float): Instante de entrada na fila (time.time). Padrão: o check-in
+                do paciente, na chave "chegada", ou agora.
+
+        Raises:
+            ValueError: Caso o paciente já esteja na fila.
+        """
+        chave = normalizar_cpf(paciente.get("cpf", ""))
+        if chave in self._entradas:
+            raise ValueError("Paciente já está na fila.")
+        prioridade, gravidade = chave_prioridade(paciente, self.motor)
+        if ordem is None:
+            ordem = next(self._contador)
+        if chegada is None:
+            chegada = paciente.get("chegada")
+            if not isinstance(chegada, (int, float)):
+                chegada = time.time()
+        entrada = [self._chave(prioridade, chegada), ordem, next(self._versoes), paciente, gravidade, True, chegada]
+        self._entradas[chave] = entrada
+        heapq.heappush(self._heap, entrada)
+        self._contagem[gravidade] = self._contagem.get(gravidade, 0) + 1
+        self.versao += 1
+
+    def _chave(self, prioridade, chegada):
+        envelhecimento = (self.motor or motor_padrao()).envelhecimento
+        if envelhecimento is None:
+            return prioridade
+        return (posto_prioridade(prioridade) + chegada / envelhecimento,)
+
+    def remover(self, cpf):
+        """
+        Retira um paciente da fila (por exemplo, ao receber alta).
+
+        Args:
+            cpf (str): CPF do paciente.
+
+        Returns:
+            dict or None: Paciente removido ou None se não estava na fila.
+        """
+        entrada = self._entradas.pop(normalizar_cpf(cpf or ""), None)
+        if entrada is None:
+            return None
+        entrada[self._VALIDA] = False
+        self._contagem[entrada[self._GRAVIDADE]] -= 1
+        self.versao += 1
+        if len(self._heap) > 2 * len(self._entradas) + 32:
+            self._heap = [e for e in self._heap if e[self._VALIDA]]
+            heapq.heapify(self._heap)
+        return entrada[self._PACIENTE]
+
+    def reclassificar(self, paciente):
+        """
+        Recalcula a prioridade de um paciente cujos sintomas mudaram,
+        mantendo sua ordem de chegada. A gravidade guardada no paciente é descartada.
+
+        Args:
+            paciente (dict): Dados atualizados do paciente.
+
+        Raises:
+            ValueError: Caso o paciente não esteja na fila.
+        """
+        entrada = self._entradas.get(normalizar_cpf(paciente.get("cpf", "")))
+        if entrada is None:
+            raise ValueError("Paciente não está na fila.")
+        self.remover(paciente.get("cpf", ""))
+        invalidar_triagem(paciente)
+        self.adicionar(paciente, ordem=entrada[self._ORDEM], chegada=entrada[self._CHEGADA])
+
+    def reordenar(self):
+        """
+        Recalcula a prioridade de todos os pacientes, mantendo a ordem de chegada
+        (por exemplo, depois que as regras de triagem foram recarregadas).
+        """
+        self._contagem = {}
+        for chave, entrada in self._entradas.items():
+            paciente = entrada[self._PACIENTE]
+            prioridade, gravidade = chave_prioridade(paciente, self.motor)
+            self._contagem[gravidade] = self._contagem.get(gravidade, 0) + 1
+            self._entradas[chave] = [
+                self._chave(prioridade, entrada[self._CHEGADA]), entrada[self._ORDEM], next(self._versoes), paciente, gravidade, True, entrada[self._CHEGADA]
+            ]
+        self._heap = list(self._entradas.values())
+        heapq.heapify(self._heap)
+        self.versao += 1
+
+    def _descartar_removidos(self):
+        while self._heap and not self._heap[0][self._VALIDA]:
+            heapq.heappop(self._heap)
+
+    def proximo(self):
+        """
+        Consulta o próximo paciente a ser atendido sem retirá-lo da fila.
+
+        Returns:
+            dict or None: Próximo paciente ou None se a fila estiver vazia.
+        """
+        self._descartar_removidos()
+        return self._heap[0][self._PACIENTE] if self._heap else None
+
+    @cronometrado("fila_chamar_proximo")
+    def chamar_proximo(self):
+        """
+        Retira e retorna o próximo paciente a ser atendido.
+
+        Returns:
+            dict or None: Paciente chamado ou None se a fila estiver vazia.
+        """
+        self._descartar_removidos()
+        if not self._heap:
+            return None
+        entrada = heapq.heappop(self._heap)
+        del self._entradas[normalizar_cpf(entrada[self._PACIENTE].get("cpf", ""))]
+        self._contagem[entrada[self._GRAVIDADE]] -= 1
+        self.versao += 1
+        return entrada[self._PACIENTE]
+
+    def gravidade(self, cpf):
+        """
+        Retorna a gravidade calculada quando o paciente entrou na fila.
+
+        Args:
+            cpf (str): CPF do paciente.
+
+        Returns:
+            str or None: Gravidade do paciente ou None se não estiver na fila.
+        """
+        entrada = self._entradas.get(normalizar_cpf(cpf or ""))
+        return entrada[self._GRAVIDADE] if entrada else None
+
+    def contagem(self):
+        """
+        Retorna quantos pacientes de cada gravidade estão na fila, sem percorrê-la.
+
+        Returns:
+            dict: Gravidade -> número de pacientes na fila.
+        """
+        return dict(self._contagem)
+
+    def itens(self):
+        """
+        Lista a fila na ordem de atendimento, sem reclassificar os pacientes.
+
+        Returns:
+            list: Pares (paciente, gravidade) na ordem de atendimento.
+        """
+        entradas = sorted(self._entradas.values(), key=lambda e: (e[self._PRIORIDADE], e[self._ORDEM]))
+        return [(e[self._PACIENTE], e[self._GRAVIDADE]) for e in entradas]
+
+    def estatisticas(self):
+        """
+        Resume a fila por gravidade: quantos pacientes esperam e há quanto tempo.
+
+        Returns:
+            dict: Gravidade -> {"pacientes", "espera_media", "espera_maxima"}, com as esperas em segundos.
+        """
+        agora = time.time()
+        resumo = {}
+        for entrada in list(self._entradas.values()):
+            espera = agora - entrada[self._CHEGADA]
+            grupo = resumo.setdefault(entrada[self._GRAVIDADE], {"pacientes": 0, "espera_media": 0.0, "espera_maxima": 0.0})
+            grupo["pacientes"] += 1
+            grupo["espera_media"] += espera
+            grupo["espera_maxima"] = max(grupo["espera_maxima"], espera)
+        for grupo in resumo.values():
+            grupo["espera_media"] /= grupo["pacientes"]
+        return resumo
@@ -0,0 +1,137 @@
+import datetime
+import random
+
+NOMES = ("Ana", "Bruno", "Carla", "Daniel", "Eduarda", "Felipe", "Gabriela", "Henrique", "Isabela", "João",
+         "Larissa", "Marcos", "Natália", "Otávio", "Paula", "Rafael", "Sofia", "Thiago", "Vitória", "Samuel")
+SOBRENOMES = ("Silva", "Santos", "Oliveira", "Souza", "Lima", "Pereira", "Ferreira", "Costa", "Rodrigues",
+              "Almeida", "Nascimento", "Carvalho", "Gomes", "Martins", "Araújo", "Ribeiro")
+ALERGIAS = ("camarão", "dipirona", "penicilina", "lactose", "amendoim", "poeira")
+LOCAIS_LESAO = ("braço", "perna", "cabeça", "mão", "pé", "costas")
+DESCRICOES_LESAO = ("queda", "acidente de carro", "torção jogando bola", "batida", "corte com faca")
+LOCAIS_DOR = ("barriga", "cabeça", "tórax", "ouvido")
+DIAGNOSTICOS = ("gripe", "virose", "sinusite", "fratura", "entorse", "gastrite", "otite", "pneumonia", "enxaqueca")
+OBSERVACOES = ("repouso", "retorno em 7 dias", "hidratação", "acompanhar a febre", None)
+MEDICACOES = ("dipirona", "paracetamol", "ibuprofeno", "amoxicilina", None)
+
+# Distribuições dos sintomas respondidos no questionário do check-in
+FEBRE = (("Nenhuma", "Baixa", "Moderada", "Alta"), (55, 20, 15, 10))
+DOR = (("Nenhuma", "leve", "moderada", "intensa"), (40, 25, 22, 13))
+
+# Faixa das datas de nascimento geradas
+NASCIMENTO_MINIMO = datetime.date(1930, 1, 1).toordinal()
+NASCIMENTO_MAXIMO = datetime.date(2024, 12, 31).toordinal()
+
+
+def cpf_valido(numero):
+    """
+    Gera um CPF válido a partir de um número de até 9 dígitos.
+
+    Args:
+        numero (int): Número usado como base do CPF.
+
+    Returns:
+        str: CPF com 11 dígitos e dígitos verificadores corretos.
+    """
+    base = f"{numero:09d}"
+    soma = sum(int(base[i]) * (10 - i) for i in range(9))
+    base += str((soma * 10 % 11) % 10)
+    soma = sum(int(base[i]) * (11 - i) for i in range(10))
+    return base + str((soma * 10 % 11) % 10)
+
+
+def _pessoa(rng, numero):
+    cpf = cpf_valido(numero)
+    # Parte dos CPFs é digitada com pontuação, como acontece na interface
+    if rng.random() < 0.1:
+        cpf = f"{cpf[:3]}.{cpf[3:6]}.{cpf[6:9]}-{cpf[9:]}"
+    nascimento = datetime.date.fromordinal(rng.randint(NASCIMENTO_MINIMO, NASCIMENTO_MAXIMO))
+    return {
+        "name": f"{rng.choice(NOMES)} {rng.choice(SOBRENOMES)}",
+        "cpf": cpf,
+        "birth_date": nascimento.strftime("%d/%m/%Y"),
+        "alergias": rng.choice(ALERGIAS) if rng.random() < 0.3 else "Nenhuma alergia registrada.",
+    }
+
+
+def _sintomas(rng):
+    if rng.random() < 0.15:
+        sintomas = {"lesao_fisica": {"descricao": rng.choice(DESCRICOES_LESAO), "local": rng.choice(LOCAIS_LESAO)}}
+    else:
+        dor = rng.choices(*DOR)[0]
+        sintomas = {
+            "febre": rng.choices(*FEBRE)[0],
+            "dor": dor,
+            "local_dor": rng.choice(LOCAIS_DOR) if dor != "Nenhuma" else "Nenhuma",
+            "falta_ar": "Sim" if rng.random() < 0.12 else "Não",
+            "cansaço": "Sim" if rng.random() < 0.35 else "Não",
+        }
+    sintomas["tempo_sintomas"] = min(int(rng.expovariate(1 / 2.5)), 30)
+    return sintomas
+
+
+def _diagnostico(rng, alergias):
+    return {
+        "diagnostico": rng.choice(DIAGNOSTICOS),
+        "observacoes": rng.choice(OBSERVACOES),
+        "medicacoes_preferidas": rng.choice(MEDICACOES),
+        "alergias": alergias,
+    }
+
+
+def gerar_pacientes(n, semente=42, ativos=False, inicio=0):
+    """
+    Gera pacientes sintéticos no formato de dados_pacientes.json.
+
+    A geração é determinística para a mesma semente. Os CPFs são válidos e, entre
+    os pacientes ativos, únicos; no histórico, cerca de 20% dos registros são
+    retornos de pacientes já atendidos, com o mesmo CPF.
+
+    Args:
+        n (int): Número de pacientes.
+        semente (int): Semente do gerador aleatório.
+        ativos (bool): Se True, gera pacientes ativos (poucos diagnósticos, alguns
+            em atendimento); se False, registros de alta com um a três diagnósticos.
+        inicio (int): Deslocamento usado na base dos CPFs, para gerar grupos sem repetição.
+
+    Yields:
+        dict: Dados de um paciente.
+    """
+    rng = random.Random(f"{semente}-{ativos}-{inicio}")
+    ja_atendidos = []
+    for i in range(n):
+        if not ativos and ja_atendidos and rng.random() < 0.2:
+            pessoa = rng.choice(ja_atendidos)
+        else:
+            # Permutação das bases de CPF (7919 é primo com 10^9), sem repetir CPFs
+            pessoa = _pessoa(rng, ((inicio + i) * 7919 + 12345) % 10**9)
+            if not ativos and len(ja_atendidos) < 10_000:
+                ja_atendidos.append(pessoa)
+        paciente = dict(pessoa)
+        paciente["sintomas"] = _sintomas(rng)
+        if ativos:
+            paciente["diagnosticos"] = [_diagnostico(rng, pessoa["alergias"])] if rng.random() < 0.3 else []
+            if rng.random() < 0.1:
+                paciente["em_atendimento"] = True
+        else:
+            paciente["diagnosticos"] = [_diagnostico(rng, pessoa["alergias"]) for _ in range(rng.randint(1, 3))]
+        yield paciente
+
+
+def gerar_dados(n, semente=42, proporcao_ativos=0.2):
+    """
+    Gera uma população completa, com pacientes ativos e histórico de altas.
+
+    Args:
+        n (int): Número total de registros (ativos mais histórico).
+        semente (int): Semente do gerador aleatório.
+        proporcao_ativos (float): Fração dos registros que são pacientes ativos.
+
+    Returns:
+        dict: Dicionário com as chaves "pacientes" e "historico".
+    """
+    total_ativos = round(n * proporcao_ativos)
+    return {
+        "pacientes": list(gerar_pacientes(total_ativos, semente, ativos=True)),
+        # As bases de CPF do histórico começam depois das dos ativos, para não repetir pacientes
+        "historico": list(gerar_pacientes(n - total_ativos, semente, inicio=total_ativos)),
+    }
@@ -0,0 +1,373 @@
+import argparse
+import csv
+import itertools
+import json
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contexto import ContextoAplicacao
+from cpf_lote import validar_cpfs_lote
+from data_lote import converter_datas_lote
+from fila import chave_prioridade, chave_prioridade_lote
+from logica import configurar_logs, converter_data_nascimento, normalizar_cpf, validar_cpf, validar_sintomas
+from metricas import METRICAS, cronometrado
+from regras import MotorRegras, motor_padrao
+
+# Registros enviados a cada processo de validação de uma vez
+TAMANHO_LOTE = 5000
+
+# Colunas de sintomas aceitas em arquivos CSV sem a coluna "sintomas" (JSON)
+COLUNAS_SINTOMAS = ("febre", "dor", "local_dor", "falta_ar", "cansaço", "tempo_sintomas")
+
+# Colunas dos arquivos CSV exportados
+COLUNAS_EXPORTACAO = ("name", "cpf", "birth_date", "alergias", "sintomas", "diagnosticos", "em_atendimento")
+
+# Motor de regras de cada processo de validação, criado em _iniciar_processo
+_motor = None
+
+
+def _formato(arquivo):
+    """Retorna "csv" ou "jsonl" conforme a extensão do arquivo."""
+    return "csv" if arquivo.lower().endswith(".csv") else "jsonl"
+
+
+def ler_lotes(arquivo, tamanho_lote=TAMANHO_LOTE):
+    """
+    Lê o arquivo de pré-cadastros em lotes, sem carregá-lo inteiro na memória.
+
+    Arquivos .csv têm cabeçalho (separado por vírgula ou ponto e vírgula); os demais
+    são lidos como JSON Lines, um paciente por linha, decodificado depois, no
+    processo de validação.
+
+    Args:
+        arquivo (str): Caminho do arquivo CSV ou JSONL.
+        tamanho_lote (int): Número de registros por lote.
+
+    Yields:
+        list: Pares (número da linha, registro), com o registro como dicionário (CSV) ou texto (JSONL).
+    """
+    with open(arquivo, encoding="utf-8-sig", newline="") as f:
+        if _formato(arquivo) == "csv":
+            amostra = f.read(4096)
+            f.seek(0)
+            try:
+                dialeto = csv.Sniffer().sniff(amostra, delimiters=",;")
+            except csv.Error:
+                dialeto = csv.excel
+            leitor = csv.DictReader(f, dialect=dialeto)
+            registros = ((leitor.line_num, linha) for linha in leitor)
+        else:
+            registros = ((numero, linha) for numero, linha in enumerate(f, start=1) if linha.strip())
+        while lote := list(itertools.islice(registros, tamanho_lote)):
+            yield lote
+
+
+def _sintomas_csv(registro):
+    if registro.get("sintomas"):
+        return json.loads(registro["sintomas"])
+    sintomas = {coluna: registro[coluna] for coluna in COLUNAS_SINTOMAS if registro.get(coluna)}
+    if "tempo_sintomas" in sintomas:
+        # Aceita frações de dia ("3.5"), mantendo inteiros os valores inteiros
+        tempo_sintomas = float(sintomas["tempo_sintomas"])
+        sintomas["tempo_sintomas"] = int(tempo_sintomas) if tempo_sintomas.is_integer() else tempo_sintomas
+    return sintomas
+
+
+def decodificar_registro(registro):
+    """
+    Converte uma linha do arquivo de pré-cadastros em um dicionário com os sintomas.
+
+    Args:
+        registro (dict or str): Linha do CSV (dicionário) ou linha JSON.
+
+    Returns:
+        dict: Registro com "sintomas" em um dicionário.
+
+    Raises:
+        ValueError: Caso a linha não possa ser decodificada.
+    """
+    try:
+        if isinstance(registro, str):
+            registro = json.loads(registro)
+            if isinstance(registro, dict):
+                registro["sintomas"] = registro.get("sintomas") or {}
+        else:
+            registro = dict(registro, sintomas=_sintomas_csv(registro))
+    except ValueError as e:
+        raise ValueError(f"Registro mal formado: {e}")
+    if not isinstance(registro, dict) or not isinstance(registro["sintomas"], dict):
+        raise ValueError("Registro mal formado.")
+    return registro
+
+
+def validar_registro(registro, cpf_valido=None, nascimento_convertido=None):
+    """
+    Valida um pré-cadastro decodificado e o converte no formato de paciente do check-in.
+
+    Args:
+        registro (dict): Registro retornado por decodificar_registro.
+        cpf_valido (bool): Resultado da validação do CPF, quando já feita em lote.
+            Padrão: valida com validar_cpf.
+        nascimento_convertido (int): Data de nascimento convertida em lote (0 se inválida).
+            Padrão: converte com converter_data_nascimento.
+
+    Returns:
+        dict: Paciente pronto para o cadastro.
+
+    Raises:
+        ValueError: Caso algum campo ou sintoma seja inválido.
+    """
+    nome, cpf, nascimento = registro.get("name"), registro.get("cpf"), registro.get("birth_date")
+    if not nome or not cpf or not nascimento:
+        raise ValueError("Todos os campos obrigatórios devem ser preenchidos.")
+    if cpf_valido is None:
+        cpf_valido = isinstance(cpf, str) and validar_cpf(cpf)
+    if not cpf_valido:
+        raise ValueError("CPF inválido.")
+    if nascimento_convertido is None:
+        nascimento_convertido = converter_data_nascimento(nascimento)
+    if not nascimento_convertido:
+        raise ValueError("Data de nascimento inválida. Use o formato DD/MM/AAAA.")
+    validar_sintomas(registro["sintomas"])
+    return {
+        "name": nome,
+        "cpf": cpf,
+        "birth_date": nascimento,
+        "nascimento": nascimento_convertido,
+        "alergias": registro.get("alergias") or "Nenhuma alergia registrada.",
+        "sintomas": registro["sintomas"],
+        "diagnosticos": [],
+    }
+
+
+def _iniciar_processo(arquivo_regras):
+    global _motor
+    _motor = MotorRegras(arquivo_regras) if arquivo_regras else motor_padrao()
+
+
+def _processar_lote(lote):
+    """
+    Valida e classifica um lote no processo de validação.
+
+    A gravidade fica guardada em cada paciente (ver fila.chave_prioridade), de modo
+    que a fila não precisa classificá-los de novo no processo principal. Os
+    pacientes válidos do lote são classificados de uma vez (ver
+    fila.chave_prioridade_lote); só se as regras recusarem algum valor eles são
+    classificados um a um, para rejeitar apenas as linhas com esse valor.
+
+    Returns:
+        list: Tuplas (número da linha, CPF informado, paciente ou None, motivo da rejeição ou None).
+    """
+    decodificados = []
+    resultado = []
+    for linha, registro in lote:
+        try:
+            decodificados.append((linha, decodificar_registro(registro)))
+        except ValueError as e:
+            resultado.append((linha, None, None, str(e)))
+    # Os CPFs e as datas do lote são validados de uma vez, com as mesmas regras de
+    # validar_cpf e converter_data_nascimento
+    cpfs = [registro.get("cpf") for _, registro in decodificados]
+    validos = validar_cpfs_lote([cpf if isinstance(cpf, str) else "" for cpf in cpfs]).tolist()
+    nascimentos = converter_datas_lote(registro.get("birth_date") for _, registro in decodificados).tolist()
+    validados = []
+    for (linha, registro), cpf, cpf_valido, nascimento in zip(decodificados, cpfs, validos, nascimentos):
+        try:
+            validados.append((linha, cpf, validar_registro(registro, cpf_valido, nascimento)))
+        except ValueError as e:
+            resultado.append((linha, cpf, None, str(e)))
+    try:
+        chave_prioridade_lote([paciente for _, _, paciente in validados], _motor)
+    except (ValueError, TypeError):
+        # Regras personalizadas podem não aceitar algum valor: a linha é rejeitada, não a importação
+        for linha, cpf, paciente in validados:
+            try:
+                chave_prioridade(paciente, _motor)
+            except (ValueError, TypeError) as e:
+                resultado.append((linha, cpf, None, str(e)))
+                continue
+            resultado.append((linha, cpf, paciente, None))
+        return resultado
+    resultado.extend((linha, cpf, paciente, None) for linha, cpf, paciente in validados)
+    return resultado
+
+
+def _mapear_em_processos(executor, funcao, lotes, em_andamento):
+    """
+    Como executor.map, mas lê um novo lote só quando há vaga entre os lotes em andamento.
+
+    executor.map lê todo o iterável de entrada antes de devolver o primeiro resultado,
+    o que carregaria o arquivo inteiro na memória.
+    """
+    pendentes = deque()
+    for lote in lotes:
+        pendentes.append(executor.submit(funcao, lote))
+        if len(pendentes) >= em_andamento:
+            yield pendentes.popleft().result()
+    while pendentes:
+        yield pendentes.popleft().result()
+
+
+@cronometrado("importacao_importar")
+def importar(arquivo, contexto, arquivo_rejeitados=None, processos=None, tamanho_lote=TAMANHO_LOTE):
+    """
+    Importa pré-cadastros de um arquivo CSV ou JSONL.
+
+    Os lotes são validados e classificados em um conjunto de processos; a busca de
+    CPFs repetidos no arquivo, que depende de todos os lotes, é feita no processo
+    principal. Os pacientes aceitos de cada lote são cadastrados juntos, com um
+    registro no armazenamento por lote (ver ContextoAplicacao.importar_pacientes);
+    os CPFs já cadastrados, inclusive por outra estação durante a importação, são
+    verificados na transação do cadastro e vão para o relatório de rejeitados. Se a
+    gravação de um lote falhar, os lotes anteriores continuam cadastrados.
+
+    Args:
+        arquivo (str): Arquivo de pré-cadastros (.csv ou JSON Lines).
+        contexto (ContextoAplicacao): Contexto com os dados dos pacientes.
+        arquivo_rejeitados (str): Relatório CSV dos registros rejeitados. Padrão: sem relatório.
+        processos (int): Número de processos de validação; 1 valida no próprio processo.
+            Padrão: o número de CPUs.
+        tamanho_lote (int): Registros por lote.
+
+    Returns:
+        dict: Campos "lidos", "importados", "rejeitados", "segundos" e "registros_por_segundo".
+    """
+    inicio = time.perf_counter()
+    importados = 0
+    cpfs_aceitos = set()
+    rejeitados = 0
+    relatorio = open(arquivo_rejeitados, "w", encoding="utf-8", newline="") if arquivo_rejeitados else None
+    escritor = csv.writer(relatorio) if relatorio else None
+    if escritor:
+        escritor.writerow(("linha", "cpf", "motivo"))
+    executor = None
+    try:
+        lotes = ler_lotes(arquivo, tamanho_lote)
+        processos = processos or os.cpu_count() or 1
+        if processos == 1:
+            _iniciar_processo(contexto.arquivo_regras)
+            resultados = map(_processar_lote, lotes)
+        else:
+            executor = ProcessPoolExecutor(processos, initializer=_iniciar_processo, initargs=(contexto.arquivo_regras,))
+            resultados = _mapear_em_processos(executor, _processar_lote, lotes, 2 * processos)
+        for resultado in resultados:
+            recusas = []
+            aceitos = []
+            linhas = {}
+            for linha, cpf, paciente, motivo in resultado:
+                if paciente is not None:
+                    chave = normalizar_cpf(paciente["cpf"])
+                    if chave not in cpfs_aceitos:
+                        cpfs_aceitos.add(chave)
+                        aceitos.append(paciente)
+                        linhas[chave] = linha
+                        continue
+                    motivo = "CPF repetido no arquivo."
+                recusas.append((linha, cpf, motivo))
+            # O cadastro confere, já na transação, os CPFs cadastrados desde a validação
+            recusados = contexto.importar_pacientes(aceitos, recusar_cadastrados=True)
+            for paciente in recusados:
+                recusas.append((linhas[normalizar_cpf(paciente["cpf"])], paciente["cpf"], "Este CPF já está cadastrado."))
+            importados += len(aceitos) - len(recusados)
+            rejeitados += len(recusas)
+            if escritor:
+                recusas.sort(key=lambda recusa: recusa[0])
+                escritor.writerows((linha, cpf if isinstance(cpf, str) else "", motivo) for linha, cpf, motivo in recusas)
+            logging.info(f"Importação de {arquivo}: {importados} importados e {rejeitados} rejeitados até agora.")
+    finally:
+        if executor:
+            executor.shutdown()
+        if relatorio:
+            relatorio.close()
+
+    segundos = time.perf_counter() - inicio
+    lidos = importados + rejeitados
+    METRICAS.incrementar("importacao_registros", importados, resultado="importado")
+    METRICAS.incrementar("importacao_registros", rejeitados, resultado="rejeitado")
+    logging.info(f"Importação de {arquivo} concluída: {importados} pacientes importados e {rejeitados} rejeitados.")
+    return {
+        "lidos": lidos,
+        "importados": importados,
+        "rejeitados": rejeitados,
+        "segundos": segundos,
+        "registros_por_segundo": lidos / segundos if segundos else None,
+    }
+
+
+@cronometrado("importacao_exportar")
+def exportar(repositorio, saida, historico=False):
+    """
+    Exporta os pacientes para um arquivo CSV ou JSONL, um registro por vez.
+
+    No CSV, sintomas e diagnósticos vão em colunas com JSON, no mesmo formato
+    aceito pela importação.
+
+    Args:
+        repositorio (RepositorioPacientes): Pacientes a exportar.
+        saida (str): Arquivo de destino (.csv ou JSON Lines).
+        historico (bool): Se True, exporta também os registros de alta.
+
+    Returns:
+        int: Número de registros exportados.
+    """
+    registros = itertools.chain(repositorio, repositorio.iterar_historico() if historico else ())
+    total = 0
+    temporario = f"{saida}.tmp"
+    with open(temporario, "w", encoding="utf-8", newline="") as f:
+        if _formato(saida) == "csv":
+            escritor = csv.writer(f)
+            escritor.writerow(COLUNAS_EXPORTACAO)
+            for registro in registros:
+                escritor.writerow((
+                    registro.get("name"), registro.get("cpf"), registro.get("birth_date"), registro.get("alergias"),
+                    json.dumps(registro.get("sintomas", {}), ensure_ascii=False),
+                    json.dumps(registro.get("diagnosticos", []), ensure_ascii=False),
+                    int(bool(registro.get("em_atendimento"))),
+                ))
+                total += 1
+        else:
+            for registro in registros:
+                f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+                total += 1
+    os.replace(temporario, saida)
+    logging.info(f"{total} registros exportados para {saida}.")
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importação e exportação de pacientes em lote (CSV ou JSON Lines).")
+    parser.add_argument("--arquivo", default="dados_pacientes.json", help="Arquivo JSON ou banco SQLite com os dados dos pacientes.")
+    parser.add_argument("--regras", help="Arquivo de regras de triagem. Padrão: regras_triagem.json.")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+    importacao = subcomandos.add_parser("importar", help="Importa pré-cadastros.")
+    importacao.add_argument("entrada", help="Arquivo .csv ou .jsonl com os pré-cadastros.")
+    importacao.add_argument("--rejeitados", default="rejeitados.csv", help="Relatório CSV dos registros rejeitados.")
+    importacao.add_argument("--processos", type=int, help="Processos de validação. Padrão: número de CPUs.")
+    importacao.add_argument("--lote", type=int, default=TAMANHO_LOTE, help="Registros por lote.")
+    exportacao = subcomandos.add_parser("exportar", help="Exporta os pacientes.")
+    exportacao.add_argument("saida", help="Arquivo .csv ou .jsonl de destino.")
+    exportacao.add_argument("--historico", action="store_true", help="Inclui os registros de alta.")
+    argumentos = parser.parse_args()
+
+    configurar_logs()
+    contexto = ContextoAplicacao(argumentos.arquivo, arquivo_regras=argumentos.regras)
+    try:
+        if argumentos.comando == "importar":
+            resultado = importar(argumentos.entrada, contexto, argumentos.rejeitados, argumentos.processos, argumentos.lote)
+            contexto.salvar()
+            print(f"{resultado['importados']} pacientes importados e {resultado['rejeitados']} rejeitados "
+                  f"em {resultado['segundos']:.2f}s ({resultado['registros_por_segundo']:,.0f} registros/s).")
+            if resultado["rejeitados"]:
+                print(f"Registros rejeitados em {argumentos.rejeitados}")
+        else:
+            inicio = time.perf_counter()
+            total = exportar(contexto.repositorio, argumentos.saida, argumentos.historico)
+            print(f"{total} registros exportados para {argumentos.saida} em {time.perf_counter() - inicio:.2f}s.")
+    finally:
+        contexto.fechar()
+
+
+if __name__ == "__main__":
+    main()
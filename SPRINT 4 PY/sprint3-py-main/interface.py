@@ -1,19 +1,34 @@
+import time
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
-from collections import deque
-from logica import classificar_gravidade, salvar_dados, carregar_dados, validar_cpf, buscar_paciente_por_cpf, validar_dados_paciente
+from logica import normalizar_cpf, validar_cpf
 from logica import validar_data_formatada
-
-# Carrega os dados dos pacientes e histórico de um arquivo JSON
-dados = carregar_dados("dados_pacientes.json")
-pacientes = dados["pacientes"]  # Lista de pacientes ativos
-historico = dados["historico"]  # Histórico de pacientes que já receberam alta
-waiting_queue = deque()  # Fila de espera (não utilizada diretamente no código)
+from espera import formatar_espera
+from metricas import cronometrado
+
+# Barra de status que mostra se os dados estão sendo salvos
+class BarraStatus:
+    # Intervalo entre as consultas ao estado da gravação, em milissegundos
+    INTERVALO_ATUALIZACAO = 200
+
+    def __init__(self, root, contexto):
+        self.contexto = contexto
+        self.rotulo = ttk.Label(root, text="", font=("Arial", 10), anchor="e")
+        self.rotulo.pack(side="bottom", fill="x", padx=10, pady=5)
+        self.atualizar()
+
+    # Método que consulta o estado da gravação sem bloquear a interface
+    def atualizar(self):
+        # Aplica as alterações feitas por outras estações de triagem no mesmo arquivo
+        self.contexto.atualizar()
+        self.rotulo.config(text=self.contexto.estado_persistencia)
+        self.rotulo.after(self.INTERVALO_ATUALIZACAO, self.atualizar)
 
 # Classe para a tela inicial do sistema
 class TelaInicial:
-    def __init__(self, root):
+    def __init__(self, root, contexto):
         self.root = root
+        self.contexto = contexto  # Dados da aplicação, carregados no primeiro acesso
         self.frame = ttk.Frame(root)
         self.frame.pack(fill="both", expand=True)
 
@@ -35,15 +50,16 @@ class TelaInicial:
 
     def mudar_tela(self, tela):
         self.frame.destroy()
-        tela(self.root)
+        tela(self.root, self.contexto)
 
     def sair(self):
-        salvar_dados("dados_pacientes.json", {"pacientes": pacientes, "historico": historico})
+        self.contexto.salvar()
         self.root.quit()
 
 class TelaPaciente:
-    def __init__(self, root):
+    def __init__(self, root, contexto):
         self.root = root
+        self.contexto = contexto
         self.frame = ttk.Frame(root)
         self.frame.pack(fill="both", expand=True)
 
@@ -76,7 +92,7 @@ class TelaPaciente:
             raise ValueError("Todos os campos devem ser preenchidos.")
         if not validar_cpf(cpf):
             raise ValueError("CPF inválido.")
-        if buscar_paciente_por_cpf(cpf, pacientes):
+        if self.contexto.repositorio.cpf_cadastrado(cpf):
             raise ValueError("CPF já cadastrado.")
         if not validar_data_formatada(nascimento):
             raise ValueError("Data de nascimento inválida. Use o formato DD/MM/AAAA.")
@@ -105,12 +121,8 @@ class TelaPaciente:
                     temperatura = simpledialog.askfloat("Temperatura", "Qual é a sua temperatura em °C?")
                     if temperatura is None:
                         raise ValueError("Temperatura não fornecida.")
-                    if temperatura < 37.5:
-                        sintomas["febre"] = "Baixa"
-                    elif 37.5 <= temperatura <= 39:
-                        sintomas["febre"] = "Moderada"
-                    else:
-                        sintomas["febre"] = "Alta"
+                    # As faixas de temperatura vêm das regras de triagem
+                    sintomas["febre"] = self.contexto.motor.classificar_febre(temperatura)
                 else:
                     sintomas["febre"] = "Nenhuma"
 
@@ -165,10 +177,8 @@ class TelaPaciente:
                 "sintomas": sintomas,
                 "diagnosticos": []
             }
-            pacientes.append(paciente)
-
-            # Salva os dados atualizados
-            salvar_dados("dados_pacientes.json", {"pacientes": pacientes, "historico": historico})
+            # Cadastra o paciente, coloca-o na fila e registra o check-in
+            self.contexto.registrar_checkin(paciente)
             messagebox.showinfo("Sucesso", "Pré-check-in realizado com sucesso!")
             self.voltar()
         except ValueError as e:
@@ -179,12 +189,104 @@ class TelaPaciente:
     # Método para voltar à tela inicial
     def voltar(self):
         self.frame.destroy()
-        TelaInicial(self.root)
+        TelaInicial(self.root, self.contexto)
+
+# Janela de busca de pacientes, com sugestões enquanto o funcionário digita
+class DialogoBuscaPaciente:
+    # Espera entre a última tecla e a busca, em milissegundos
+    ATRASO_BUSCA = 150
+    # Intervalo entre as verificações do índice de busca ainda em montagem, em milissegundos
+    ATRASO_CARREGAMENTO = 300
+
+    def __init__(self, root, contexto, titulo, somente_ativos=False):
+        self.contexto = contexto
+        self.somente_ativos = somente_ativos
+        self.cpf = None
+        self.resultados = []
+        self.agendamento = None
+        self.janela = tk.Toplevel(root)
+        self.janela.title(titulo)
+        self.janela.transient(root)
+
+        rotulo = ttk.Label(self.janela, text="Digite o nome, o CPF, uma alergia ou um diagnóstico:", font=("Arial", 12))
+        rotulo.pack(padx=10, pady=(10, 5))
+        self.entrada = ttk.Entry(self.janela, width=50)
+        self.entrada.pack(padx=10, fill="x")
+        self.lista = tk.Listbox(self.janela, height=10, width=60)
+        self.lista.pack(padx=10, pady=10, fill="both", expand=True)
+        btn_selecionar = ttk.Button(self.janela, text="Selecionar", command=self.confirmar, style="TButton")
+        btn_selecionar.pack(pady=(0, 10))
+
+        # A busca roda quando o funcionário para de digitar; Enter ou clique duplo escolhem o paciente
+        self.entrada.bind("<KeyRelease>", self.agendar_busca)
+        self.entrada.bind("<Return>", self.confirmar)
+        self.entrada.bind("<Down>", lambda evento: self.lista.focus_set())
+        self.lista.bind("<Return>", self.confirmar)
+        self.lista.bind("<Double-Button-1>", self.confirmar)
+        self.entrada.focus_set()
+        self.janela.grab_set()
+        if not self.contexto.busca_pronta:
+            self.buscar()
+
+    # Método que reinicia a espera a cada tecla, para não buscar a cada letra
+    def agendar_busca(self, evento=None):
+        if evento is not None and evento.keysym in ("Return", "Down", "Up"):
+            return
+        if self.agendamento:
+            self.janela.after_cancel(self.agendamento)
+        self.agendamento = self.janela.after(self.ATRASO_BUSCA, self.buscar)
+
+    # Método que consulta o índice de busca e mostra as sugestões
+    def buscar(self):
+        self.agendamento = None
+        if not self.janela.winfo_exists():
+            return
+        # Enquanto o índice é montado em segundo plano, avisa e tenta de novo em seguida
+        if not self.contexto.busca_pronta:
+            self.contexto.iniciar_busca()
+            self.resultados = []
+            self.lista.delete(0, "end")
+            self.lista.insert("end", "Carregando o índice de busca...")
+            self.agendamento = self.janela.after(self.ATRASO_CARREGAMENTO, self.buscar)
+            return
+        resultados = self.contexto.busca.buscar(self.entrada.get())
+        if self.somente_ativos:
+            resultados = [r for r in resultados if r["ativo"]]
+        self.resultados = resultados
+        self.lista.delete(0, "end")
+        for resultado in resultados:
+            situacao = "" if resultado["ativo"] else " (alta)"
+            self.lista.insert("end", f"{resultado['name']} - CPF {resultado['cpf']}{situacao}")
+        if resultados:
+            self.lista.selection_set(0)
+
+    # Método que escolhe o paciente selecionado ou o CPF digitado por inteiro
+    def confirmar(self, evento=None):
+        if self.agendamento:
+            self.janela.after_cancel(self.agendamento)
+            self.buscar()
+        selecao = self.lista.curselection()
+        if selecao and self.resultados:
+            self.cpf = self.resultados[selecao[0]]["cpf"]
+        elif validar_cpf(self.entrada.get()):
+            self.cpf = self.entrada.get()
+        else:
+            return
+        # Cancela a nova tentativa agendada enquanto o índice ainda era montado
+        if self.agendamento:
+            self.janela.after_cancel(self.agendamento)
+        self.janela.destroy()
+
+    # Método que espera a janela fechar e retorna o CPF escolhido (None se cancelada)
+    def mostrar(self):
+        self.janela.wait_window()
+        return self.cpf
 
 # Classe para a tela do funcionário
 class TelaFuncionario:
-    def __init__(self, root):
+    def __init__(self, root, contexto):
         self.root = root
+        self.contexto = contexto
         self.frame = ttk.Frame(root)
         self.frame.pack(fill="both", expand=True)
 
@@ -210,17 +312,21 @@ class TelaFuncionario:
     # Método para mudar para outra tela
     def mudar_tela(self, tela):
         self.frame.destroy()
-        tela(self.root)
+        tela(self.root, self.contexto)
+
+    # Método que abre a busca de pacientes e retorna o CPF escolhido
+    def escolher_paciente(self, titulo, somente_ativos=False):
+        return DialogoBuscaPaciente(self.root, self.contexto, titulo, somente_ativos).mostrar()
 
     # Método para adicionar diagnóstico a um paciente
     def adicionar_diagnostico(self):
         try:
-            cpf = simpledialog.askstring("Diagnóstico", "Digite o CPF do paciente:")
+            cpf = self.escolher_paciente("Diagnóstico", somente_ativos=True)
             if not cpf:
                 raise ValueError("CPF não fornecido.")
             if not validar_cpf(cpf):
                 raise ValueError("CPF inválido. Verifique e tente novamente.")
-            paciente = buscar_paciente_por_cpf(cpf, pacientes)
+            paciente = self.contexto.repositorio.buscar(cpf)
             if not paciente:
                 raise ValueError("Paciente não encontrado.")
 
@@ -232,15 +338,13 @@ class TelaFuncionario:
             medicacoes_preferidas = simpledialog.askstring("Medicações", "Digite as medicações preferidas pela família:")
 
             # Adiciona o diagnóstico ao paciente
-            paciente["diagnosticos"].append({
+            registro = {
                 "diagnostico": diagnostico,
                 "observacoes": observacoes,
                 "medicacoes_preferidas": medicacoes_preferidas,
                 "alergias": paciente.get("alergias", "Nenhuma alergia registrada.")
-            })
-
-            # Salva os dados atualizados
-            salvar_dados("dados_pacientes.json", {"pacientes": pacientes, "historico": historico})
+            }
+            self.contexto.registrar_diagnostico(cpf, registro)
             messagebox.showinfo("Sucesso", "Diagnóstico adicionado com sucesso!")
         except ValueError as e:
             messagebox.showerror("Erro", str(e))
@@ -249,15 +353,12 @@ class TelaFuncionario:
 
     # Método para visualizar diagnósticos e alergias de um paciente
     def ver_diagnosticos_e_alergias(self):
-        cpf = simpledialog.askstring("Ver Diagnósticos e Alergias", "Digite o CPF do paciente:")
-        paciente = buscar_paciente_por_cpf(cpf, pacientes)
-
-        # Se o paciente não estiver na lista de pacientes, busca no histórico
+        cpf = self.escolher_paciente("Ver Diagnósticos e Alergias")
+        # Busca entre os pacientes ativos e, se não encontrar, no histórico
+        paciente = self.contexto.repositorio.buscar_em_todos(cpf)
         if not paciente:
-            paciente = buscar_paciente_por_cpf(cpf, historico)
-            if not paciente:
-                messagebox.showerror("Erro", "Paciente não encontrado.")
-                return
+            messagebox.showerror("Erro", "Paciente não encontrado.")
+            return
 
         # Exibe os diagnósticos e alergias do paciente
         diagnosticos = paciente.get("diagnosticos", [])
@@ -277,8 +378,8 @@ class TelaFuncionario:
 
     # Método para visualizar preferências da família
     def ver_preferencias_familia(self):
-        cpf = simpledialog.askstring("Ver Preferências da Família", "Digite o CPF do paciente:")
-        paciente = buscar_paciente_por_cpf(cpf, pacientes)
+        cpf = self.escolher_paciente("Ver Preferências da Família", somente_ativos=True)
+        paciente = self.contexto.repositorio.buscar(cpf)
         if not paciente:
             messagebox.showerror("Erro", "Paciente não encontrado.")
             return
@@ -296,8 +397,8 @@ class TelaFuncionario:
 
     # Método para dar alta a um paciente
     def dar_alta(self):
-        cpf = simpledialog.askstring("Dar Alta", "Digite o CPF do paciente:")
-        paciente = buscar_paciente_por_cpf(cpf, pacientes)
+        cpf = self.escolher_paciente("Dar Alta", somente_ativos=True)
+        paciente = self.contexto.repositorio.buscar(cpf)
         if not paciente:
             messagebox.showerror("Erro", "Paciente não encontrado.")
             return
@@ -307,69 +408,155 @@ class TelaFuncionario:
         if not confirmacao:
             return
 
-        # Remove o paciente da lista de pacientes e adiciona ao histórico
-        pacientes.remove(paciente)
-        historico.append(paciente)
-
-        # Salva os dados atualizados
-        salvar_dados("dados_pacientes.json", {"pacientes": pacientes, "historico": historico})
+        # Remove o paciente da lista de pacientes e da fila, adiciona ao histórico e registra a alta;
+        # outra estação pode ter dado alta ao mesmo paciente enquanto a confirmação estava aberta
+        try:
+            self.contexto.dar_alta(cpf)
+        except ValueError as e:
+            messagebox.showerror("Erro", str(e))
+            return
         messagebox.showinfo("Sucesso", f"Alta concedida para {paciente['name']}. O diagnóstico foi salvo no histórico.")
 
     # Método para voltar à tela inicial
     def voltar(self):
         self.frame.destroy()
-        TelaInicial(self.root)
+        TelaInicial(self.root, self.contexto)
 
 # Classe para a tela da fila de espera
 class TelaFila:
-    def __init__(self, root):
+    # Intervalo entre as atualizações automáticas da fila, em milissegundos
+    INTERVALO_ATUALIZACAO = 2000
+
+    def __init__(self, root, contexto):
         self.root = root
+        self.contexto = contexto
         self.frame = ttk.Frame(root)
         self.frame.pack(fill="both", expand=True)
+        self.versao_exibida = None
+        self.agendamento = None
 
         # Título da tela da fila de espera
         titulo = ttk.Label(self.frame, text="Fila de Espera", font=("Arial", 24, "bold"))
         titulo.pack(pady=30)
 
-        # Área de texto para exibir a fila de espera
-        self.lista_fila = tk.Text(self.frame, height=20, width=80, font=("Arial", 12))
-        self.lista_fila.pack(pady=20)
-        self.atualizar_fila()
+        # Tabela da fila de espera; o Treeview desenha apenas as linhas visíveis
+        area_tabela = ttk.Frame(self.frame)
+        area_tabela.pack(pady=20, fill="both", expand=True)
+        colunas = ("nome", "sintomas", "tempo", "chegada", "estado")
+        self.tabela_fila = ttk.Treeview(area_tabela, columns=colunas, show="headings", height=15)
+        for coluna, titulo_coluna, largura in zip(
+            colunas, ("Nome", "Sintomas", "Tempo", "Chegada", "Estado"), (180, 420, 80, 70, 100)
+        ):
+            self.tabela_fila.heading(coluna, text=titulo_coluna)
+            self.tabela_fila.column(coluna, width=largura, stretch=coluna == "sintomas")
+        barra_rolagem = ttk.Scrollbar(area_tabela, orient="vertical", command=self.tabela_fila.yview)
+        self.tabela_fila.configure(yscrollcommand=barra_rolagem.set)
+        self.tabela_fila.pack(side="left", fill="both", expand=True)
+        barra_rolagem.pack(side="right", fill="y")
+
+        self.aviso_fila_vazia = ttk.Label(self.frame, text="A fila de espera está vazia.", font=("Arial", 12))
+
+        # Totais de pacientes por gravidade, lidos da contagem mantida pela fila
+        self.totais_gravidade = ttk.Label(self.frame, text="", font=("Arial", 12))
+        self.totais_gravidade.pack(pady=5)
+
+        # Espera prevista para quem chega agora em cada gravidade, pelo ritmo recente de chamadas
+        self.previsao_espera = ttk.Label(self.frame, text="", font=("Arial", 12))
+        self.previsao_espera.pack(pady=5)
+        self.agendar_atualizacao()
+
+        # Botão para chamar o próximo paciente da fila
+        btn_chamar = ttk.Button(self.frame, text="Chamar Próximo Paciente", command=self.chamar_proximo, style="TButton")
+        btn_chamar.pack(pady=20, ipadx=20, ipady=10)
 
         # Botão para voltar ao menu do funcionário
         btn_voltar = ttk.Button(self.frame, text="Voltar", command=self.voltar, style="TButton")
         btn_voltar.pack(pady=20, ipadx=20, ipady=10)
 
-    # Método para atualizar a lista da fila de espera
+    # Método para atualizar a fila periodicamente sem bloquear a interface
+    def agendar_atualizacao(self):
+        # Aplica as regras de triagem alteradas no arquivo sem reiniciar o sistema
+        self.contexto.verificar_regras()
+        self.atualizar_fila()
+        self.agendamento = self.frame.after(self.INTERVALO_ATUALIZACAO, self.agendar_atualizacao)
+
+    # Método que monta os valores de uma linha da tabela
+    def linha_paciente(self, paciente, estado):
+        sintomas = paciente.get("sintomas", {})
+        tempo_sintomas = sintomas.get("tempo_sintomas", 0)
+        sintomas_str = ", ".join([f"{k}: {v}" for k, v in sintomas.items()])
+        chegada = paciente.get("chegada")
+        chegada_str = time.strftime("%H:%M", time.localtime(chegada)) if isinstance(chegada, (int, float)) else "-"
+        return (paciente.get("name", "Desconhecido"), sintomas_str, f"{tempo_sintomas} dias", chegada_str, estado)
+
+    # Método para atualizar a tabela da fila de espera quando a fila mudou
     def atualizar_fila(self):
-        self.lista_fila.delete(1.0, tk.END)
-        if not pacientes:
-            self.lista_fila.insert(tk.END, "A fila de espera está vazia.")
+        fila = self.contexto.fila
+        # A fila é montada de novo quando os dados são recarregados, e a versão recomeça
+        versao = (id(fila), fila.versao)
+        if versao == self.versao_exibida:
+            return
+        self.versao_exibida = versao
+        self.desenhar_fila(fila)
+
+    # Método que redesenha a tabela aplicando apenas as diferenças; o tempo gasto vai para as métricas
+    @cronometrado("interface_desenhar_fila")
+    def desenhar_fila(self, fila):
+        itens = [(normalizar_cpf(p.get("cpf", "")), p, estado) for p, estado in fila.itens()]
+        ids_novos = [iid for iid, _, _ in itens]
+        atuais = self.tabela_fila.get_children()
+
+        # Remove os pacientes que saíram da fila (chamados ou com alta)
+        conjunto_novos = set(ids_novos)
+        removidos = [iid for iid in atuais if iid not in conjunto_novos]
+        if removidos:
+            self.tabela_fila.delete(*removidos)
+        restantes = set(atuais) - set(removidos)
+
+        # Só é preciso mover linhas se a ordem relativa dos pacientes que ficaram mudou
+        ordem_mudou = [iid for iid in atuais if iid in restantes] != [iid for iid in ids_novos if iid in restantes]
+
+        # Insere os novos pacientes, move os que mudaram de posição e atualiza os que mudaram de dados
+        for idx, (iid, paciente, estado) in enumerate(itens):
+            valores = self.linha_paciente(paciente, estado)
+            if iid not in restantes:
+                self.tabela_fila.insert("", idx, iid=iid, values=valores)
+                continue
+            if ordem_mudou:
+                self.tabela_fila.move(iid, "", idx)
+            # O Tk devolve os valores convertidos (números como int), por isso a comparação é feita como texto
+            if tuple(map(str, self.tabela_fila.item(iid, "values"))) != tuple(map(str, valores)):
+                self.tabela_fila.item(iid, values=valores)
+
+        self.totais_gravidade.config(
+            text="  |  ".join(f"{gravidade}: {total}" for gravidade, total in sorted(fila.contagem().items()) if total)
+        )
+        previsao = self.contexto.espera.prever([(paciente, estado) for _, paciente, estado in itens])
+        self.previsao_espera.config(text="Espera prevista: " + "  |  ".join(
+            f"{gravidade}: {formatar_espera(resumo['previsao'])}" for gravidade, resumo in previsao.items()
+        ) if previsao else "")
+        if itens:
+            self.aviso_fila_vazia.pack_forget()
         else:
-            # Ordena os pacientes por gravidade e tipo de sintomas
-            pacientes_ordenados = sorted(
-                pacientes,
-                key=lambda p: (
-                    classificar_gravidade(p.get("sintomas", {}), p.get("sintomas", {}).get("tempo_sintomas", 0)) != "Grave",
-                    "lesao_fisica" not in p["sintomas"],
-                    p["sintomas"].get("lesao_fisica", {}).get("local") != "cabeça"
-                )
-            )
-            # Exibe os pacientes na fila
-            for idx, paciente in enumerate(pacientes_ordenados, start=1):
-                sintomas = paciente.get("sintomas", {})
-                tempo_sintomas = sintomas.get("tempo_sintomas", 0)
-                estado = classificar_gravidade(sintomas, tempo_sintomas)
-                sintomas_str = ", ".join([f"{k}: {v}" for k, v in sintomas.items()])
-                self.lista_fila.insert(
-                    tk.END,
-                    f"{idx}. Nome: {paciente.get('name', 'Desconhecido')}, "
-                    f"Sintomas: {sintomas_str}, "
-                    f"Tempo: {tempo_sintomas} dias, "
-                    f"Estado: {estado}\n"
-                )
+            self.aviso_fila_vazia.pack(before=self.tabela_fila.master)
+
+    # Método para chamar o próximo paciente da fila
+    def chamar_proximo(self):
+        # Retira o paciente da fila, marca-o como em atendimento e registra a chamada
+        paciente = self.contexto.chamar_proximo()
+        if not paciente:
+            messagebox.showinfo("Fila de Espera", "A fila de espera está vazia.")
+            return
+
+        mensagem = f"Chamando {paciente.get('name', 'Desconhecido')}."
+        if isinstance(paciente.get("chegada"), (int, float)) and isinstance(paciente.get("atendimento"), (int, float)):
+            mensagem += f" Tempo de espera: {formatar_espera(paciente['atendimento'] - paciente['chegada'])}."
+        messagebox.showinfo("Próximo Paciente", mensagem)
+        self.atualizar_fila()
 
     # Método para voltar ao menu do funcionário
     def voltar(self):
+        if self.agendamento:
+            self.frame.after_cancel(self.agendamento)
         self.frame.destroy()
-        TelaFuncionario(self.root)
+        TelaFuncionario(self.root, self.contexto)
@@ -0,0 +1,225 @@
+import codecs
+import json
+import logging
+from logica import normalizar_cpf
+from metricas import cronometrado
+
+TAMANHO_BLOCO = 1 << 20
+
+
+class _LeitorJSON:
+    """
+    Leitor de JSON por blocos, que decodifica um valor por vez e acompanha a posição
+    em bytes de cada valor no arquivo.
+    """
+
+    def __init__(self, f, posicao=0, tamanho_bloco=TAMANHO_BLOCO):
+        f.seek(posicao)
+        self.f = f
+        self.tamanho_bloco = tamanho_bloco
+        self.decodificador_utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.decodificador_json = json.JSONDecoder()
+        self.texto = ""
+        self.ascii = True
+        self.pos = 0
+        self.pos_bytes = posicao
+        self.fim_arquivo = False
+
+    def _ler_bloco(self):
+        if self.fim_arquivo:
+            return False
+        bloco = self.f.read(self.tamanho_bloco)
+        self.fim_arquivo = not bloco
+        texto = self.decodificador_utf8.decode(bloco, final=self.fim_arquivo)
+        # Descarta o trecho já consumido para manter a memória limitada ao bloco atual
+        self.texto = self.texto[self.pos:] + texto
+        self.ascii = self.texto.isascii()
+        self.pos = 0
+        return bool(bloco)
+
+    def _avancar(self, nova_pos):
+        trecho = self.texto[self.pos:nova_pos]
+        self.pos_bytes += len(trecho) if self.ascii else len(trecho.encode("utf-8"))
+        self.pos = nova_pos
+
+    def proximo_caractere(self):
+        """Pula espaços em branco e retorna o próximo caractere, sem consumi-lo."""
+        while True:
+            while self.pos < len(self.texto) and self.texto[self.pos] in " \t\r\n":
+                self._avancar(self.pos + 1)
+            if self.pos < len(self.texto):
+                return self.texto[self.pos]
+            if not self._ler_bloco():
+                return ""
+
+    def consumir(self, esperado):
+        """Consome o próximo caractere, que deve ser um dos caracteres esperados."""
+        caractere = self.proximo_caractere()
+        if not caractere or caractere not in esperado:
+            raise json.JSONDecodeError(f"Esperado um de {esperado!r}", self.texto, self.pos)
+        self._avancar(self.pos + 1)
+        return caractere
+
+    def valor(self):
+        """
+        Decodifica o próximo valor JSON.
+
+        Returns:
+            tuple: Valor decodificado, posição inicial em bytes e tamanho em bytes.
+        """
+        self.proximo_caractere()
+        while True:
+            try:
+                valor, fim = self.decodificador_json.raw_decode(self.texto, self.pos)
+                # Um número no fim do bloco pode continuar no bloco seguinte
+                if fim < len(self.texto) or self.fim_arquivo:
+                    inicio = self.pos_bytes
+                    self._avancar(fim)
+                    return valor, inicio, self.pos_bytes - inicio
+            except json.JSONDecodeError:
+                if self.fim_arquivo:
+                    raise
+            self._ler_bloco()
+
+    def elementos(self):
+        """
+        Percorre os elementos do array JSON na posição atual.
+
+        Yields:
+            tuple: Elemento decodificado, posição inicial em bytes e tamanho em bytes.
+        """
+        self.consumir("[")
+        if self.proximo_caractere() == "]":
+            self.consumir("]")
+            return
+        while True:
+            yield self.valor()
+            if self.consumir(",]") == "]":
+                return
+
+
+class HistoricoPreguicoso:
+    """
+    Histórico de altas lido sob demanda do arquivo de dados.
+
+    Nada é lido na abertura. Na primeira busca por CPF, o array "historico" é
+    percorrido por blocos para montar um índice CPF -> posições no arquivo; as
+    buscas seguintes leem do disco apenas os registros do paciente.
+    """
+
+    def __init__(self, arquivo, posicao, tamanho_bloco=TAMANHO_BLOCO):
+        """
+        Args:
+            arquivo (str): Caminho do arquivo JSON.
+            posicao (int): Posição em bytes do início do array "historico".
+            tamanho_bloco (int): Tamanho dos blocos de leitura, em bytes.
+        """
+        self.arquivo = arquivo
+        self.posicao = posicao
+        self.tamanho_bloco = tamanho_bloco
+        self._indice = None
+        self._total = 0
+
+    def _percorrer(self):
+        with open(self.arquivo, "rb") as f:
+            leitor = _LeitorJSON(f, self.posicao, self.tamanho_bloco)
+            try:
+                yield from leitor.elementos()
+            except json.JSONDecodeError as e:
+                logging.error(f"Histórico corrompido no arquivo {self.arquivo}: {e}")
+
+    def __iter__(self):
+        for registro, _, _ in self._percorrer():
+            yield registro
+
+    def __len__(self):
+        self.indexar()
+        return self._total
+
+    def indexar(self):
+        """Monta o índice CPF -> posições dos registros, se ainda não existir."""
+        if self._indice is not None:
+            return
+        indice = {}
+        total = 0
+        for registro, inicio, tamanho in self._percorrer():
+            indice.setdefault(normalizar_cpf(registro.get("cpf", "")), []).append((inicio, tamanho))
+            total += 1
+        self._indice, self._total = indice, total
+        logging.info(f"Histórico do arquivo {self.arquivo} indexado: {total} registros.")
+
+    def registros_do_cpf(self, cpf):
+        """
+        Lê do disco os registros de alta do paciente com o CPF informado.
+
+        Args:
+            cpf (str): CPF do paciente, com ou sem pontuação.
+
+        Returns:
+            list: Registros do paciente, na ordem do arquivo.
+        """
+        self.indexar()
+        posicoes = self._indice.get(normalizar_cpf(cpf or ""), [])
+        registros = []
+        if posicoes:
+            with open(self.arquivo, "rb") as f:
+                for inicio, tamanho in posicoes:
+                    f.seek(inicio)
+                    registros.append(json.loads(f.read(tamanho)))
+        return registros
+
+
+@cronometrado("leitura_carregar_dados_incremental")
+def carregar_dados_incremental(arquivo, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Carrega os pacientes ativos do arquivo JSON e deixa o histórico para ser lido sob demanda.
+
+    O arquivo é lido por blocos até o início do array "historico", de modo que o
+    tempo de abertura e a memória usada dependem apenas dos pacientes ativos
+    (salvar_dados grava "pacientes" antes de "historico").
+
+    Args:
+        arquivo (str): Caminho do arquivo JSON.
+        tamanho_bloco (int): Tamanho dos blocos de leitura, em bytes.
+
+    Returns:
+        dict: Dados no formato de carregar_dados, com "historico" como HistoricoPreguicoso.
+    """
+    dados = {"pacientes": [], "historico": []}
+    try:
+        with open(arquivo, "rb") as f:
+            leitor = _LeitorJSON(f, 0, tamanho_bloco)
+            leitor.consumir("{")
+            chaves_lidas = set()
+            while leitor.proximo_caractere() not in ("}", ""):
+                chave, _, _ = leitor.valor()
+                leitor.consumir(":")
+                chaves_lidas.add(chave)
+                if chave == "historico":
+                    leitor.proximo_caractere()
+                    dados["historico"] = HistoricoPreguicoso(arquivo, leitor.pos_bytes, tamanho_bloco)
+                    if "pacientes" in chaves_lidas:
+                        break
+                    # Arquivo com o histórico antes dos pacientes: é preciso percorrê-lo
+                    for _ in leitor.elementos():
+                        pass
+                elif leitor.proximo_caractere() == "[":
+                    # Arrays grandes são lidos elemento por elemento; decodificá-los de uma
+                    # vez obrigaria a recomeçar a decodificação a cada novo bloco lido
+                    dados[chave] = [elemento for elemento, _, _ in leitor.elementos()]
+                else:
+                    dados[chave], _, _ = leitor.valor()
+                leitor.consumir(",}")
+        for paciente in dados["pacientes"]:
+            paciente.setdefault("tempo_sintomas", 0)
+            paciente.setdefault("sintomas", {})
+            paciente.setdefault("alergias", "Nenhuma alergia registrada.")
+            paciente.setdefault("diagnosticos", [])
+        logging.info(f"Pacientes ativos carregados do arquivo {arquivo}; histórico sob demanda.")
+        return dados
+    except FileNotFoundError:
+        logging.warning(f"Arquivo {arquivo} não encontrado. Criando um novo arquivo.")
+        return {"pacientes": [], "historico": []}
+    except json.JSONDecodeError:
+        logging.error(f"Erro ao decodificar o arquivo {arquivo}. Criando um novo arquivo.")
+        return {"pacientes": [], "historico": []}
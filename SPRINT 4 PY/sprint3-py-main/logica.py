@@ -1,6 +1,44 @@
+import atexit
 import json
 import logging
-from datetime import datetime
+import logging.handlers
+import os
+import queue
+from datetime import date
+from functools import lru_cache
+from metricas import METRICAS
+from regras import motor_padrao
+
+
+# Faixas etárias usadas na fila e nos relatórios: nome -> (idade mínima, idade máxima ou None)
+FAIXAS_ETARIAS = {"pediatrica": (0, 17), "adulta": (18, 59), "idosa": (60, None)}
+
+
+def converter_data_nascimento(data_str):
+    """
+    Converte uma data DD/MM/AAAA no número do dia (date.toordinal), sem datetime.strptime.
+
+    Como strptime com "%d/%m/%Y", aceita dia e mês com um ou dois dígitos, mas não
+    depende da localidade nem monta uma expressão regular a cada chamada.
+
+    Args:
+        data_str (str): String da data.
+
+    Returns:
+        int: Número do dia, que pode ser comparado e ordenado (1 = 01/01/0001).
+
+    Raises:
+        ValueError: Caso a data não exista ou não esteja no formato DD/MM/AAAA.
+    """
+    partes = data_str.split("/") if isinstance(data_str, str) and data_str.isascii() else ()
+    if len(partes) == 3:
+        dia, mes, ano = partes
+        if 0 < len(dia) <= 2 and 0 < len(mes) <= 2 and len(ano) == 4 and (dia + mes + ano).isdigit():
+            try:
+                return date(int(ano), int(mes), int(dia)).toordinal()
+            except ValueError:
+                pass
+    raise ValueError("Data de nascimento inválida. Use o formato DD/MM/AAAA.")
 
 
 def validar_data_formatada(data_str):
@@ -14,17 +52,88 @@ def validar_data_formatada(data_str):
         bool: True se a data for válida no formato DD/MM/AAAA, False caso contrário.
     """
     try:
-        datetime.strptime(data_str, "%d/%m/%Y")
+        converter_data_nascimento(data_str)
         return True
     except ValueError:
         return False
 
-# Configuração de logs
-logging.basicConfig(filename="sistema_hospitalar.log", level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+def calcular_idade(nascimento, hoje=None):
+    """
+    Calcula a idade em anos completos.
+
+    Args:
+        nascimento (int): Data de nascimento, como retornada por converter_data_nascimento.
+        hoje (datetime.date): Data de referência. Padrão: hoje.
+
+    Returns:
+        int: Idade em anos.
+    """
+    hoje = hoje or date.today()
+    data = date.fromordinal(nascimento)
+    return hoje.year - data.year - ((hoje.month, hoje.day) < (data.month, data.day))
+
+
+def nascimento_limite(idade, hoje=None):
+    """
+    Retorna a data de nascimento mais recente de quem tem pelo menos a idade informada.
+
+    Quem nasceu nessa data ou antes dela tem a idade ou mais; quem nasceu depois,
+    menos. Em anos não bissextos, os nascidos em 29/02 completam anos em 01/03.
+
+    Args:
+        idade (int): Idade em anos.
+        hoje (datetime.date): Data de referência. Padrão: hoje.
+
+    Returns:
+        int: Data limite, como número do dia.
+    """
+    hoje = hoje or date.today()
+    ano = hoje.year - idade
+    if ano < 1:
+        return 0
+    try:
+        return hoje.replace(year=ano).toordinal()
+    except ValueError:
+        return date(ano, 2, 28).toordinal()
+
+_ouvinte_logs = None
+
+def configurar_logs(arquivo="sistema_hospitalar.log"):
+    """
+    Configura os logs do sistema no arquivo especificado.
+
+    Chamada pelo ponto de entrada da aplicação, e não na importação do módulo,
+    para que importar logica.py não crie nem abra arquivos. As mensagens são
+    apenas colocadas em uma fila (QueueHandler); a escrita no arquivo é feita
+    por uma thread própria (QueueListener), sem bloquear quem registrou o log.
+    Chamadas repetidas reaproveitam a configuração existente.
+
+    Args:
+        arquivo (str): Caminho do arquivo de log.
+
+    Returns:
+        logging.handlers.QueueListener: Thread que grava os logs no arquivo.
+    """
+    global _ouvinte_logs
+    if _ouvinte_logs is not None:
+        return _ouvinte_logs
+    fila_logs = queue.SimpleQueue()
+    manipulador_arquivo = logging.FileHandler(arquivo, encoding="utf-8")
+    manipulador_arquivo.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    raiz = logging.getLogger()
+    raiz.setLevel(logging.INFO)
+    raiz.addHandler(logging.handlers.QueueHandler(fila_logs))
+    _ouvinte_logs = logging.handlers.QueueListener(fila_logs, manipulador_arquivo)
+    _ouvinte_logs.start()
+    # Grava as mensagens que ainda estiverem na fila ao encerrar o programa
+    atexit.register(_ouvinte_logs.stop)
+    return _ouvinte_logs
 
 def classificar_gravidade(sintomas, tempo_sintomas):
     """
-    Classifica a gravidade com base nos sintomas e no tempo dos sintomas.
+    Classifica a gravidade com base nos sintomas e no tempo dos sintomas,
+    segundo as regras do arquivo regras_triagem.json.
 
     Args:
         sintomas (dict): Dicionário contendo os sintomas do paciente.
@@ -33,17 +142,15 @@ def classificar_gravidade(sintomas, tempo_sintomas):
     Returns:
         str: Nível de gravidade ("Grave", "Moderado", "Leve").
     """
-    if sintomas.get("febre") in ["Alta", "Moderada"] or sintomas.get("falta_ar") == "Sim":
-        return "Grave"
-    elif sintomas.get("dor") in ["moderada", "intensa"] or tempo_sintomas > 3:
-        return "Moderado"
-    else:
-        return "Leve"
+    return motor_padrao().classificar(sintomas, tempo_sintomas)
 
 def salvar_dados(arquivo, dados):
     """
     Salva os dados no arquivo JSON especificado.
 
+    Os dados são gravados em um arquivo temporário que substitui o original
+    atomicamente, de modo que uma queda durante a gravação não corrompe o arquivo.
+
     Args:
         arquivo (str): Caminho do arquivo JSON.
         dados (dict): Dados a serem salvos.
@@ -52,11 +159,16 @@ def salvar_dados(arquivo, dados):
         Exception: Caso ocorra um erro ao salvar os dados.
     """
     try:
-        with open(arquivo, "w") as f:
+        temporario = f"{arquivo}.tmp"
+        with open(temporario, "w") as f:
             json.dump(dados, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, arquivo)
         logging.info(f"Dados salvos com sucesso no arquivo {arquivo}.")
     except Exception as e:
         logging.error(f"Erro ao salvar dados: {e}")
+        METRICAS.incrementar("logica_salvar_dados_erros")
         raise
 
 def carregar_dados(arquivo):
@@ -81,25 +193,45 @@ def carregar_dados(arquivo):
             return dados
     except FileNotFoundError:
         logging.warning(f"Arquivo {arquivo} não encontrado. Criando um novo arquivo.")
+        METRICAS.incrementar("logica_carregar_dados_erros", motivo="arquivo_inexistente")
         return {"pacientes": [], "historico": []}
     except json.JSONDecodeError:
         logging.error(f"Erro ao decodificar o arquivo {arquivo}. Criando um novo arquivo.")
+        METRICAS.incrementar("logica_carregar_dados_erros", motivo="json_invalido")
         return {"pacientes": [], "historico": []}
     except Exception as e:
         logging.error(f"Erro inesperado ao carregar dados: {e}")
+        METRICAS.incrementar("logica_carregar_dados_erros", motivo="inesperado")
         return {"pacientes": [], "historico": []}
 
+def normalizar_cpf(cpf):
+    """
+    Remove a pontuação do CPF, mantendo apenas os dígitos.
+
+    Args:
+        cpf (str): CPF com ou sem pontuação.
+
+    Returns:
+        str: CPF contendo somente dígitos.
+    """
+    return ''.join(filter(str.isdigit, cpf))
+
+@lru_cache(maxsize=4096)
 def validar_cpf(cpf):
     """
     Valida o CPF verificando o formato e os dígitos verificadores.
 
+    O mesmo CPF é validado várias vezes em um atendimento, por isso os resultados
+    mais recentes ficam em um cache LRU limitado. Para validar muitos CPFs de uma
+    vez, use cpf_lote.validar_cpfs_lote.
+
     Args:
         cpf (str): CPF a ser validado.
 
     Returns:
         bool: True se o CPF for válido, False caso contrário.
     """
-    cpf = ''.join(filter(str.isdigit, cpf))
+    cpf = normalizar_cpf(cpf)
     if len(cpf) != 11 or cpf == cpf[0] * 11:
         return False
 
@@ -114,13 +246,17 @@ def buscar_paciente_por_cpf(cpf, pacientes):
     """
     Busca um paciente pelo CPF na lista de pacientes.
 
+    Quando recebe um RepositorioPacientes, a busca usa o índice por CPF em O(1).
+
     Args:
         cpf (str): CPF do paciente.
-        pacientes (list): Lista de pacientes.
+        pacientes (list or RepositorioPacientes): Lista ou repositório de pacientes.
 
     Returns:
         dict or None: Paciente encontrado ou None se não encontrado.
     """
+    if hasattr(pacientes, "buscar"):
+        return pacientes.buscar(cpf)
     for paciente in pacientes:
         if paciente.get("cpf") == cpf:
             return paciente
@@ -134,7 +270,7 @@ def validar_dados_paciente(nome, cpf, nascimento, pacientes):
         nome (str): Nome do paciente.
         cpf (str): CPF do paciente.
         nascimento (str): Data de nascimento do paciente.
-        pacientes (list): Lista de pacientes já cadastrados.
+        pacientes (list or RepositorioPacientes): Pacientes já cadastrados.
 
     Raises:
         ValueError: Caso algum campo seja inválido.
@@ -145,3 +281,28 @@ def validar_dados_paciente(nome, cpf, nascimento, pacientes):
         raise ValueError("CPF inválido.")
     if buscar_paciente_por_cpf(cpf, pacientes):
         raise ValueError("Este CPF já está cadastrado.")
+
+def validar_sintomas(sintomas):
+    """
+    Confere os tipos dos sintomas antes da classificação.
+
+    Os valores devem ser texto, número, booleano ou nulo; subcampos, como em
+    "lesao_fisica", são objetos com valores desses tipos. O tempo dos sintomas,
+    se informado, é um número de dias não negativo.
+
+    Args:
+        sintomas (dict): Sintomas informados no check-in.
+
+    Raises:
+        ValueError: Caso os sintomas ou algum dos seus valores tenham um tipo inválido.
+    """
+    if not isinstance(sintomas, dict):
+        raise ValueError("Os sintomas devem ser um objeto com os valores de cada sintoma.")
+    simples = (str, int, float, bool, type(None))
+    for nome, valor in sintomas.items():
+        valores = valor.values() if isinstance(valor, dict) else (valor,)
+        if not all(isinstance(v, simples) for v in valores):
+            raise ValueError(f"Valor inválido para o sintoma {nome}.")
+    tempo_sintomas = sintomas.get("tempo_sintomas", 0)
+    if isinstance(tempo_sintomas, bool) or not isinstance(tempo_sintomas, (int, float)) or tempo_sintomas < 0:
+        raise ValueError("Tempo dos sintomas inválido ou não fornecido.")
@@ -1,5 +1,8 @@
 import tkinter as tk
-from interface import TelaInicial  # Importa a classe TelaInicial do módulo interface.py
+from contexto import ContextoAplicacao
+from interface import BarraStatus, TelaInicial  # Importa as classes do módulo interface.py
+from logica import configurar_logs
+from metricas import ExportadorMetricas
 
 # Função principal do programa
 def main():
@@ -8,12 +11,27 @@ def main():
     root.title("Sistema de Triagem de Pacientes")  # Define o título da janela
     root.geometry("1024x768")  # Define o tamanho da janela (largura x altura)
     
-    # Inicializa a interface gráfica com a classe TelaInicial
-    TelaInicial(root)
+    # Configura os logs do sistema e a gravação periódica das métricas em metricas.prom
+    configurar_logs()
+    exportador = ExportadorMetricas("metricas.prom").iniciar()
+
+    # Cria o contexto da aplicação; os dados são carregados no primeiro acesso e salvos em segundo plano
+    contexto = ContextoAplicacao("dados_pacientes.json", assincrono=True)
+
+    # Inicializa a barra de status e a interface gráfica com a classe TelaInicial
+    BarraStatus(root, contexto)
+    TelaInicial(root, contexto)
+
+    # Monta o índice de busca em segundo plano logo que a janela é exibida
+    root.after_idle(contexto.iniciar_busca)
     
     # Inicia o loop principal da interface gráfica
     root.mainloop()
 
+    # Aguarda a gravação do que ainda estiver pendente antes de encerrar
+    contexto.fechar()
+    exportador.parar()
+
 # Verifica se o script está sendo executado diretamente
 if __name__ == "__main__":
     main()  # Chama a função principal
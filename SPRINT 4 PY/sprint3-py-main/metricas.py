@@ -0,0 +1,260 @@
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+def _rotulos_prometheus(rotulos):
+    if not rotulos:
+        return ""
+    pares = []
+    for chave, valor in rotulos:
+        valor = str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pares.append(f'{chave}="{valor}"')
+    return "{" + ",".join(pares) + "}"
+
+
+def _rotulos_json(rotulos):
+    return {chave: valor for chave, valor in rotulos}
+
+
+class Metricas:
+    """
+    Registro de métricas do sistema: contadores, tempos de operações e medidores.
+
+    Contadores e tempos são acumulados a cada chamada, sob uma trava curta.
+    Medidores são funções consultadas apenas na exportação, de modo que grandezas
+    como o tamanho da fila não custam nada enquanto ninguém lê as métricas.
+    """
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self._contadores = {}
+        self._tempos = {}
+        self._medidores = {}
+
+    def incrementar(self, nome, valor=1, **rotulos):
+        """
+        Soma um valor a um contador.
+
+        Args:
+            nome (str): Nome do contador.
+            valor (int): Valor a somar.
+            **rotulos: Rótulos que distinguem séries do mesmo contador.
+        """
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._trava:
+            self._contadores[chave] = self._contadores.get(chave, 0) + valor
+
+    def registrar_tempo(self, nome, segundos):
+        """
+        Acumula a duração de uma execução de uma operação.
+
+        Args:
+            nome (str): Nome da operação.
+            segundos (float): Duração da execução.
+        """
+        with self._trava:
+            tempo = self._tempos.get(nome)
+            if tempo is None:
+                self._tempos[nome] = [1, segundos, segundos]
+            else:
+                tempo[0] += 1
+                tempo[1] += segundos
+                if segundos > tempo[2]:
+                    tempo[2] = segundos
+
+    @contextmanager
+    def cronometrar(self, nome):
+        """
+        Mede a duração do bloco, inclusive quando ele termina com uma exceção.
+
+        Args:
+            nome (str): Nome da operação.
+        """
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar_tempo(nome, time.perf_counter() - inicio)
+
+    def registrar_medidor(self, nome, funcao, descricao=""):
+        """
+        Registra um medidor, substituindo o anterior com o mesmo nome.
+
+        Args:
+            nome (str): Nome do medidor.
+            funcao (function): Função sem argumentos que retorna pares (rótulos, valor),
+                com os rótulos em um dicionário.
+            descricao (str): Descrição exibida no formato Prometheus.
+        """
+        with self._trava:
+            self._medidores[nome] = (funcao, descricao)
+
+    def remover_medidor(self, nome):
+        """Remove um medidor registrado, se existir."""
+        with self._trava:
+            self._medidores.pop(nome, None)
+
+    def zerar(self):
+        """Descarta todos os contadores e tempos acumulados."""
+        with self._trava:
+            self._contadores.clear()
+            self._tempos.clear()
+
+    def _coletar(self):
+        with self._trava:
+            contadores = dict(self._contadores)
+            tempos = {nome: tuple(valores) for nome, valores in self._tempos.items()}
+            medidores = dict(self._medidores)
+        series_medidores = {}
+        for nome, (funcao, descricao) in medidores.items():
+            try:
+                series = [(tuple(sorted(rotulos.items())), valor) for rotulos, valor in funcao()]
+            except Exception as e:
+                logging.error(f"Erro ao consultar o medidor {nome}: {e}")
+                continue
+            series_medidores[nome] = (series, descricao)
+        return contadores, tempos, series_medidores
+
+    def para_dict(self):
+        """
+        Exporta as métricas em um dicionário pronto para JSON.
+
+        Returns:
+            dict: Chaves "contadores", "tempos" e "medidores".
+        """
+        contadores, tempos, medidores = self._coletar()
+        return {
+            "contadores": [
+                {"nome": nome, "rotulos": _rotulos_json(rotulos), "valor": valor}
+                for (nome, rotulos), valor in sorted(contadores.items())
+            ],
+            "tempos": {
+                nome: {"chamadas": chamadas, "segundos": total, "media": total / chamadas, "maximo": maximo}
+                for nome, (chamadas, total, maximo) in sorted(tempos.items())
+            },
+            "medidores": {
+                nome: [{"rotulos": _rotulos_json(rotulos), "valor": valor} for rotulos, valor in series]
+                for nome, (series, _) in sorted(medidores.items())
+            },
+        }
+
+    def para_prometheus(self):
+        """
+        Exporta as métricas no formato de texto do Prometheus.
+
+        Os tempos viram resumos (_count e _sum, em segundos) e o maior tempo vira
+        um medidor com o sufixo _max.
+
+        Returns:
+            str: Métricas em texto, uma série por linha.
+        """
+        contadores, tempos, medidores = self._coletar()
+        linhas = []
+        nomes_contadores = sorted({nome for nome, _ in contadores})
+        for nome in nomes_contadores:
+            linhas.append(f"# TYPE {nome}_total counter")
+            for (nome_serie, rotulos), valor in sorted(contadores.items()):
+                if nome_serie == nome:
+                    linhas.append(f"{nome}_total{_rotulos_prometheus(rotulos)} {valor}")
+        for nome, (chamadas, total, maximo) in sorted(tempos.items()):
+            linhas.append(f"# TYPE {nome}_segundos summary")
+            linhas.append(f"{nome}_segundos_count {chamadas}")
+            linhas.append(f"{nome}_segundos_sum {total:.9f}")
+            linhas.append(f"# TYPE {nome}_segundos_max gauge")
+            linhas.append(f"{nome}_segundos_max {maximo:.9f}")
+        for nome, (series, descricao) in sorted(medidores.items()):
+            if descricao:
+                linhas.append(f"# HELP {nome} {descricao}")
+            linhas.append(f"# TYPE {nome} gauge")
+            for rotulos, valor in series:
+                linhas.append(f"{nome}{_rotulos_prometheus(rotulos)} {valor}")
+        return "\n".join(linhas) + "\n"
+
+    def gravar(self, arquivo):
+        """
+        Grava as métricas em um arquivo, atomicamente.
+
+        O formato segue a extensão: JSON para ".json" e texto do Prometheus para
+        as demais (por exemplo, ".prom", lido pelo textfile collector do node_exporter).
+
+        Args:
+            arquivo (str): Caminho do arquivo de métricas.
+        """
+        if arquivo.lower().endswith(".json"):
+            conteudo = json.dumps(self.para_dict(), indent=4)
+        else:
+            conteudo = self.para_prometheus()
+        temporario = f"{arquivo}.tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            f.write(conteudo)
+        os.replace(temporario, arquivo)
+
+
+# Registro compartilhado por todos os módulos, assim como o logging
+METRICAS = Metricas()
+
+
+def cronometrado(nome):
+    """
+    Decorador que mede cada chamada da função no registro METRICAS.
+
+    Args:
+        nome (str): Nome da operação.
+
+    Returns:
+        function: Decorador.
+    """
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                METRICAS.registrar_tempo(nome, time.perf_counter() - inicio)
+        return envoltorio
+    return decorador
+
+
+class ExportadorMetricas:
+    """Grava as métricas em um arquivo periodicamente, em uma thread em segundo plano."""
+
+    def __init__(self, arquivo, intervalo=10.0, metricas=METRICAS):
+        """
+        Args:
+            arquivo (str): Arquivo de métricas (".json" ou texto do Prometheus).
+            intervalo (float): Intervalo entre as gravações, em segundos.
+            metricas (Metricas): Registro exportado.
+        """
+        self.arquivo = arquivo
+        self.intervalo = intervalo
+        self.metricas = metricas
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._executar, name="exportador-metricas", daemon=True)
+
+    def iniciar(self):
+        """Inicia as gravações periódicas."""
+        self._thread.start()
+        return self
+
+    def _executar(self):
+        while not self._parar.wait(self.intervalo):
+            self._gravar()
+
+    def _gravar(self):
+        try:
+            self.metricas.gravar(self.arquivo)
+        except OSError as e:
+            logging.error(f"Erro ao gravar as métricas em {self.arquivo}: {e}")
+
+    def parar(self):
+        """Interrompe as gravações periódicas e grava as métricas uma última vez."""
+        self._parar.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self._gravar()
@@ -0,0 +1,256 @@
+import gc
+import json
+import multiprocessing
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from gerador_pacientes import gerar_pacientes
+
+
+class _Ausente:
+    """Marca um campo que não existia no dicionário de origem."""
+
+    __slots__ = ()
+
+    def __repr__(self):
+        return "AUSENTE"
+
+
+# Valor dos campos ausentes, para que a conversão de volta não invente chaves
+AUSENTE = _Ausente()
+
+
+def _internar(valor):
+    """Compartilha uma única cópia de cada texto repetido, como "Sim", "Não" e "Nenhuma"."""
+    return sys.intern(valor) if type(valor) is str else valor
+
+
+class _Registro:
+    """
+    Base dos registros compactos.
+
+    Cada subclasse define _CAMPOS, com os pares (chave no JSON, atributo), e
+    _CONVERSORES, com a conversão aplicada a cada atributo na leitura. Chaves
+    desconhecidas ficam em "extras", para que nenhuma informação seja perdida.
+    """
+
+    __slots__ = ()
+    _CAMPOS = ()
+    _CONVERSORES = {}
+
+    @classmethod
+    def de_dict(cls, dados):
+        """
+        Cria o registro a partir do dicionário no formato de dados_pacientes.json.
+
+        Args:
+            dados (dict): Dicionário de origem.
+
+        Returns:
+            _Registro: Registro com os mesmos dados.
+        """
+        atributos = cls._ATRIBUTOS
+        conversores = cls._CONVERSORES
+        valores = {}
+        extras = None
+        for chave, valor in dados.items():
+            atributo = atributos.get(chave)
+            if atributo is None:
+                if extras is None:
+                    extras = {}
+                extras[chave] = valor
+            else:
+                conversor = conversores.get(atributo)
+                valores[atributo] = conversor(valor) if conversor else valor
+        return cls(**valores, extras=extras)
+
+    @classmethod
+    def de_valor(cls, valor):
+        """Converte o valor em registro apenas se ele for um dicionário."""
+        return cls.de_dict(valor) if isinstance(valor, dict) else valor
+
+    def para_dict(self):
+        """
+        Converte o registro de volta para o formato de dados_pacientes.json.
+
+        Returns:
+            dict: Dicionário igual ao de origem.
+        """
+        dados = {}
+        for chave, atributo in self._CAMPOS:
+            valor = getattr(self, atributo)
+            if valor is AUSENTE:
+                continue
+            if isinstance(valor, _Registro):
+                valor = valor.para_dict()
+            elif isinstance(valor, tuple):
+                valor = [v.para_dict() if isinstance(v, _Registro) else v for v in valor]
+            dados[chave] = valor
+        if self.extras:
+            dados.update(self.extras)
+        return dados
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._ATRIBUTOS = {chave: atributo for chave, atributo in cls._CAMPOS}
+
+
+@dataclass(slots=True)
+class LesaoFisica(_Registro):
+    """Lesão física informada no check-in."""
+
+    descricao: object = AUSENTE
+    local: object = AUSENTE
+    extras: dict = None
+
+    _CAMPOS = (("descricao", "descricao"), ("local", "local"))
+    _CONVERSORES = {"local": _internar}
+
+
+@dataclass(slots=True)
+class Sintomas(_Registro):
+    """Sintomas coletados no questionário do check-in."""
+
+    lesao_fisica: object = AUSENTE
+    febre: object = AUSENTE
+    dor: object = AUSENTE
+    local_dor: object = AUSENTE
+    falta_ar: object = AUSENTE
+    cansaco: object = AUSENTE
+    tempo_sintomas: object = AUSENTE
+    extras: dict = None
+
+    _CAMPOS = (
+        ("lesao_fisica", "lesao_fisica"), ("febre", "febre"), ("dor", "dor"), ("local_dor", "local_dor"),
+        ("falta_ar", "falta_ar"), ("cansaço", "cansaco"), ("tempo_sintomas", "tempo_sintomas"),
+    )
+    _CONVERSORES = {
+        "lesao_fisica": LesaoFisica.de_valor, "febre": _internar, "dor": _internar,
+        "local_dor": _internar, "falta_ar": _internar, "cansaco": _internar,
+    }
+
+
+@dataclass(slots=True)
+class Diagnostico(_Registro):
+    """Diagnóstico registrado por um funcionário."""
+
+    diagnostico: object = AUSENTE
+    observacoes: object = AUSENTE
+    medicacoes_preferidas: object = AUSENTE
+    alergias: object = AUSENTE
+    extras: dict = None
+
+    _CAMPOS = (
+        ("diagnostico", "diagnostico"), ("observacoes", "observacoes"),
+        ("medicacoes_preferidas", "medicacoes_preferidas"), ("alergias", "alergias"),
+    )
+    _CONVERSORES = {"alergias": _internar}
+
+
+def _diagnosticos(valor):
+    """Guarda a lista de diagnósticos como tupla de registros."""
+    if not isinstance(valor, list):
+        return valor
+    return tuple(Diagnostico.de_valor(d) for d in valor)
+
+
+@dataclass(slots=True)
+class Paciente(_Registro):
+    """
+    Registro compacto de um paciente, sem o dicionário de atributos por instância.
+
+    Os textos de sintomas e alergias, que se repetem entre pacientes, são
+    internados e compartilhados. A conversão com para_dict e de_dict não perde
+    dados: campos ausentes continuam ausentes e chaves desconhecidas são mantidas.
+    """
+
+    name: object = AUSENTE
+    cpf: object = AUSENTE
+    birth_date: object = AUSENTE
+    nascimento: object = AUSENTE
+    alergias: object = AUSENTE
+    sintomas: object = AUSENTE
+    tempo_sintomas: object = AUSENTE
+    diagnosticos: object = AUSENTE
+    em_atendimento: object = AUSENTE
+    chegada: object = AUSENTE
+    atendimento: object = AUSENTE
+    alta: object = AUSENTE
+    extras: dict = None
+
+    _CAMPOS = (
+        ("name", "name"), ("cpf", "cpf"), ("birth_date", "birth_date"), ("nascimento", "nascimento"),
+        ("alergias", "alergias"), ("sintomas", "sintomas"), ("tempo_sintomas", "tempo_sintomas"), ("diagnosticos", "diagnosticos"),
+        ("em_atendimento", "em_atendimento"), ("chegada", "chegada"), ("atendimento", "atendimento"), ("alta", "alta"),
+    )
+    _CONVERSORES = {"alergias": _internar, "sintomas": Sintomas.de_valor, "diagnosticos": _diagnosticos}
+
+
+def _construir(representacao, quantidade, semente):
+    # Os pacientes passam por json.loads, como na leitura do arquivo de dados,
+    # para que os textos não venham compartilhados de antemão
+    linhas = (json.dumps(paciente) for paciente in gerar_pacientes(quantidade, semente))
+    if representacao == "registro":
+        return [Paciente.de_dict(json.loads(linha)) for linha in linhas]
+    return [json.loads(linha) for linha in linhas]
+
+
+def _medir(representacao, quantidade, semente):
+    """Mede, em um processo novo, os bytes e o tempo para montar o histórico."""
+    try:
+        import resource
+    except ImportError:
+        resource = None
+
+    gc.collect()
+    if resource is None:
+        tracemalloc.start()
+    else:
+        antes = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    inicio = time.perf_counter()
+    objetos = _construir(representacao, quantidade, semente)
+    tempo = time.perf_counter() - inicio
+    if resource is None:
+        memoria, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    else:
+        # ru_maxrss vem em bytes no macOS e em KiB nos demais sistemas
+        unidade = 1 if sys.platform == "darwin" else 1024
+        memoria = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - antes) * unidade
+    del objetos
+    return memoria, tempo
+
+
+def benchmark_memoria(quantidade, semente=42):
+    """
+    Compara a memória do histórico em dicionários e em registros compactos.
+
+    Cada representação é montada em um processo novo, e a memória é o aumento do
+    pico de memória residente do processo (ou, sem o módulo resource, o total
+    alocado medido pelo tracemalloc).
+
+    Args:
+        quantidade (int): Número de pacientes.
+        semente (int): Semente do gerador aleatório.
+
+    Returns:
+        dict: Bytes usados e tempo de carga em cada representação.
+    """
+    resultado = {"pacientes": quantidade}
+    contexto = multiprocessing.get_context("spawn")
+    for representacao in ("dict", "registro"):
+        with contexto.Pool(1) as processo:
+            memoria, tempo = processo.apply(_medir, (representacao, quantidade, semente))
+        resultado[f"bytes_{representacao}"] = memoria
+        resultado[f"segundos_{representacao}"] = tempo
+    return resultado
+
+
+if __name__ == "__main__":
+    for quantidade in (100_000, 1_000_000):
+        resultado = benchmark_memoria(quantidade)
+        print(f"{quantidade:>9,} pacientes: "
+              f"dicionários {resultado['bytes_dict'] / 2**20:,.0f} MiB, "
+              f"registros {resultado['bytes_registro'] / 2**20:,.0f} MiB "
+              f"({resultado['bytes_dict'] / resultado['bytes_registro']:.1f}x menos)")
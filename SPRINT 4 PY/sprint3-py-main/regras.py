@@ -0,0 +1,356 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import Counter
+from metricas import cronometrado
+
+# Arquivo com as regras de triagem usadas por padrão, ao lado do código
+ARQUIVO_REGRAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "regras_triagem.json")
+
+# Valor usado para campos que não existem nos sintomas do paciente
+_AUSENTE = object()
+
+
+def _compilar_leitura(campo):
+    """
+    Gera a função que lê um campo dos sintomas, do tempo dos sintomas ou da gravidade.
+
+    Args:
+        campo (str): Nome do campo; caminhos como "lesao_fisica.local" acessam subcampos.
+
+    Returns:
+        function: Função (sintomas, tempo_sintomas, gravidade) -> valor ou _AUSENTE.
+    """
+    if campo == "tempo_sintomas":
+        return lambda sintomas, tempo, gravidade: tempo
+    if campo == "gravidade":
+        return lambda sintomas, tempo, gravidade: gravidade
+    partes = campo.split(".")
+    if len(partes) == 1:
+        return lambda sintomas, tempo, gravidade: sintomas.get(campo, _AUSENTE)
+
+    def ler(sintomas, tempo, gravidade):
+        valor = sintomas
+        for parte in partes:
+            if not isinstance(valor, dict):
+                return _AUSENTE
+            valor = valor.get(parte, _AUSENTE)
+        return valor
+    return ler
+
+
+def _compilar_condicao(condicao):
+    """
+    Compila uma condição declarativa em uma função.
+
+    Operadores aceitos: "igual", "diferente", "em", "maior_que", "menor_que" e "existe".
+
+    Args:
+        condicao (dict): Campo "campo" e exatamente um operador.
+
+    Returns:
+        function: Função (sintomas, tempo_sintomas, gravidade) -> bool.
+
+    Raises:
+        ValueError: Caso falte o campo ou o operador seja desconhecido.
+    """
+    if not isinstance(condicao, dict) or not isinstance(condicao.get("campo"), str):
+        raise ValueError(f"Condição sem campo: {condicao!r}")
+    ler = _compilar_leitura(condicao["campo"])
+    operadores = [chave for chave in condicao if chave not in ("campo", "nome")]
+    if len(operadores) != 1:
+        raise ValueError(f"A condição deve ter exatamente um operador: {condicao!r}")
+    operador = operadores[0]
+    alvo = condicao[operador]
+
+    if operador == "igual":
+        return lambda s, t, g: ler(s, t, g) == alvo
+    if operador == "diferente":
+        return lambda s, t, g: ler(s, t, g) != alvo
+    if operador == "em":
+        if not isinstance(alvo, list):
+            raise ValueError(f"O operador 'em' espera uma lista: {condicao!r}")
+        try:
+            alvos = frozenset(alvo)
+        except TypeError:
+            alvos = tuple(alvo)
+        return lambda s, t, g: ler(s, t, g) in alvos
+    if operador in ("maior_que", "menor_que"):
+        if isinstance(alvo, bool) or not isinstance(alvo, (int, float)):
+            raise ValueError(f"O operador '{operador}' espera um número: {condicao!r}")
+        if operador == "maior_que":
+            return lambda s, t, g: (v := ler(s, t, g)) is not _AUSENTE and v is not None and v > alvo
+        return lambda s, t, g: (v := ler(s, t, g)) is not _AUSENTE and v is not None and v < alvo
+    if operador == "existe":
+        esperado = bool(alvo)
+        return lambda s, t, g: (ler(s, t, g) is not _AUSENTE) == esperado
+    raise ValueError(f"Operador desconhecido: {operador!r}")
+
+
+def _compilar_regras_gravidade(regras):
+    compiladas = []
+    for regra in regras:
+        if not isinstance(regra, dict) or not regra.get("nome") or not regra.get("gravidade"):
+            raise ValueError(f"Regra de gravidade sem nome ou gravidade: {regra!r}")
+        condicoes = [_compilar_condicao(c) for c in regra.get("condicoes", [])]
+        if not condicoes:
+            raise ValueError(f"Regra de gravidade sem condições: {regra['nome']}")
+        if len(condicoes) == 1:
+            teste = condicoes[0]
+        else:
+            teste = lambda s, t, g, condicoes=tuple(condicoes): all(c(s, t, g) for c in condicoes)
+        compiladas.append((regra["nome"], regra["gravidade"], teste))
+    return tuple(compiladas)
+
+
+def _compilar_faixas_febre(faixas):
+    compiladas = []
+    anterior = float("-inf")
+    for i, faixa in enumerate(faixas):
+        if not isinstance(faixa, dict) or not faixa.get("nivel"):
+            raise ValueError(f"Faixa de febre sem nível: {faixa!r}")
+        limite = faixa.get("abaixo_de", faixa.get("ate"))
+        if limite is None:
+            if i != len(faixas) - 1:
+                raise ValueError("Apenas a última faixa de febre pode ficar sem limite.")
+        elif limite < anterior:
+            raise ValueError("As faixas de febre devem estar em ordem crescente.")
+        else:
+            anterior = limite
+        compiladas.append((limite, "ate" in faixa, faixa["nivel"]))
+    if not compiladas or compiladas[-1][0] is not None:
+        raise ValueError("A última faixa de febre deve ficar sem limite.")
+    return tuple(compiladas)
+
+
+class MotorRegras:
+    """
+    Motor de regras de triagem lidas de um arquivo JSON declarativo.
+
+    As regras são compiladas uma única vez em funções, na carga do arquivo; a
+    avaliação de cada paciente apenas percorre a lista compilada, sem interpretar
+    o arquivo. As regras de gravidade são testadas na ordem do arquivo e a primeira
+    que casar define a gravidade. O arquivo pode ser recarregado sem reiniciar o
+    sistema, e cada regra tem um contador de acertos, alterado com a trava do
+    motor, pois o serviço HTTP classifica pacientes em várias threads.
+
+    A chave opcional "envelhecimento_minutos" faz a espera contar na ordem da fila
+    (ver FilaTriagem): fica em envelhecimento, em segundos, ou None.
+    """
+
+    def __init__(self, arquivo=ARQUIVO_REGRAS):
+        """
+        Args:
+            arquivo (str): Caminho do arquivo JSON com as regras.
+
+        Raises:
+            ValueError: Caso o arquivo tenha regras inválidas.
+        """
+        self.arquivo = arquivo
+        self.versao = 0
+        self.assinatura = None
+        self.acertos = Counter()
+        self.envelhecimento = None
+        self._trava = threading.Lock()
+        self._assinatura = None
+        self.recarregar()
+
+    def recarregar(self):
+        """
+        Lê e compila novamente o arquivo de regras, zerando os contadores de acertos.
+
+        Raises:
+            ValueError: Caso o arquivo tenha regras inválidas (as regras atuais são mantidas).
+        """
+        with self._trava:
+            assinatura = self._assinatura_arquivo()
+            with open(self.arquivo, encoding="utf-8") as f:
+                try:
+                    definicao = json.load(f)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"Arquivo de regras {self.arquivo} não é um JSON válido: {e}")
+            if not isinstance(definicao, dict) or not definicao.get("gravidade_padrao"):
+                raise ValueError("O arquivo de regras deve definir a gravidade_padrao.")
+            regras = _compilar_regras_gravidade(definicao.get("regras_gravidade", []))
+            faixas = _compilar_faixas_febre(definicao.get("faixas_febre", [{"nivel": "Nenhuma"}]))
+            prioridade = tuple(_compilar_condicao(c) for c in definicao.get("prioridade_fila", []))
+            envelhecimento = definicao.get("envelhecimento_minutos")
+            if envelhecimento is not None and (
+                isinstance(envelhecimento, bool) or not isinstance(envelhecimento, (int, float)) or envelhecimento <= 0
+            ):
+                raise ValueError("O envelhecimento_minutos deve ser um número positivo.")
+
+            # Troca tudo de uma vez, para que uma avaliação em andamento não misture versões
+            self._compilado = (regras, definicao["gravidade_padrao"], faixas, prioridade)
+            self.envelhecimento = envelhecimento * 60 if envelhecimento is not None else None
+            self._assinatura = assinatura
+            # Identifica o conteúdo das regras entre execuções, para invalidar gravidades guardadas
+            self.assinatura = hashlib.sha1(json.dumps(definicao, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+            self.acertos = Counter()
+            self.versao += 1
+        logging.info(f"Regras de triagem carregadas do arquivo {self.arquivo}: {len(regras)} regras de gravidade.")
+
+    def _assinatura_arquivo(self):
+        estado = os.stat(self.arquivo)
+        return estado.st_mtime_ns, estado.st_size
+
+    def recarregar_se_alterado(self):
+        """
+        Recarrega as regras se o arquivo mudou desde a última carga.
+
+        Um arquivo inválido é registrado no log e as regras atuais continuam valendo.
+
+        Returns:
+            bool: True se as regras foram recarregadas.
+        """
+        try:
+            if self._assinatura_arquivo() == self._assinatura:
+                return False
+            self.recarregar()
+            return True
+        except (OSError, ValueError) as e:
+            logging.error(f"Erro ao recarregar as regras de triagem: {e}")
+            return False
+
+    @cronometrado("regras_classificar")
+    def classificar(self, sintomas, tempo_sintomas=None):
+        """
+        Classifica a gravidade de um paciente.
+
+        Args:
+            sintomas (dict): Dicionário contendo os sintomas do paciente.
+            tempo_sintomas (int): Número de dias com os sintomas. Padrão: o valor nos sintomas.
+
+        Returns:
+            str: Nível de gravidade.
+        """
+        if tempo_sintomas is None:
+            tempo_sintomas = sintomas.get("tempo_sintomas", 0)
+        regras, padrao, _, _ = self._compilado
+        for nome, gravidade, teste in regras:
+            if teste(sintomas, tempo_sintomas, None):
+                break
+        else:
+            nome = gravidade = padrao
+        with self._trava:
+            self.acertos[nome] += 1
+        return gravidade
+
+    @cronometrado("regras_classificar_lote")
+    def classificar_lote(self, lista_sintomas):
+        """
+        Classifica a gravidade de vários pacientes com a mesma versão das regras.
+
+        Args:
+            lista_sintomas (iterable): Dicionários de sintomas, com "tempo_sintomas".
+
+        Returns:
+            list: Nível de gravidade de cada paciente, na mesma ordem.
+        """
+        regras, padrao, _, _ = self._compilado
+        acertos = Counter()
+        resultado = []
+        for sintomas in lista_sintomas:
+            tempo_sintomas = sintomas.get("tempo_sintomas", 0)
+            for nome, gravidade, teste in regras:
+                if teste(sintomas, tempo_sintomas, None):
+                    break
+            else:
+                nome = gravidade = padrao
+            acertos[nome] += 1
+            resultado.append(gravidade)
+        with self._trava:
+            self.acertos.update(acertos)
+        return resultado
+
+    def classificar_febre(self, temperatura):
+        """
+        Converte uma temperatura no nível de febre usado nos sintomas.
+
+        Args:
+            temperatura (float): Temperatura em °C.
+
+        Returns:
+            str: Nível de febre (por padrão "Baixa", "Moderada" ou "Alta").
+        """
+        for limite, inclusivo, nivel in self._compilado[2]:
+            if limite is None or temperatura < limite or (inclusivo and temperatura == limite):
+                return nivel
+
+    @cronometrado("regras_chave_prioridade")
+    def chave_prioridade(self, sintomas, idade=None):
+        """
+        Calcula a chave de ordenação da fila e a gravidade do paciente.
+
+        Cada critério de "prioridade_fila" atendido coloca o paciente à frente
+        dos que não o atendem, na ordem em que os critérios aparecem no arquivo.
+
+        Args:
+            sintomas (dict): Dicionário contendo os sintomas do paciente.
+            idade (int): Idade do paciente, que as regras leem no campo "idade".
+                Padrão: desconhecida (o campo fica ausente).
+
+        Returns:
+            tuple: Chave de prioridade (menor é atendido antes) e a gravidade do paciente.
+        """
+        if idade is not None:
+            sintomas = {**sintomas, "idade": idade}
+        tempo_sintomas = sintomas.get("tempo_sintomas", 0)
+        prioridade = self._compilado[3]
+        gravidade = self.classificar(sintomas, tempo_sintomas)
+        return tuple(not criterio(sintomas, tempo_sintomas, gravidade) for criterio in prioridade), gravidade
+
+    @cronometrado("regras_chave_prioridade_lote")
+    def chave_prioridade_lote(self, lista_sintomas, idades=None):
+        """
+        Calcula a chave de prioridade e a gravidade de vários pacientes, como chave_prioridade.
+
+        As gravidades são calculadas de uma vez, com classificar_lote; só os critérios
+        de "prioridade_fila" são conferidos paciente a paciente.
+
+        Args:
+            lista_sintomas (list): Dicionários de sintomas, com "tempo_sintomas".
+            idades (list): Idade de cada paciente (None se desconhecida). Padrão: todas desconhecidas.
+
+        Returns:
+            list: Pares (chave de prioridade, gravidade), na mesma ordem.
+        """
+        if idades is not None:
+            lista_sintomas = [
+                sintomas if idade is None else {**sintomas, "idade": idade}
+                for sintomas, idade in zip(lista_sintomas, idades)
+            ]
+        prioridade = self._compilado[3]
+        resultado = []
+        for sintomas, gravidade in zip(lista_sintomas, self.classificar_lote(lista_sintomas)):
+            tempo_sintomas = sintomas.get("tempo_sintomas", 0)
+            resultado.append((tuple(not criterio(sintomas, tempo_sintomas, gravidade) for criterio in prioridade), gravidade))
+        return resultado
+
+    def contadores(self):
+        """
+        Retorna quantas vezes cada regra definiu a gravidade desde a última carga.
+
+        Returns:
+            dict: Nome da regra (ou a gravidade padrão) -> número de acertos.
+        """
+        with self._trava:
+            return dict(self.acertos)
+
+
+_motor_padrao = None
+
+
+def motor_padrao():
+    """
+    Retorna o motor com as regras do arquivo padrão, carregado no primeiro uso.
+
+    Returns:
+        MotorRegras: Motor compartilhado pelo sistema.
+    """
+    global _motor_padrao
+    if _motor_padrao is None:
+        _motor_padrao = MotorRegras()
+    return _motor_padrao
@@ -0,0 +1,427 @@
+import bisect
+import json
+import threading
+from logica import FAIXAS_ETARIAS, converter_data_nascimento, nascimento_limite, normalizar_cpf
+from metricas import cronometrado
+from registros import Paciente
+
+
+class RepositorioPacientes:
+    """
+    Repositório de pacientes com índice por CPF normalizado.
+
+    Mantém os pacientes ativos em um dicionário indexado pelo CPF (somente dígitos)
+    e o histórico de altas em uma lista acompanhada de um índice CPF -> registros,
+    de modo que busca, cadastro, alta e verificação de duplicidade custem O(1).
+
+    A data de nascimento de cada paciente ativo é guardada também como número do
+    dia, na chave "nascimento", e os pacientes ativos ficam em uma lista ordenada
+    por ela: a consulta por faixa etária é uma busca binária, sem percorrer todos.
+
+    Os registros do histórico em memória são guardados como registros compactos
+    (registros.Paciente) e convertidos de volta para dicionários nas consultas.
+
+    O histórico também pode ser uma fonte lida sob demanda, com os métodos
+    registros_do_cpf e __iter__ (ArquivoHistorico, HistoricoPreguicoso ou
+    HistoricoSQLite); nesse caso, as altas dadas depois da abertura ficam em
+    memória, a não ser que a própria fonte as grave (atributo grava_altas, como no
+    banco SQLite), o que evita registros duplicados nas consultas. O acesso ao
+    histórico é protegido por trava_historico, para que a gravação em segundo
+    plano possa trocar o arquivo de dados enquanto a interface consulta o
+    histórico.
+    """
+
+    def __init__(self, pacientes=None, historico=None):
+        self._ativos = {}
+        self._por_nascimento = []
+        self.trava_historico = threading.RLock()
+        self._em_carga = False
+        self.adicionar_varios(pacientes or [])
+        self.substituir_historico([] if historico is None else historico)
+
+    @classmethod
+    def de_dados(cls, dados):
+        """
+        Cria o repositório a partir do dicionário retornado por carregar_dados.
+
+        Args:
+            dados (dict): Dicionário com as chaves "pacientes" e "historico".
+
+        Returns:
+            RepositorioPacientes: Repositório com os dados indexados.
+        """
+        return cls(dados.get("pacientes", []), dados.get("historico", []))
+
+    @property
+    def pacientes(self):
+        """list: Pacientes ativos, na ordem de chegada."""
+        return list(self._ativos.values())
+
+    @property
+    def historico(self):
+        """list: Pacientes que já receberam alta, na ordem da alta."""
+        with self.trava_historico:
+            em_memoria = [registro.para_dict() for registro in self._historico]
+            if self._historico_em_disco is not None:
+                return list(self._historico_em_disco) + em_memoria
+            return em_memoria
+
+    def iterar_historico(self):
+        """
+        Percorre o histórico sem montar a lista completa, como a propriedade historico.
+
+        Yields:
+            dict: Registros de alta, na ordem da alta.
+        """
+        with self.trava_historico:
+            em_disco = self._historico_em_disco
+            em_memoria = list(self._historico)
+        if em_disco is not None:
+            yield from em_disco
+        for registro in em_memoria:
+            yield registro.para_dict()
+
+    def __len__(self):
+        return len(self._ativos)
+
+    def __contains__(self, cpf):
+        return self.cpf_cadastrado(cpf)
+
+    def __iter__(self):
+        return iter(self._ativos.values())
+
+    def cpf_cadastrado(self, cpf):
+        """
+        Verifica se já existe um paciente ativo com o CPF informado.
+
+        Args:
+            cpf (str): CPF do paciente, com ou sem pontuação.
+
+        Returns:
+            bool: True se o CPF já estiver em atendimento.
+        """
+        return normalizar_cpf(cpf or "") in self._ativos
+
+    @cronometrado("repositorio_buscar")
+    def buscar(self, cpf):
+        """
+        Busca um paciente ativo pelo CPF.
+
+        Args:
+            cpf (str): CPF do paciente, com ou sem pontuação.
+
+        Returns:
+            dict or None: Paciente encontrado ou None se não encontrado.
+        """
+        return self._ativos.get(normalizar_cpf(cpf or ""))
+
+    def buscar_no_historico(self, cpf):
+        """
+        Busca o primeiro registro de alta do paciente com o CPF informado.
+
+        Args:
+            cpf (str): CPF do paciente, com ou sem pontuação.
+
+        Returns:
+            dict or None: Registro encontrado ou None se não encontrado.
+        """
+        registros = self.historico_do_paciente(cpf)
+        return registros[0] if registros else None
+
+    def historico_do_paciente(self, cpf):
+        """
+        Retorna todos os registros de alta do paciente com o CPF informado.
+
+        Args:
+            cpf (str): CPF do paciente, com ou sem pontuação.
+
+        Returns:
+            list: Registros de alta do paciente, do mais antigo ao mais recente.
+        """
+        with self.trava_historico:
+            registros = [registro.para_dict() for registro in self._indice_historico.get(normalizar_cpf(cpf or ""), [])]
+            if self._historico_em_disco is not None:
+                registros = self._historico_em_disco.registros_do_cpf(cpf) + registros
+            return registros
+
+    @cronometrado("repositorio_buscar_em_todos")
+    def buscar_em_todos(self, cpf):
+        """
+        Busca o paciente entre os ativos e, se não encontrado, no histórico.
+
+        Args:
+            cpf (str): CPF do paciente, com ou sem pontuação.
+
+        Returns:
+            dict or None: Paciente encontrado ou None se não encontrado.
+        """
+        return self.buscar(cpf) or self.buscar_no_historico(cpf)
+
+    def adicionar(self, paciente):
+        """
+        Cadastra um paciente ativo.
+
+        Args:
+            paciente (dict): Dados do paciente.
+
+        Raises:
+            ValueError: Caso o CPF já esteja cadastrado entre os pacientes ativos.
+        """
+        chave = normalizar_cpf(paciente.get("cpf", ""))
+        if chave in self._ativos:
+            raise ValueError("Este CPF já está cadastrado.")
+        self._ativos[chave] = paciente
+        nascimento = paciente.get("nascimento")
+        if nascimento is None and paciente.get("birth_date"):
+            # Dados gravados antes da chave "nascimento" são convertidos uma única vez
+            try:
+                nascimento = paciente["nascimento"] = converter_data_nascimento(paciente["birth_date"])
+            except ValueError:
+                nascimento = None
+        if isinstance(nascimento, int):
+            if self._em_carga:
+                self._por_nascimento.append((nascimento, chave))
+            else:
+                bisect.insort(self._por_nascimento, (nascimento, chave))
+
+    def adicionar_varios(self, pacientes):
+        """
+        Cadastra vários pacientes ativos, ordenando a lista por nascimento uma única vez, no fim.
+
+        Args:
+            pacientes (iterable): Dados dos pacientes.
+
+        Raises:
+            ValueError: Caso algum CPF já esteja cadastrado; os anteriores a ele continuam cadastrados.
+        """
+        self._em_carga = True
+        try:
+            for paciente in pacientes:
+                self.adicionar(paciente)
+        finally:
+            self._por_nascimento.sort()
+            self._em_carga = False
+
+    def adicionar_diagnostico(self, cpf, diagnostico):
+        """
+        Adiciona um diagnóstico a um paciente ativo.
+
+        Args:
+            cpf (str): CPF do paciente.
+            diagnostico (dict): Dados do diagnóstico.
+
+        Returns:
+            dict: Paciente atualizado.
+
+        Raises:
+            ValueError: Caso o paciente não seja encontrado.
+        """
+        paciente = self.buscar(cpf)
+        if not paciente:
+            raise ValueError("Paciente não encontrado.")
+        paciente.setdefault("diagnosticos", []).append(diagnostico)
+        return paciente
+
+    def atualizar_sintomas(self, cpf, sintomas, triagem=None):
+        """
+        Substitui os sintomas de um paciente ativo e a gravidade guardada nele.
+
+        Args:
+            cpf (str): CPF do paciente.
+            sintomas (dict): Novos sintomas do paciente.
+            triagem (dict): Gravidade já calculada para os novos sintomas (ver
+                fila.chave_prioridade). Padrão: descarta a gravidade guardada.
+
+        Returns:
+            dict: Paciente atualizado.
+
+        Raises:
+            ValueError: Caso o paciente não seja encontrado.
+        """
+        paciente = self.buscar(cpf)
+        if not paciente:
+            raise ValueError("Paciente não encontrado.")
+        paciente["sintomas"] = sintomas
+        if triagem:
+            paciente["triagem"] = triagem
+        else:
+            paciente.pop("triagem", None)
+        return paciente
+
+    def marcar_em_atendimento(self, cpf, instante=None):
+        """
+        Marca um paciente ativo como chamado da fila de espera.
+
+        Args:
+            cpf (str): CPF do paciente.
+            instante (float): Instante da chamada (time.time), guardado em "atendimento"
+                só no primeiro atendimento. Padrão: não registrado.
+
+        Returns:
+            dict: Paciente atualizado.
+
+        Raises:
+            ValueError: Caso o paciente não seja encontrado.
+        """
+        paciente = self.buscar(cpf)
+        if not paciente:
+            raise ValueError("Paciente não encontrado.")
+        paciente["em_atendimento"] = True
+        if instante is not None:
+            paciente.setdefault("atendimento", instante)
+        return paciente
+
+    def dar_alta(self, cpf, arquivar=True, instante=None):
+        """
+        Move um paciente ativo para o histórico.
+
+        Args:
+            cpf (str): CPF do paciente.
+            arquivar (bool): Se False, apenas retira o paciente dos ativos, pois a
+                alta já está no histórico em disco. Ignorado quando o histórico em
+                disco grava as altas por conta própria (grava_altas).
+            instante (float): Instante da alta (time.time), guardado em "alta". Padrão: não registrado.
+
+        Returns:
+            dict: Paciente que recebeu alta.
+
+        Raises:
+            ValueError: Caso o paciente não seja encontrado.
+        """
+        chave = normalizar_cpf(cpf or "")
+        paciente = self._ativos.pop(chave, None)
+        if not paciente:
+            raise ValueError("Paciente não encontrado.")
+        nascimento = paciente.get("nascimento")
+        if isinstance(nascimento, int):
+            posicao = bisect.bisect_left(self._por_nascimento, (nascimento, chave))
+            if posicao < len(self._por_nascimento) and self._por_nascimento[posicao] == (nascimento, chave):
+                del self._por_nascimento[posicao]
+        if instante is not None:
+            paciente["alta"] = instante
+        if arquivar and not getattr(self._historico_em_disco, "grava_altas", False):
+            self._arquivar(paciente)
+        return paciente
+
+    def _faixa_nascimento(self, idade_minima, idade_maxima, hoje):
+        inicio, fim = 0, len(self._por_nascimento)
+        if idade_maxima is not None:
+            # Mais de idade_maxima anos: nascidos até o limite de idade_maxima + 1
+            inicio = bisect.bisect_right(self._por_nascimento, (nascimento_limite(idade_maxima + 1, hoje), "\uffff"))
+        if idade_minima is not None:
+            fim = bisect.bisect_right(self._por_nascimento, (nascimento_limite(idade_minima, hoje), "\uffff"), inicio)
+        return inicio, max(inicio, fim)
+
+    def pacientes_por_idade(self, idade_minima=None, idade_maxima=None, hoje=None):
+        """
+        Retorna os pacientes ativos com idade entre os limites, inclusive.
+
+        Pacientes sem data de nascimento válida não entram em nenhuma faixa.
+
+        Args:
+            idade_minima (int): Idade mínima em anos. Padrão: sem limite.
+            idade_maxima (int): Idade máxima em anos. Padrão: sem limite.
+            hoje (datetime.date): Data de referência. Padrão: hoje.
+
+        Returns:
+            list: Pacientes, do mais novo ao mais velho.
+        """
+        inicio, fim = self._faixa_nascimento(idade_minima, idade_maxima, hoje)
+        return [self._ativos[chave] for _, chave in reversed(self._por_nascimento[inicio:fim])]
+
+    def contar_por_idade(self, idade_minima=None, idade_maxima=None, hoje=None):
+        """
+        Conta os pacientes ativos com idade entre os limites, em O(log n).
+
+        Args:
+            idade_minima (int): Idade mínima em anos. Padrão: sem limite.
+            idade_maxima (int): Idade máxima em anos. Padrão: sem limite.
+            hoje (datetime.date): Data de referência. Padrão: hoje.
+
+        Returns:
+            int: Número de pacientes.
+        """
+        inicio, fim = self._faixa_nascimento(idade_minima, idade_maxima, hoje)
+        return fim - inicio
+
+    def contagem_por_faixa_etaria(self, hoje=None):
+        """
+        Conta os pacientes ativos de cada faixa de FAIXAS_ETARIAS.
+
+        Args:
+            hoje (datetime.date): Data de referência. Padrão: hoje.
+
+        Returns:
+            dict: Nome da faixa -> número de pacientes.
+        """
+        return {nome: self.contar_por_idade(minima, maxima, hoje) for nome, (minima, maxima) in FAIXAS_ETARIAS.items()}
+
+    def _arquivar(self, paciente):
+        registro = paciente if isinstance(paciente, Paciente) else Paciente.de_dict(paciente)
+        with self.trava_historico:
+            self._historico.append(registro)
+            chave = normalizar_cpf(registro.cpf if isinstance(registro.cpf, str) else "")
+            self._indice_historico.setdefault(chave, []).append(registro)
+
+    def substituir_historico(self, historico):
+        """
+        Substitui todo o histórico, por exemplo, depois que o snapshot foi regravado.
+
+        Args:
+            historico (list, HistoricoPreguicoso or ArquivoHistorico): Novo histórico completo, em memória ou sob demanda.
+        """
+        with self.trava_historico:
+            self._historico = []
+            self._indice_historico = {}
+            self._historico_em_disco = None
+            if hasattr(historico, "registros_do_cpf"):
+                self._historico_em_disco = historico
+            else:
+                for paciente in historico:
+                    self._arquivar(paciente)
+
+    def capturar(self):
+        """
+        Captura o estado atual para ser gravado em outra thread.
+
+        Os pacientes ativos, que ainda podem ser alterados, são serializados em JSON,
+        um por item (o codificador em C é mais rápido que uma cópia profunda); os
+        registros do histórico não mudam depois da alta e são apenas referenciados. O
+        custo é proporcional aos pacientes ativos e às altas ainda não gravadas no
+        snapshot.
+
+        Returns:
+            dict: Chaves "pacientes" (lista de JSON), "historico_em_disco" e "historico"
+                (registros compactos).
+        """
+        with self.trava_historico:
+            return {
+                "pacientes": [json.dumps(paciente) for paciente in self.pacientes],
+                "historico_em_disco": self._historico_em_disco,
+                "historico": list(self._historico),
+            }
+
+    def concluir_compactacao(self, historico_em_disco, gravados):
+        """
+        Passa a ler do novo snapshot o histórico que foi gravado nele.
+
+        Deve ser chamado com trava_historico adquirida, junto com a troca do arquivo.
+
+        Args:
+            historico_em_disco (ArquivoHistorico): Histórico em disco que inclui as altas gravadas.
+            gravados (int): Quantas altas em memória foram incluídas no snapshot.
+        """
+        with self.trava_historico:
+            restantes = self._historico[gravados:]
+            self.substituir_historico(historico_em_disco)
+            for paciente in restantes:
+                self._arquivar(paciente)
+
+    def para_dados(self):
+        """
+        Converte o repositório para o formato salvo em dados_pacientes.json.
+
+        Returns:
+            dict: Dicionário com as chaves "pacientes" e "historico".
+        """
+        return {"pacientes": self.pacientes, "historico": self.historico}
@@ -0,0 +1,453 @@
+import argparse
+import copy
+import json
+import logging
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from busca import LIMITE_RESULTADOS
+from contexto import ContextoAplicacao
+from fila import chave_prioridade
+from logica import (
+    FAIXAS_ETARIAS, calcular_idade, configurar_logs, converter_data_nascimento, validar_cpf,
+    validar_dados_paciente, validar_data_formatada, validar_sintomas,
+)
+from metricas import METRICAS, ExportadorMetricas
+
+# Meta de desempenho do serviço em uma máquina local: 500 check-ins por segundo
+# com 16 clientes simultâneos (medida por teste_carga.py). Em um contêiner com um
+# único núcleo, as medições ficaram entre 480 e 620 requisições/s: a meta nem
+# sempre é atingida nessa configuração.
+META_REQUISICOES_POR_SEGUNDO = 500
+
+
+def _exigir_texto(dados, *campos):
+    """
+    Confere que os campos informados no corpo JSON são textos.
+
+    Args:
+        dados (dict): Corpo da requisição.
+        *campos (str): Campos que, quando presentes e não nulos, devem ser textos.
+
+    Raises:
+        ValueError: Caso algum campo tenha outro tipo (número, lista, objeto...).
+    """
+    for campo in campos:
+        if dados.get(campo) is not None and not isinstance(dados[campo], str):
+            raise ValueError(f"O campo {campo} deve ser um texto.")
+
+
+class ServicoTriagem:
+    """
+    Operações de triagem sem interface gráfica, seguras para uso concorrente.
+
+    Todas as leituras e alterações do contexto passam por uma única trava, de modo
+    que a verificação de CPF duplicado e o cadastro acontecem atomicamente mesmo
+    com vários quiosques e terminais atendendo ao mesmo tempo. Entre processos
+    (outras estações ou outros serviços no mesmo arquivo), a atomicidade vem da
+    transação do contexto, e as leituras aplicam antes as alterações dos outros.
+    """
+
+    def __init__(self, contexto):
+        """
+        Args:
+            contexto (ContextoAplicacao): Contexto com os dados dos pacientes.
+        """
+        self.contexto = contexto
+        self.trava = threading.Lock()
+
+    def validar(self, dados):
+        """
+        Valida os dados básicos de um paciente.
+
+        Args:
+            dados (dict): Campos "name", "cpf" e "birth_date".
+
+        Raises:
+            ValueError: Caso algum campo seja inválido.
+        """
+        _exigir_texto(dados, "name", "cpf", "birth_date")
+        with self.trava:
+            validar_dados_paciente(dados.get("name"), dados.get("cpf"), dados.get("birth_date"), self.contexto.repositorio)
+        if not validar_data_formatada(dados["birth_date"]):
+            raise ValueError("Data de nascimento inválida. Use o formato DD/MM/AAAA.")
+
+    def classificar(self, dados):
+        """
+        Classifica a gravidade dos sintomas informados.
+
+        Args:
+            dados (dict): Campo "sintomas" e, opcionalmente, "tempo_sintomas".
+
+        Returns:
+            str: Nível de gravidade.
+
+        Raises:
+            ValueError: Caso os sintomas ou o tempo dos sintomas tenham um tipo inválido.
+        """
+        sintomas = dados.get("sintomas") or {}
+        validar_sintomas(sintomas)
+        tempo_sintomas = dados.get("tempo_sintomas", sintomas.get("tempo_sintomas", 0))
+        validar_sintomas({"tempo_sintomas": tempo_sintomas})
+        return self.contexto.motor.classificar(sintomas, tempo_sintomas)
+
+    def checkin(self, dados):
+        """
+        Realiza o pré-check-in de um paciente.
+
+        Args:
+            dados (dict): Campos "name", "cpf", "birth_date", "alergias" e "sintomas".
+
+        Returns:
+            dict: Paciente cadastrado.
+
+        Raises:
+            ValueError: Caso algum campo ou sintoma seja inválido ou o CPF já esteja cadastrado.
+        """
+        _exigir_texto(dados, "name", "cpf", "birth_date", "alergias")
+        paciente = {
+            "name": dados.get("name"),
+            "cpf": dados.get("cpf"),
+            "birth_date": dados.get("birth_date"),
+            "alergias": dados.get("alergias") or "Nenhuma alergia registrada.",
+            "sintomas": dados.get("sintomas") or {},
+            "diagnosticos": []
+        }
+        validar_sintomas(paciente["sintomas"])
+        with self.trava:
+            validar_dados_paciente(paciente["name"], paciente["cpf"], paciente["birth_date"], self.contexto.repositorio)
+            paciente["nascimento"] = converter_data_nascimento(paciente["birth_date"])
+            self.contexto.registrar_checkin(paciente)
+        return paciente
+
+    def diagnostico(self, dados):
+        """
+        Adiciona um diagnóstico a um paciente ativo.
+
+        Args:
+            dados (dict): Campos "cpf", "diagnostico", "observacoes" e "medicacoes_preferidas".
+
+        Returns:
+            dict: Diagnóstico registrado.
+
+        Raises:
+            ValueError: Caso o CPF seja inválido, o paciente não exista ou falte o diagnóstico.
+        """
+        _exigir_texto(dados, "cpf", "diagnostico", "observacoes", "medicacoes_preferidas")
+        cpf = dados.get("cpf") or ""
+        if not validar_cpf(cpf):
+            raise ValueError("CPF inválido. Verifique e tente novamente.")
+        if not dados.get("diagnostico"):
+            raise ValueError("Diagnóstico não fornecido.")
+        with self.trava:
+            paciente = self.contexto.repositorio.buscar(cpf)
+            if not paciente:
+                raise LookupError("Paciente não encontrado.")
+            registro = {
+                "diagnostico": dados["diagnostico"],
+                "observacoes": dados.get("observacoes"),
+                "medicacoes_preferidas": dados.get("medicacoes_preferidas"),
+                "alergias": paciente.get("alergias", "Nenhuma alergia registrada.")
+            }
+            self.contexto.registrar_diagnostico(cpf, registro)
+        return registro
+
+    def sintomas(self, dados):
+        """
+        Atualiza os sintomas de um paciente ativo, reclassificando-o na fila.
+
+        Args:
+            dados (dict): Campos "cpf" e "sintomas".
+
+        Returns:
+            dict: CPF e a nova gravidade do paciente.
+
+        Raises:
+            ValueError: Caso os sintomas não sejam um objeto JSON ou tenham valores inválidos.
+            LookupError: Caso o paciente não seja encontrado.
+        """
+        _exigir_texto(dados, "cpf")
+        if not isinstance(dados.get("sintomas"), dict):
+            raise ValueError("Sintomas não fornecidos.")
+        validar_sintomas(dados["sintomas"])
+        with self.trava:
+            if not self.contexto.repositorio.buscar(dados.get("cpf")):
+                raise LookupError("Paciente não encontrado.")
+            paciente = self.contexto.atualizar_sintomas(dados["cpf"], dados["sintomas"])
+            _, gravidade = chave_prioridade(paciente, self.contexto.motor)
+            return {"cpf": paciente["cpf"], "gravidade": gravidade}
+
+    def alta(self, dados):
+        """
+        Dá alta a um paciente ativo.
+
+        Args:
+            dados (dict): Campo "cpf".
+
+        Returns:
+            dict: Paciente que recebeu alta.
+
+        Raises:
+            ValueError: Caso o CPF não seja um texto.
+            LookupError: Caso o paciente não seja encontrado.
+        """
+        _exigir_texto(dados, "cpf")
+        with self.trava:
+            if not self.contexto.repositorio.buscar(dados.get("cpf")):
+                raise LookupError("Paciente não encontrado.")
+            return self.contexto.dar_alta(dados["cpf"])
+
+    def chamar_proximo(self):
+        """
+        Chama o próximo paciente da fila.
+
+        Returns:
+            dict or None: Paciente chamado ou None se a fila estiver vazia.
+        """
+        with self.trava:
+            return self.contexto.chamar_proximo()
+
+    def fila(self):
+        """
+        Lista a fila de espera.
+
+        Returns:
+            list: Pacientes na ordem de atendimento, com a gravidade de cada um.
+        """
+        with self.trava:
+            self.contexto.verificar_regras()
+            self.contexto.atualizar()
+            return [
+                {"name": p.get("name"), "cpf": p.get("cpf"), "gravidade": gravidade}
+                for p, gravidade in self.contexto.fila.itens()
+            ]
+
+    def espera(self):
+        """
+        Prevê a espera de quem chega agora em cada gravidade.
+
+        Returns:
+            dict: Gravidade -> {"pacientes", "atendidos", "espera_media", "espera_quantil", "previsao"},
+                com os tempos em segundos.
+        """
+        with self.trava:
+            self.contexto.verificar_regras()
+            self.contexto.atualizar()
+            return self.contexto.previsao_espera()
+
+    def regras(self):
+        """
+        Informa a versão das regras de triagem e os acertos de cada regra.
+
+        Returns:
+            dict: Campos "versao" e "acertos".
+        """
+        with self.trava:
+            self.contexto.verificar_regras()
+            motor = self.contexto.motor
+            return {"versao": motor.versao, "acertos": motor.contadores()}
+
+    def buscar(self, consulta, limite=LIMITE_RESULTADOS):
+        """
+        Busca pacientes ativos e do histórico por nome, parte do CPF, alergia ou diagnóstico.
+
+        Args:
+            consulta (str): Texto digitado.
+            limite (int): Número máximo de resultados.
+
+        Returns:
+            list: Pacientes encontrados, com "name", "cpf" e "ativo".
+        """
+        with self.trava:
+            self.contexto.atualizar()
+            return self.contexto.busca.buscar(consulta, limite)
+
+    def faixas_etarias(self):
+        """
+        Conta os pacientes ativos de cada faixa etária.
+
+        Returns:
+            dict: Nome da faixa -> número de pacientes.
+        """
+        with self.trava:
+            self.contexto.atualizar()
+            return self.contexto.repositorio.contagem_por_faixa_etaria()
+
+    def pacientes_da_faixa(self, faixa):
+        """
+        Lista os pacientes ativos de uma faixa etária.
+
+        Args:
+            faixa (str): Nome da faixa, como em FAIXAS_ETARIAS ("pediatrica", "adulta" ou "idosa").
+
+        Returns:
+            list: Pacientes, do mais novo ao mais velho, com "name", "cpf" e "idade".
+
+        Raises:
+            ValueError: Caso a faixa não exista.
+        """
+        if faixa not in FAIXAS_ETARIAS:
+            raise ValueError(f"Faixa etária desconhecida: {faixa}.")
+        with self.trava:
+            self.contexto.atualizar()
+            return [
+                {"name": p.get("name"), "cpf": p.get("cpf"), "idade": calcular_idade(p["nascimento"])}
+                for p in self.contexto.repositorio.pacientes_por_idade(*FAIXAS_ETARIAS[faixa])
+            ]
+
+    def paciente(self, cpf):
+        """
+        Busca um paciente ativo ou no histórico.
+
+        Args:
+            cpf (str): CPF do paciente.
+
+        Returns:
+            dict: Paciente encontrado.
+
+        Raises:
+            LookupError: Caso o paciente não seja encontrado.
+        """
+        with self.trava:
+            self.contexto.atualizar()
+            paciente = self.contexto.repositorio.buscar_em_todos(cpf)
+            if not paciente:
+                raise LookupError("Paciente não encontrado.")
+            # Cópia feita sob a trava, para não serializar um registro sendo alterado
+            return copy.deepcopy(paciente)
+
+    def salvar(self):
+        """Consolida o armazenamento dos dados (compacta o diário do arquivo JSON)."""
+        with self.trava:
+            self.contexto.salvar()
+
+
+class _ManipuladorTriagem(BaseHTTPRequestHandler):
+    """Traduz requisições HTTP com corpo JSON para as operações de ServicoTriagem."""
+
+    servico = None
+
+    def _responder(self, status, corpo, tipo="application/json; charset=utf-8"):
+        conteudo = corpo.encode("utf-8") if isinstance(corpo, str) else json.dumps(corpo).encode("utf-8")
+        METRICAS.incrementar("servico_respostas", status=status)
+        self.send_response(status)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(conteudo)))
+        self.end_headers()
+        self.wfile.write(conteudo)
+
+    def _executar(self, operacao):
+        try:
+            status, corpo = operacao()
+        except LookupError as e:
+            status, corpo = 404, {"erro": str(e)}
+        except ValueError as e:
+            status, corpo = 400, {"erro": str(e)}
+        except Exception as e:
+            logging.error(f"Erro inesperado no serviço de triagem: {e}")
+            status, corpo = 500, {"erro": f"Ocorreu um erro inesperado: {e}"}
+        self._responder(status, corpo)
+
+    def _ler_json(self):
+        tamanho = int(self.headers.get("Content-Length") or 0)
+        try:
+            dados = json.loads(self.rfile.read(tamanho) or b"{}")
+        except json.JSONDecodeError:
+            raise ValueError("Corpo da requisição não é um JSON válido.")
+        if not isinstance(dados, dict):
+            raise ValueError("O corpo da requisição deve ser um objeto JSON.")
+        return dados
+
+    def do_GET(self):
+        if self.path == "/fila":
+            self._executar(lambda: (200, {"fila": self.servico.fila()}))
+        elif self.path == "/espera":
+            self._executar(lambda: (200, {"gravidades": self.servico.espera()}))
+        elif self.path == "/regras":
+            self._executar(lambda: (200, self.servico.regras()))
+        elif self.path == "/metricas":
+            self._responder(200, METRICAS.para_prometheus(), "text/plain; version=0.0.4; charset=utf-8")
+        elif self.path == "/metricas.json":
+            self._responder(200, METRICAS.para_dict())
+        elif self.path.startswith("/busca?"):
+            parametros = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+            self._executar(lambda: (200, {"resultados": self.servico.buscar(
+                parametros.get("q", [""])[0], int(parametros.get("limite", [LIMITE_RESULTADOS])[0])
+            )}))
+        elif self.path == "/faixas_etarias":
+            self._executar(lambda: (200, {"faixas": self.servico.faixas_etarias()}))
+        elif self.path.startswith("/faixas_etarias?"):
+            parametros = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+            self._executar(lambda: (200, {"pacientes": self.servico.pacientes_da_faixa(parametros.get("faixa", [""])[0])}))
+        elif self.path.startswith("/pacientes/"):
+            cpf = urllib.parse.unquote(self.path[len("/pacientes/"):])
+            self._executar(lambda: (200, self.servico.paciente(cpf)))
+        else:
+            self._responder(404, {"erro": "Rota não encontrada."})
+
+    def do_POST(self):
+        rotas = {
+            "/validar": lambda dados: (200, self.servico.validar(dados) or {"valido": True}),
+            "/classificar": lambda dados: (200, {"gravidade": self.servico.classificar(dados)}),
+            "/checkin": lambda dados: (201, self.servico.checkin(dados)),
+            "/diagnosticos": lambda dados: (201, self.servico.diagnostico(dados)),
+            "/sintomas": lambda dados: (200, self.servico.sintomas(dados)),
+            "/alta": lambda dados: (200, self.servico.alta(dados)),
+            "/chamar": lambda dados: (200, {"paciente": self.servico.chamar_proximo()}),
+        }
+        rota = rotas.get(self.path)
+        if rota is None:
+            self._responder(404, {"erro": "Rota não encontrada."})
+            return
+        self._executar(lambda: rota(self._ler_json()))
+
+    def log_message(self, formato, *args):
+        logging.debug(formato, *args)
+
+
+def criar_servidor(servico, host="127.0.0.1", porta=8080):
+    """
+    Cria o servidor HTTP do serviço de triagem, com uma thread por conexão.
+
+    Args:
+        servico (ServicoTriagem): Serviço que atende às requisições.
+        host (str): Endereço local de escuta.
+        porta (int): Porta de escuta (0 escolhe uma porta livre).
+
+    Returns:
+        ThreadingHTTPServer: Servidor pronto para serve_forever().
+    """
+    manipulador = type("ManipuladorTriagem", (_ManipuladorTriagem,), {"servico": servico})
+    servidor = ThreadingHTTPServer((host, porta), manipulador)
+    servidor.daemon_threads = True
+    return servidor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serviço de triagem sem interface gráfica.")
+    parser.add_argument("--arquivo", default="dados_pacientes.json", help="Arquivo JSON com os dados dos pacientes.")
+    parser.add_argument("--host", default="127.0.0.1", help="Endereço local de escuta.")
+    parser.add_argument("--porta", type=int, default=8080, help="Porta de escuta.")
+    parser.add_argument("--metricas", help="Arquivo onde gravar as métricas periodicamente (.json ou texto do Prometheus).")
+    argumentos = parser.parse_args()
+
+    configurar_logs()
+    exportador = ExportadorMetricas(argumentos.metricas).iniciar() if argumentos.metricas else None
+    servico = ServicoTriagem(ContextoAplicacao(argumentos.arquivo))
+    # O índice de busca é montado em segundo plano; a primeira busca espera por ele
+    servico.contexto.iniciar_busca()
+    servidor = criar_servidor(servico, argumentos.host, argumentos.porta)
+    print(f"Serviço de triagem em http://{argumentos.host}:{servidor.server_address[1]}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        servico.salvar()
+        if exportador:
+            exportador.parar()
+
+
+if __name__ == "__main__":
+    main()
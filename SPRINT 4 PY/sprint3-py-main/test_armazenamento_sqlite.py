@@ -0,0 +1,192 @@
+import json
+import os
+import tempfile
+import unittest
+from armazenamento_sqlite import ArmazenamentoSQLite, migrar_json_para_sqlite
+from contexto import ContextoAplicacao
+from gerador_pacientes import cpf_valido
+from logica import converter_data_nascimento, salvar_dados
+
+# Define uma classe de teste para o armazenamento em SQLite
+class TestArmazenamentoSQLite(unittest.TestCase):
+    def setUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        self.banco = os.path.join(self.pasta.name, "dados_pacientes.db")
+
+    def tearDown(self):
+        self.pasta.cleanup()
+
+    @staticmethod
+    def gravidades(contexto):
+        with contexto.armazenamento.trava:
+            return dict(contexto.armazenamento.conexao.execute("SELECT name, gravidade FROM pacientes WHERE ativo = 1"))
+
+    # Testa o fluxo completo pelo contexto da aplicação e a recuperação dos dados
+    def test_fluxo(self):
+        contexto = ContextoAplicacao(self.banco)
+        paciente = {
+            "name": "Ana", "cpf": "123.456.789-09", "birth_date": "01/01/1990", "alergias": "Nenhuma",
+            "sintomas": {"lesao_fisica": {"descricao": "queda", "local": "cabeça"}, "tempo_sintomas": 1},
+            "diagnosticos": []
+        }
+        contexto.registrar_checkin(paciente)
+        contexto.registrar_checkin({"name": "Bia", "cpf": "49846716885", "sintomas": {"febre": "Alta"}})
+        contexto.registrar_diagnostico("12345678909", {"diagnostico": "fratura", "observacoes": None,
+                                                       "medicacoes_preferidas": "dipirona", "alergias": "Nenhuma"})
+        self.assertEqual([paciente["name"] for paciente, _ in contexto.fila.itens()], ["Bia", "Ana"])
+        self.assertEqual(self.gravidades(contexto), {"Ana": "Leve", "Bia": "Grave"})
+        contexto.chamar_proximo()
+        contexto.dar_alta("12345678909")
+        contexto.fechar()
+
+        outro = ContextoAplicacao(self.banco)
+        self.assertEqual(len(outro.fila), 0)
+        self.assertTrue(outro.repositorio.buscar("49846716885")["em_atendimento"])
+        historico = outro.repositorio.buscar_no_historico("12345678909")
+        self.assertEqual(historico["sintomas"], paciente["sintomas"])
+        self.assertEqual(historico["diagnosticos"][0]["medicacoes_preferidas"], "dipirona")
+        outro.fechar()
+
+    # Testa que a alta aparece uma única vez no histórico, consultado no banco
+    def test_consulta_depois_da_alta(self):
+        contexto = ContextoAplicacao(self.banco)
+        for _ in range(2):
+            contexto.registrar_checkin({"name": "Ana", "cpf": "12345678909", "sintomas": {}})
+            contexto.dar_alta("123.456.789-09")
+        registros = contexto.repositorio.historico_do_paciente("12345678909")
+        self.assertEqual([registro["name"] for registro in registros], ["Ana", "Ana"])
+        self.assertEqual(len(contexto.repositorio.historico), 2)
+        self.assertEqual(sum(1 for _ in contexto.repositorio.iterar_historico()), 2)
+        contexto.fechar()
+
+    # Testa que a gravidade gravada nas colunas do banco segue as regras do contexto
+    def test_regras_do_contexto(self):
+        regras = os.path.join(self.pasta.name, "regras.json")
+        with open(regras, "w", encoding="utf-8") as f:
+            json.dump({"gravidade_padrao": "Leve", "regras_gravidade": [
+                {"nome": "tosse", "gravidade": "Grave", "condicoes": [{"campo": "tosse", "igual": "Sim"}]}
+            ]}, f)
+        contexto = ContextoAplicacao(self.banco, arquivo_regras=regras)
+        contexto.registrar_checkin({"name": "Ana", "cpf": "12345678909", "sintomas": {"tosse": "Sim"}})
+        contexto.registrar_checkin({"name": "Bia", "cpf": "49846716885", "sintomas": {}})
+        contexto.atualizar_sintomas("49846716885", {"tosse": "Sim"})
+        self.assertEqual(self.gravidades(contexto), {"Ana": "Grave", "Bia": "Grave"})
+        contexto.fechar()
+
+    # Testa que duas estações no mesmo banco veem as alterações uma da outra e não criam registros fantasmas
+    def test_estacoes_no_mesmo_banco(self):
+        estacao1 = ContextoAplicacao(self.banco)
+        estacao2 = ContextoAplicacao(self.banco)
+        estacao1.registrar_checkin({"name": "Ana", "cpf": "12345678909", "sintomas": {}})
+        self.assertEqual(len(estacao2.fila), 1)
+        self.assertFalse(estacao2.atualizar())
+
+        estacao1.registrar_checkin({"name": "Bia", "cpf": "49846716885", "sintomas": {"febre": "Alta"}})
+        self.assertTrue(estacao2.atualizar())
+        self.assertEqual([paciente["name"] for paciente, _ in estacao2.fila.itens()], ["Bia", "Ana"])
+        self.assertFalse(estacao2.atualizar())
+
+        # O CPF cadastrado pela outra estação é recusado sem deixar o paciente na memória
+        estacao1.registrar_checkin({"name": "Carla", "cpf": "11144477735", "sintomas": {}})
+        with self.assertRaises(ValueError):
+            estacao2.registrar_checkin({"name": "Carla", "cpf": "111.444.777-35", "sintomas": {}})
+        self.assertEqual(len(estacao2.repositorio), 3)
+        self.assertEqual(len(estacao2.fila), 3)
+
+        # A alta dada pela outra estação não é repetida
+        estacao1.dar_alta("12345678909")
+        with self.assertRaises(ValueError):
+            estacao2.dar_alta("12345678909")
+        self.assertIsNone(estacao2.repositorio.buscar("12345678909"))
+        self.assertNotIn("12345678909", estacao2.fila)
+        self.assertEqual(len(estacao2.repositorio.historico_do_paciente("12345678909")), 1)
+        self.assertEqual(estacao2.chamar_proximo()["name"], "Bia")
+        self.assertTrue(estacao1.atualizar())
+        self.assertTrue(estacao1.repositorio.buscar("49846716885")["em_atendimento"])
+        for estacao in (estacao1, estacao2):
+            estacao.fechar()
+
+    # Testa que uma gravação recusada pelo banco não altera a memória nem deixa parte da importação gravada
+    def test_gravacao_recusada(self):
+        contexto = ContextoAplicacao(self.banco)
+        contexto.registrar_checkin({"name": "Ana", "cpf": "12345678909", "sintomas": {}})
+        with self.assertRaises(ValueError):
+            contexto.importar_pacientes([
+                {"name": "Bia", "cpf": "49846716885", "sintomas": {}},
+                {"name": "Bia", "cpf": "498.467.168-85", "sintomas": {}},
+            ])
+        self.assertEqual([paciente["name"] for paciente in contexto.repositorio], ["Ana"])
+        self.assertEqual(len(contexto.fila), 1)
+        contexto.registrar_checkin({"name": "Carla", "cpf": "11144477735", "sintomas": {}})
+        contexto.fechar()
+
+        armazenamento = ArmazenamentoSQLite(self.banco)
+        self.assertEqual([paciente["name"] for paciente in armazenamento.abrir()], ["Ana", "Carla"])
+        armazenamento.fechar()
+
+    # Testa a migração do formato JSON, sem perda de campos
+    def test_migracao(self):
+        arquivo_json = os.path.join(self.pasta.name, "dados_pacientes.json")
+        dados = {
+            "pacientes": [{"name": "Ana", "cpf": "12345678909", "birth_date": "01/01/1990", "alergias": "Nenhuma",
+                           "sintomas": {"febre": "Moderada", "falta_ar": "Não", "tempo_sintomas": 2},
+                           "diagnosticos": [], "tempo_sintomas": 0}],
+            "historico": [
+                {"name": "samuel", "cpf": "49846716885", "birth_date": "03/09/2005", "alergias": "nenhuma",
+                 "sintomas": {"tempo_sintomas": 1}, "diagnosticos": [{"diagnostico": "gripe", "observacoes": "",
+                 "medicacoes_preferidas": "", "alergias": "nenhuma", "retorno": "7 dias"}]},
+                {"name": "samuel", "cpf": "49846716885", "birth_date": "03/09/2005", "alergias": "Nenhuma",
+                 "sintomas": {"cansaço": "Sim"}, "diagnosticos": []},
+            ]
+        }
+        salvar_dados(arquivo_json, dados)
+        self.assertEqual(migrar_json_para_sqlite(arquivo_json, self.banco), 3)
+
+        armazenamento = ArmazenamentoSQLite(self.banco)
+        repositorio = armazenamento.abrir()
+        # A gravidade e a data de nascimento convertida ficam guardadas junto com o paciente
+        pacientes = repositorio.pacientes
+        self.assertEqual(pacientes[0].pop("triagem")["gravidade"], "Grave")
+        self.assertEqual(pacientes[0].pop("nascimento"), converter_data_nascimento(dados["pacientes"][0]["birth_date"]))
+        self.assertEqual(pacientes, dados["pacientes"])
+        self.assertEqual([{k: v for k, v in r.items() if k != "triagem"} for r in repositorio.historico], dados["historico"])
+        with self.assertRaises(ValueError):
+            armazenamento.registrar("checkin", paciente={"name": "Ana", "cpf": "123.456.789-09"})
+        armazenamento.fechar()
+
+    # Testa que a migração lê o snapshot, o histórico arquivado e o diário sem alterar nenhum arquivo da origem
+    def test_migracao_nao_altera_a_origem(self):
+        origem = os.path.join(self.pasta.name, "origem")
+        os.mkdir(origem)
+        arquivo_json = os.path.join(origem, "dados_pacientes.json")
+        contexto = ContextoAplicacao(arquivo_json)
+        for cpf in (cpf_valido(1), cpf_valido(2), cpf_valido(3)):
+            contexto.registrar_checkin({"name": "Ana", "cpf": cpf, "sintomas": {}})
+        contexto.dar_alta(cpf_valido(1))
+        contexto.salvar()
+        contexto.dar_alta(cpf_valido(2))
+        contexto.fechar()
+        # Uma linha incompleta no fim do diário, como a de uma estação que caiu durante a gravação
+        with open(os.path.join(origem, "dados_pacientes.jsonl"), "ab") as f:
+            f.write(b'{"seq": 99, "op": "che')
+
+        def conteudo():
+            arquivos = {}
+            for pasta, _, nomes in os.walk(origem):
+                for nome in nomes:
+                    with open(os.path.join(pasta, nome), "rb") as f:
+                        arquivos[os.path.join(pasta, nome)] = f.read()
+            return arquivos
+
+        antes = conteudo()
+        self.assertEqual(migrar_json_para_sqlite(arquivo_json, self.banco), 3)
+        self.assertEqual(conteudo(), antes)
+        armazenamento = ArmazenamentoSQLite(self.banco)
+        repositorio = armazenamento.abrir()
+        self.assertEqual([paciente["cpf"] for paciente in repositorio], [cpf_valido(3)])
+        self.assertEqual([registro["cpf"] for registro in repositorio.historico], [cpf_valido(1), cpf_valido(2)])
+        armazenamento.fechar()
+
+# Executa os testes quando o arquivo é executado diretamente
+if __name__ == "__main__":
+    unittest.main()
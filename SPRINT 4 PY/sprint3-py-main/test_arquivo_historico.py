@@ -0,0 +1,73 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+from arquivo_historico import ArquivoHistorico
+
+# Define uma classe de teste para o histórico arquivado em segmentos mensais
+class TestArquivoHistorico(unittest.TestCase):
+    def setUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        self.caminho = os.path.join(self.pasta.name, "historico")
+
+    def tearDown(self):
+        self.pasta.cleanup()
+
+    # Testa que a busca por CPF descomprime apenas os segmentos do paciente
+    def test_busca_por_segmento(self):
+        arquivo = ArquivoHistorico(self.caminho)
+        with mock.patch("time.strftime", return_value="2024-01"):
+            arquivo.arquivar([{"cpf": "123.456.789-09", "diagnosticos": ["gripe"]}, {"cpf": "49846716885"}], 3)
+        with mock.patch("time.strftime", return_value="2024-02"):
+            arquivo.arquivar([{"cpf": "12345678909", "diagnosticos": ["otite"]}], 5)
+
+        reaberto = ArquivoHistorico(self.caminho)
+        self.assertEqual(reaberto.ultimo_evento, 5)
+        self.assertEqual(reaberto.segmentos, ["2024-01", "2024-02"])
+        self.assertEqual(len(reaberto), 3)
+        with mock.patch.object(reaberto, "_ler_segmento", wraps=reaberto._ler_segmento) as ler:
+            registros = reaberto.registros_do_cpf("49846716885")
+        self.assertEqual(registros, [{"cpf": "49846716885"}])
+        ler.assert_called_once_with("2024-01")
+        self.assertEqual([r["diagnosticos"] for r in reaberto.registros_do_cpf("12345678909")], [["gripe"], ["otite"]])
+        self.assertEqual([r["cpf"] for r in reaberto], ["123.456.789-09", "49846716885", "12345678909"])
+
+    # Testa que cada registro vai para o segmento do mês da alta, e sem ela para o do arquivamento
+    def test_segmento_do_mes_da_alta(self):
+        janeiro = time.mktime((2024, 1, 15, 12, 0, 0, 0, 0, -1))
+        marco = time.mktime((2024, 3, 15, 12, 0, 0, 0, 0, -1))
+        arquivo = ArquivoHistorico(self.caminho)
+        strftime = time.strftime
+        # O mês do arquivamento é maio; o das altas vem do instante de cada uma
+        with mock.patch("time.strftime", side_effect=lambda formato, *instante: strftime(formato, *instante) if instante else "2024-05"):
+            arquivo.arquivar([
+                {"cpf": "12345678909", "alta": marco},
+                {"cpf": "49846716885", "alta": janeiro},
+                {"cpf": "12345678909", "alta": janeiro},
+                {"cpf": "11144477735"},
+            ], 4)
+
+        reaberto = ArquivoHistorico(self.caminho)
+        self.assertEqual(reaberto.segmentos, ["2024-01", "2024-03", "2024-05"])
+        self.assertEqual([r["cpf"] for r in reaberto], ["49846716885", "12345678909", "12345678909", "11144477735"])
+        self.assertEqual([r["alta"] for r in reaberto.registros_do_cpf("12345678909")], [janeiro, marco])
+
+    # Testa que um arquivamento interrompido antes da confirmação é descartado na abertura
+    def test_arquivamento_interrompido(self):
+        arquivo = ArquivoHistorico(self.caminho)
+        arquivo.arquivar([{"cpf": "12345678909"}], 1)
+        with mock.patch("os.replace", side_effect=OSError("disco cheio")):
+            with self.assertRaises(OSError):
+                arquivo.arquivar([{"cpf": "49846716885"}], 2)
+
+        reaberto = ArquivoHistorico(self.caminho)
+        self.assertEqual(reaberto.ultimo_evento, 1)
+        self.assertEqual(list(reaberto), [{"cpf": "12345678909"}])
+        self.assertEqual(reaberto.registros_do_cpf("49846716885"), [])
+        reaberto.arquivar([{"cpf": "49846716885"}], 2)
+        self.assertEqual(len(list(ArquivoHistorico(self.caminho))), 2)
+
+# Executa os testes quando o arquivo é executado diretamente
+if __name__ == "__main__":
+    unittest.main()
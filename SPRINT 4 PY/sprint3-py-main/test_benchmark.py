@@ -0,0 +1,41 @@
+import unittest
+import benchmark
+from gerador_pacientes import gerar_dados
+from logica import normalizar_cpf, validar_cpf, validar_data_formatada
+
+# Define uma classe de teste para o gerador de pacientes e o benchmark
+class TestBenchmark(unittest.TestCase):
+    # Testa que a população gerada é determinística e tem o formato de dados_pacientes.json
+    def test_gerador(self):
+        dados = gerar_dados(500, semente=7)
+        self.assertEqual(dados, gerar_dados(500, semente=7))
+        self.assertNotEqual(dados, gerar_dados(500, semente=8))
+        self.assertEqual((len(dados["pacientes"]), len(dados["historico"])), (100, 400))
+
+        ativos = {normalizar_cpf(p["cpf"]) for p in dados["pacientes"]}
+        self.assertEqual(len(ativos), 100)
+        self.assertTrue(ativos.isdisjoint(normalizar_cpf(p["cpf"]) for p in dados["historico"]))
+        for paciente in dados["pacientes"] + dados["historico"]:
+            self.assertTrue(validar_cpf(paciente["cpf"]))
+            self.assertTrue(validar_data_formatada(paciente["birth_date"]))
+            self.assertIn("tempo_sintomas", paciente["sintomas"])
+        self.assertTrue(all(1 <= len(p["diagnosticos"]) <= 3 for p in dados["historico"]))
+
+    # Testa a execução do benchmark e a detecção de regressões
+    def test_executar_e_comparar(self):
+        tempo_minimo = benchmark.TEMPO_MINIMO
+        benchmark.TEMPO_MINIMO = 0
+        try:
+            resultado = benchmark.executar([200], repeticoes=1)
+        finally:
+            benchmark.TEMPO_MINIMO = tempo_minimo
+        operacoes = {r["operacao"] for r in resultado["resultados"]}
+        self.assertTrue({"salvar_dados", "carregar_dados", "buscar_por_cpf", "classificar_gravidade", "ordenar_fila"} <= operacoes)
+        self.assertEqual(benchmark.comparar(resultado, resultado), [])
+
+        lento = {"resultados": [dict(r, segundos=r["segundos"] * 2) for r in resultado["resultados"]]}
+        self.assertEqual(len(benchmark.comparar(lento, resultado)), len(resultado["resultados"]))
+
+# Executa os testes quando o arquivo é executado diretamente
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from busca import IndiceBusca, termos_da_consulta
+from contexto import ContextoAplicacao
+from repositorio import RepositorioPacientes
+
+# Define uma classe de teste para o índice de busca de pacientes
+class TestBusca(unittest.TestCase):
+    def setUp(self):
+        dados = {
+            "pacientes": [
+                {"name": "Ana Conceição Silva", "cpf": "12345678909", "alergias": "Camarão",
+                 "diagnosticos": [{"diagnostico": "Pneumonia"}]},
+                {"name": "Bruno Santos", "cpf": "98765432100", "alergias": "Nenhuma alergia registrada."},
+            ],
+            "historico": [
+                {"name": "Ana Souza", "cpf": "11144477735", "diagnosticos": [{"diagnostico": "Gripe"}]},
+            ],
+        }
+        self.indice = IndiceBusca.de_repositorio(RepositorioPacientes.de_dados(dados))
+
+    def nomes(self, consulta, limite=20):
+        return [resultado["name"] for resultado in self.indice.buscar(consulta, limite)]
+
+    # Testa a busca por prefixo, sem diferenciar acentos e maiúsculas
+    def test_prefixo(self):
+        self.assertEqual(self.nomes("ana"), ["Ana Conceição Silva", "Ana Souza"])
+        self.assertEqual(self.nomes("CONCEI"), ["Ana Conceição Silva"])
+        self.assertEqual(self.nomes("camarao"), ["Ana Conceição Silva"])
+        self.assertEqual(self.nomes("ana gri"), ["Ana Souza"])
+        self.assertEqual(self.nomes("pneu silva"), ["Ana Conceição Silva"])
+        self.assertEqual(self.nomes("nenhuma"), [])
+        self.assertEqual(self.nomes("ana xyz"), [])
+        self.assertEqual(self.nomes(""), [])
+        self.assertEqual(self.nomes("ana", limite=1), ["Ana Conceição Silva"])
+
+    # Testa a busca por CPF, com ou sem pontuação
+    def test_cpf(self):
+        self.assertEqual(termos_da_consulta("123.456.789-09"), ["12345678909"])
+        self.assertEqual(self.nomes("123.456"), ["Ana Conceição Silva"])
+        self.assertEqual(self.nomes("9876"), ["Bruno Santos"])
+        self.assertEqual(self.indice.buscar("111.444.777-35"), [{"name": "Ana Souza", "cpf": "11144477735", "ativo": False}])
+
+    # Testa que o índice acompanha check-ins, importações, diagnósticos e altas do contexto
+    def test_atualizacao_pelo_contexto(self):
+        with tempfile.TemporaryDirectory() as pasta:
+            contexto = ContextoAplicacao(os.path.join(pasta, "dados_pacientes.json"))
+            contexto.registrar_checkin({"name": "Carla Dias", "cpf": "12345678909", "sintomas": {}})
+            self.assertEqual(len(contexto.busca), 1)
+            contexto.registrar_checkin({"name": "Davi Lima", "cpf": "98765432100", "sintomas": {}})
+            contexto.importar_pacientes([{"name": "Carlos Reis", "cpf": "11144477735", "sintomas": {}}])
+            self.assertEqual([r["name"] for r in contexto.busca.buscar("car")], ["Carla Dias", "Carlos Reis"])
+
+            contexto.registrar_diagnostico("12345678909", {"diagnostico": "Sinusite"})
+            self.assertEqual(contexto.busca.buscar("sinus")[0]["cpf"], "12345678909")
+            contexto.dar_alta("12345678909")
+            self.assertEqual(
+                contexto.busca.buscar("car"),
+                [{"name": "Carlos Reis", "cpf": "11144477735", "ativo": True},
+                 {"name": "Carla Dias", "cpf": "12345678909", "ativo": False}],
+            )
+            contexto.fechar()
+
+            # O índice montado a partir do disco encontra os mesmos pacientes
+            outro = ContextoAplicacao(os.path.join(pasta, "dados_pacientes.json"))
+            self.assertEqual(outro.busca.buscar("sinus"), [{"name": "Carla Dias", "cpf": "12345678909", "ativo": False}])
+            self.assertEqual(outro.busca.buscar("davi")[0]["ativo"], True)
+            outro.fechar()
+
+    # Testa que a busca percorre a faixa só até completar o limite, com os ativos primeiro
+    def test_limite(self):
+        historico = [{"name": f"Ana {i}", "cpf": f"{i:011d}"} for i in range(1, 1001)]
+        pacientes = [{"name": "Ana Ativa", "cpf": "12345678909"}, {"name": "Bruno", "cpf": "98765432100"}]
+        indice = IndiceBusca.de_registros(historico, pacientes)
+        percorridos = []
+        documentos_da_faixa = indice._documentos_da_faixa
+
+        def contar(*args):
+            for documento in documentos_da_faixa(*args):
+                percorridos.append(documento)
+                yield documento
+
+        with mock.patch.object(indice, "_documentos_da_faixa", side_effect=contar):
+            resultados = indice.buscar("ana", limite=5)
+        self.assertEqual([r["name"] for r in resultados], ["Ana Ativa", "Ana 1", "Ana 2", "Ana 3", "Ana 4"])
+        self.assertEqual(len(percorridos), 4)
+
+    # Testa a montagem do índice em segundo plano, com alterações feitas durante ela
+    def test_montagem_em_segundo_plano(self):
+        with tempfile.TemporaryDirectory() as pasta:
+            contexto = ContextoAplicacao(os.path.join(pasta, "dados_pacientes.json"))
+            contexto.registrar_checkin({"name": "Carla Dias", "cpf": "12345678909", "sintomas": {}})
+            contexto.registrar_checkin({"name": "Davi Lima", "cpf": "98765432100", "sintomas": {}})
+            liberar = threading.Event()
+            de_registros = IndiceBusca.de_registros
+
+            def montar_devagar(*args):
+                liberar.wait(5)
+                return de_registros(*args)
+
+            with mock.patch.object(IndiceBusca, "de_registros", side_effect=montar_devagar):
+                contexto.iniciar_busca()
+                self.assertFalse(contexto.busca_pronta)
+                contexto.registrar_checkin({"name": "Carlos Reis", "cpf": "11144477735", "sintomas": {}})
+                contexto.registrar_diagnostico("98765432100", {"diagnostico": "Sinusite"})
+                contexto.dar_alta("12345678909")
+                liberar.set()
+                busca = contexto.busca
+            self.assertTrue(contexto.busca_pronta)
+            self.assertEqual(
+                busca.buscar("car"),
+                [{"name": "Carlos Reis", "cpf": "11144477735", "ativo": True},
+                 {"name": "Carla Dias", "cpf": "12345678909", "ativo": False}],
+            )
+            self.assertEqual(busca.buscar("sinus")[0]["cpf"], "98765432100")
+            contexto.fechar()
+
+# Executa os testes quando o arquivo é executado diretamente
+if __name__ == "__main__":
+    unittest.main()
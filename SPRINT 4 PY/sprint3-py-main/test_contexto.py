@@ -0,0 +1,223 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from contexto import ContextoAplicacao
+from gerador_pacientes import cpf_valido
+
+# Define uma classe de teste para o contexto da aplicação
+class TestContexto(unittest.TestCase):
+    # Testa que os dados só são carregados no primeiro acesso e ficam em cache
+    def test_carregamento_preguicoso(self):
+        with tempfile.TemporaryDirectory() as pasta:
+            arquivo = os.path.join(pasta, "dados_pacientes.json")
+            contexto = ContextoAplicacao(arquivo)
+            self.assertFalse(contexto.carregado)
+            contexto.salvar()
+            self.assertFalse(os.path.exists(arquivo))
+
+            paciente = {"name": "Ana", "cpf": "12345678909", "sintomas": {"febre": "Alta"}}
+            contexto.registrar_checkin(paciente)
+            self.assertTrue(contexto.carregado)
+            self.assertIs(contexto.repositorio, contexto.repositorio)
+            contexto.salvar()
+
+            outro = ContextoAplicacao(arquivo)
+            self.assertEqual(len(outro.fila), 1)
+            self.assertEqual(outro.repositorio.buscar("12345678909")["name"], "Ana")
+            self.assertEqual(outro.chamar_proximo()["name"], "Ana")
+            outro.dar_alta("12345678909")
+
+            # A chamada e a alta são recuperadas do diário
+            terceiro = ContextoAplicacao(arquivo)
+            self.assertEqual(len(terceiro.repositorio), 0)
+            self.assertTrue(terceiro.repositorio.buscar_no_historico("12345678909")["em_atendimento"])
+
+    # Testa que um check-in com sintomas que as regras não aceitam não altera o repositório nem o diário
+    def test_checkin_com_sintomas_invalidos(self):
+        with tempfile.TemporaryDirectory() as pasta:
+            arquivo = os.path.join(pasta, "dados_pacientes.json")
+            contexto = ContextoAplicacao(arquivo)
+            with self.assertRaises(TypeError):
+                contexto.registrar_checkin({"name": "Ana", "cpf": "12345678909", "sintomas": {"tempo_sintomas": "3"}})
+            self.assertIsNone(contexto.repositorio.buscar("12345678909"))
+            self.assertEqual(len(contexto.fila), 0)
+            contexto.registrar_checkin({"name": "Ana", "cpf": "12345678909", "sintomas": {"tempo_sintomas": 3}})
+            contexto.fechar()
+
+            outro = ContextoAplicacao(arquivo)
+            self.assertEqual(outro.repositorio.buscar("12345678909")["sintomas"], {"tempo_sintomas": 3})
+            outro.fechar()
+
+    # Testa que a alteração dos sintomas reclassifica o paciente e é gravada com a nova gravidade
+    def test_atualizar_sintomas(self):
+        for nome in ("dados_pacientes.json", "dados_pacientes.db"):
+            with self.subTest(nome), tempfile.TemporaryDirectory() as pasta:
+                arquivo = os.path.join(pasta, nome)
+                contexto = ContextoAplicacao(arquivo)
+                contexto.registrar_checkin({"name": "Ana", "cpf": "12345678909", "sintomas": {"febre": "Nenhuma"}})
+                self.assertEqual(contexto.fila.contagem(), {"Leve": 1})
+                contexto.atualizar_sintomas("123.456.789-09", {"febre": "Alta"})
+                self.assertEqual(contexto.fila.contagem(), {"Leve": 0, "Grave": 1})
+                contexto.fechar()
+
+                outro = ContextoAplicacao(arquivo)
+                paciente = outro.repositorio.buscar("12345678909")
+                self.assertEqual(paciente["sintomas"], {"febre": "Alta"})
+                self.assertEqual(paciente["triagem"]["gravidade"], "Grave")
+                self.assertEqual(outro.fila.gravidade("12345678909"), "Grave")
+                outro.fechar()
+
+    # Testa os instantes de chegada, atendimento e alta e a previsão de espera alimentada pelas chamadas
+    def test_instantes_do_atendimento(self):
+        for nome in ("dados_pacientes.json", "dados_pacientes.db"):
+            with self.subTest(nome), tempfile.TemporaryDirectory() as pasta:
+                arquivo = os.path.join(pasta, nome)
+                contexto = ContextoAplicacao(arquivo)
+                with mock.patch("contexto.time.time", return_value=1000.0):
+                    contexto.registrar_checkin({"name": "Ana", "cpf": "12345678909", "sintomas": {}})
+                    contexto.importar_pacientes([{"name": "Bia", "cpf": "49846716885", "sintomas": {}}])
+                    contexto.registrar_checkin({"name": "Caio", "cpf": "11144477735", "sintomas": {}})
+                self.assertEqual(contexto.espera.prever(contexto.fila.itens())["Leve"]["previsao"], None)
+                for instante in (1300.0, 1500.0):
+                    with mock.patch("contexto.time.time", return_value=instante):
+                        contexto.chamar_proximo()
+                with mock.patch("contexto.time.time", return_value=1900.0):
+                    contexto.dar_alta("12345678909")
+                previsao = contexto.previsao_espera()["Leve"]
+                self.assertEqual((previsao["pacientes"], previsao["atendidos"], previsao["previsao"]), (1, 2, 200.0))
+                contexto.fechar()
+
+                outro = ContextoAplicacao(arquivo)
+                registro = outro.repositorio.buscar_no_historico("12345678909")
+                self.assertEqual((registro["chegada"], registro["atendimento"], registro["alta"]), (1000.0, 1300.0, 1900.0))
+                self.assertEqual(outro.repositorio.buscar("49846716885")["atendimento"], 1500.0)
+                self.assertEqual(outro.repositorio.buscar("11144477735")["chegada"], 1000.0)
+                # O estimador recomeça com as chamadas dos pacientes ainda ativos
+                self.assertEqual(outro.previsao_espera()["Leve"]["atendidos"], 1)
+                outro.fechar()
+
+    # Testa que uma falha na gravação não deixa a alteração na memória
+    def test_falha_na_gravacao(self):
+        for nome in ("dados_pacientes.json", "dados_pacientes.db"):
+            with self.subTest(nome), tempfile.TemporaryDirectory() as pasta:
+                contexto = ContextoAplicacao(os.path.join(pasta, nome))
+                contexto.registrar_checkin({"name": "Ana", "cpf": "12345678909", "sintomas": {}})
+                with mock.patch.object(contexto.armazenamento, "registrar", side_effect=OSError("disco cheio")):
+                    with self.assertRaises(OSError):
+                        contexto.registrar_checkin({"name": "Bia", "cpf": "49846716885", "sintomas": {}})
+                    with self.assertRaises(OSError):
+                        contexto.atualizar_sintomas("12345678909", {"febre": "Alta"})
+                    with self.assertRaises(OSError):
+                        contexto.registrar_diagnostico("12345678909", {"diagnostico": "Gripe"})
+                    with self.assertRaises(OSError):
+                        contexto.chamar_proximo()
+                    with self.assertRaises(OSError):
+                        contexto.dar_alta("12345678909")
+                paciente = contexto.repositorio.buscar("12345678909")
+                self.assertEqual([p["name"] for p in contexto.repositorio], ["Ana"])
+                self.assertEqual(paciente["sintomas"], {})
+                self.assertNotIn("diagnosticos", paciente)
+                self.assertNotIn("em_atendimento", paciente)
+                self.assertEqual(contexto.fila.contagem(), {"Leve": 1})
+                self.assertEqual(len(contexto.repositorio.historico_do_paciente("12345678909")), 0)
+                contexto.fechar()
+
+    # Testa que a compactação automática, disparada por uma alteração, já inclui essa alteração no snapshot
+    def test_compactacao_automatica_inclui_a_alteracao(self):
+        with tempfile.TemporaryDirectory() as pasta:
+            arquivo = os.path.join(pasta, "dados_pacientes.json")
+            contexto = ContextoAplicacao(arquivo)
+            contexto.armazenamento.intervalo_compactacao = 2
+            for numero in range(1, 6):
+                contexto.registrar_checkin({"name": "Paciente", "cpf": cpf_valido(numero), "sintomas": {}})
+            contexto.dar_alta(cpf_valido(1))
+            contexto.fechar()
+            with open(os.path.splitext(arquivo)[0] + ".jsonl", "rb") as f:
+                self.assertEqual(f.read(), b"")
+
+            outro = ContextoAplicacao(arquivo)
+            self.assertEqual(len(outro.repositorio), 4)
+            self.assertEqual(len(outro.repositorio.historico_do_paciente(cpf_valido(1))), 1)
+            outro.fechar()
+
+    # Testa que duas estações no mesmo arquivo veem as alterações uma da outra
+    def test_estacoes_no_mesmo_arquivo(self):
+        with tempfile.TemporaryDirectory() as pasta:
+            arquivo = os.path.join(pasta, "dados_pacientes.json")
+            estacao1 = ContextoAplicacao(arquivo)
+            estacao2 = ContextoAplicacao(arquivo)
+            estacao1.registrar_checkin({"name": "Ana", "cpf": "12345678909", "sintomas": {}})
+            self.assertEqual(len(estacao2.fila), 1)
+            self.assertEqual(len(estacao2.busca), 1)
+            self.assertFalse(estacao2.atualizar())
+
+            # Alterações da outra estação chegam à fila e ao índice já montados
+            estacao1.registrar_checkin({"name": "Bruno", "cpf": "98765432100", "sintomas": {}})
+            estacao1.registrar_diagnostico("12345678909", {"diagnostico": "Sinusite"})
+            self.assertTrue(estacao2.atualizar())
+            self.assertEqual(len(estacao2.fila), 2)
+            self.assertEqual(estacao2.busca.buscar("sinus")[0]["cpf"], "12345678909")
+
+            # A verificação de CPF duplicado considera os cadastros da outra estação
+            estacao2.registrar_checkin({"name": "Carla", "cpf": "11144477735", "sintomas": {}})
+            with self.assertRaises(ValueError):
+                estacao1.registrar_checkin({"name": "Carla", "cpf": "111.444.777-35", "sintomas": {}})
+            self.assertEqual(estacao1.chamar_proximo()["name"], "Ana")
+            self.assertEqual(estacao2.chamar_proximo()["name"], "Bruno")
+            self.assertTrue(estacao1.atualizar())
+            self.assertEqual([p["name"] for p, _ in estacao1.fila.itens()], ["Carla"])
+
+            # A compactação de uma estação não duplica o histórico arquivado da outra
+            estacao1.dar_alta("12345678909")
+            estacao2.dar_alta("98765432100")
+            estacao1.salvar()
+            self.assertTrue(estacao2.atualizar())
+            self.assertIsNone(estacao2.repositorio.buscar("12345678909"))
+            estacao2.salvar()
+            self.assertEqual(len(estacao2.repositorio.historico_do_paciente("12345678909")), 1)
+            self.assertEqual(len(estacao1.repositorio.historico_do_paciente("98765432100")), 1)
+
+            # Uma estação que ficou para trás de uma compactação recarrega os dados
+            estacao3 = ContextoAplicacao(arquivo)
+            self.assertEqual(len(estacao3.fila), 1)
+            estacao1.registrar_checkin({"name": "Davi", "cpf": "52998224725", "sintomas": {}})
+            estacao1.salvar()
+            self.assertTrue(estacao3.atualizar())
+            self.assertEqual([p["name"] for p, _ in estacao3.fila.itens()], ["Carla", "Davi"])
+            self.assertEqual(len(estacao3.repositorio.historico_do_paciente("98765432100")), 1)
+            for estacao in (estacao1, estacao2, estacao3):
+                estacao.fechar()
+
+            outro = ContextoAplicacao(arquivo)
+            self.assertEqual(len(outro.repositorio), 2)
+            self.assertEqual(len(outro.repositorio.historico_do_paciente("12345678909")), 1)
+            outro.fechar()
+
+    # Testa que compactações seguidas de outra estação são percebidas mesmo se o diário regravado reaproveitar o inode
+    def test_compactacoes_seguidas_de_outra_estacao(self):
+        with tempfile.TemporaryDirectory() as pasta:
+            arquivo = os.path.join(pasta, "dados_pacientes.json")
+            estacao1 = ContextoAplicacao(arquivo)
+            estacao2 = ContextoAplicacao(arquivo)
+            cpfs = [cpf_valido(numero) for numero in range(1, 17)]
+            for cpf in cpfs[:4]:
+                estacao2.registrar_checkin({"name": "Paciente", "cpf": cpf, "sintomas": {}})
+            self.assertEqual(len(estacao1.fila), 4)
+            for inicio in (4, 8, 12):
+                estacao2.salvar()
+                for cpf in cpfs[inicio:inicio + 4]:
+                    estacao2.registrar_checkin({"name": "Paciente", "cpf": cpf, "sintomas": {}})
+            self.assertTrue(estacao1.atualizar())
+            self.assertEqual(len(estacao1.fila), 16)
+            estacao1.registrar_checkin({"name": "Paciente", "cpf": cpf_valido(17), "sintomas": {}})
+            for estacao in (estacao1, estacao2):
+                estacao.fechar()
+
+            outro = ContextoAplicacao(arquivo)
+            self.assertEqual(len(outro.repositorio), 17)
+            outro.fechar()
+
+# Executa os testes quando o arquivo é executado diretamente
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,28 @@
+import unittest
+from logica import validar_cpf
+
+try:
+    import numpy
+    from cpf_lote import validar_cpfs_lote
+except ImportError:
+    numpy = None
+
+# Define uma classe de teste para a validação de CPFs em lote
+@unittest.skipIf(numpy is None, "NumPy não está instalado")
+class TestCpfLote(unittest.TestCase):
+    # Testa que o lote valida igual à função individual
+    def test_equivalencia(self):
+        cpfs = [
+            "12345678909", "123.456.789-09", "12345678900", "123", "abcdefghijk",
+            "11111111111", "49846716885", "", "498.467.168-8", "1234567890٩", "00000000191",
+        ]
+        self.assertEqual(validar_cpfs_lote(cpfs).tolist(), [validar_cpf(cpf) for cpf in cpfs])
+
+    # Testa CPFs informados como inteiros
+    def test_inteiros(self):
+        cpfs = numpy.array([12345678909, 12345678900, 191, 0, 49846716885])
+        self.assertEqual(validar_cpfs_lote(cpfs).tolist(), [True, False, True, False, True])
+
+# Executa os testes quando o arquivo é executado diretamente
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,26 @@
+import unittest
+from logica import validar_data_formatada
+
+try:
+    import numpy
+    from data_lote import converter_datas_lote
+except ImportError:
+    numpy = None
+
+# Define uma classe de teste para a conversão de datas em lote
+@unittest.skipIf(numpy is None, "NumPy não está instalado")
+class TestDataLote(unittest.TestCase):
+    # Testa que o lote converte igual à função individual
+    def test_equivalencia(self):
+        datas = [
+            "29/02/2000", "29/02/1900", "31/04/2020", "00/01/2000", "01/13/2000", "1/1/1990", "ab/cd/efgh",
+            "01/01/0000", "01/01/0001", "31/12/9999", "01-01-2000", "", None, "１１/01/2000", "15/08/1985",
+        ]
+        ordinais = converter_datas_lote(datas).tolist()
+        self.assertEqual([ordinal > 0 for ordinal in ordinais], [validar_data_formatada(data) for data in datas])
+        self.assertEqual(ordinais[0], 730179)
+        self.assertEqual(ordinais[8], 1)
+
+# Executa os testes quando o arquivo é executado diretamente
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,205 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from diario import DiarioPacientes
+
+# Define uma classe de teste para a persistência em diário
+class TestDiario(unittest.TestCase):
+    def setUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        self.arquivo = os.path.join(self.pasta.name, "dados_pacientes.json")
+
+    def tearDown(self):
+        self.pasta.cleanup()
+
+    # Testa que os eventos são reaplicados na abertura sem regravar o snapshot
+    def test_reaplicar_eventos(self):
+        diario = DiarioPacientes(self.arquivo)
+        repositorio = diario.abrir()
+        repositorio.adicionar({"name": "Ana", "cpf": "12345678909", "diagnosticos": []})
+        diario.registrar("checkin", paciente={"name": "Ana", "cpf": "12345678909", "diagnosticos": []})
+        diario.registrar("diagnostico", cpf="12345678909", diagnostico={"diagnostico": "virose"})
+        diario.registrar("alta", cpf="12345678909")
+        self.assertFalse(os.path.exists(self.arquivo))
+
+        recuperado = DiarioPacientes(self.arquivo).abrir()
+        self.assertEqual(len(recuperado), 0)
+        self.assertEqual(recuperado.buscar_no_historico("12345678909")["diagnosticos"], [{"diagnostico": "virose"}])
+
+    # Testa que uma linha incompleta no fim do diário é descartada
+    def test_linha_incompleta(self):
+        diario = DiarioPacientes(self.arquivo)
+        diario.abrir()
+        diario.registrar("checkin", paciente={"name": "Ana", "cpf": "12345678909"})
+        with open(diario.arquivo_diario, "a") as f:
+            f.write('{"seq": 2, "op": "alta", "cp')
+
+        recuperado = DiarioPacientes(self.arquivo)
+        self.assertEqual(len(recuperado.abrir()), 1)
+        recuperado.registrar("alta", cpf="12345678909")
+        self.assertEqual(len(DiarioPacientes(self.arquivo).abrir()), 0)
+
+    # Testa a compactação e que eventos já incluídos no snapshot não são duplicados
+    def test_compactacao(self):
+        diario = DiarioPacientes(self.arquivo, intervalo_compactacao=2)
+        repositorio = diario.abrir()
+        for cpf in ("12345678909", "49846716885"):
+            paciente = {"name": "Paciente", "cpf": cpf}
+            repositorio.adicionar(paciente)
+            diario.registrar("checkin", paciente=paciente)
+        self.assertEqual(os.path.getsize(diario.arquivo_diario), 0)
+        with open(self.arquivo) as f:
+            self.assertEqual(json.load(f)["ultimo_evento"], 2)
+
+        # Simula uma queda entre a gravação do snapshot e a limpeza do diário
+        with open(diario.arquivo_diario, "w") as f:
+            f.write(json.dumps({"seq": 2, "op": "checkin", "paciente": {"cpf": "49846716885"}}) + "\n")
+        self.assertEqual(len(DiarioPacientes(self.arquivo).abrir()), 2)
+
+    # Testa que o snapshot guarda só os ativos e que as altas vão para o histórico arquivado
+    def test_arquivamento_do_historico(self):
+        diario = DiarioPacientes(self.arquivo)
+        repositorio = diario.abrir()
+        for cpf in ("12345678909", "49846716885"):
+            paciente = {"name": "Paciente", "cpf": cpf}
+            repositorio.adicionar(paciente)
+            diario.registrar("checkin", paciente=paciente)
+        repositorio.dar_alta("12345678909")
+        diario.registrar("alta", cpf="12345678909")
+        diario.compactar()
+        with open(self.arquivo) as f:
+            self.assertEqual(json.load(f)["historico"], [])
+        self.assertEqual(len(diario.historico_arquivado), 1)
+        self.assertEqual(repositorio.buscar_no_historico("12345678909")["cpf"], "12345678909")
+
+        # Simula uma queda entre o arquivamento e a troca do snapshot
+        repositorio.dar_alta("49846716885")
+        diario.registrar("alta", cpf="49846716885")
+        substituir = os.replace
+
+        def queda_na_troca(origem, destino):
+            if destino == self.arquivo:
+                raise OSError("queda")
+            substituir(origem, destino)
+        with mock.patch("os.replace", side_effect=queda_na_troca):
+            with self.assertRaises(OSError):
+                diario.compactar()
+        recuperado = DiarioPacientes(self.arquivo).abrir()
+        self.assertEqual(len(recuperado), 0)
+        self.assertEqual([r["cpf"] for r in recuperado.historico], ["12345678909", "49846716885"])
+
+    # Testa que o histórico de um snapshot antigo é arquivado na abertura
+    def test_snapshot_antigo(self):
+        with open(self.arquivo, "w") as f:
+            json.dump({"pacientes": [], "historico": [{"name": "Ana", "cpf": "12345678909"}]}, f)
+        diario = DiarioPacientes(self.arquivo)
+        repositorio = diario.abrir()
+        self.assertEqual(len(diario.historico_arquivado), 1)
+        diario.compactar()
+        recuperado = DiarioPacientes(self.arquivo).abrir()
+        self.assertEqual(recuperado.historico, [{"name": "Ana", "cpf": "12345678909"}])
+
+    # Testa a gravação em segundo plano, com rajadas de eventos e compactações seguidas
+    def test_assincrono(self):
+        diario = DiarioPacientes(self.arquivo, assincrono=True)
+        repositorio = diario.abrir()
+        for i in range(1, 51):
+            paciente = {"name": "Paciente", "cpf": f"{i:011d}"}
+            repositorio.adicionar(paciente)
+            diario.registrar("checkin", paciente=paciente)
+            if i % 10 == 0:
+                repositorio.dar_alta(paciente["cpf"])
+                diario.registrar("alta", cpf=paciente["cpf"])
+                diario.compactar()
+        # A compactação captura o estado na thread de gravação, com a trava: dentro de uma
+        # transação, o evento e a alteração do repositório entram juntos na captura
+        with diario.transacao():
+            diario.registrar("diagnostico", cpf="00000000001", diagnostico={"diagnostico": "virose"})
+            repositorio.adicionar_diagnostico("00000000001", {"diagnostico": "virose"})
+        diario.esperar()
+        self.assertEqual(diario.estado, "Salvo")
+        self.assertEqual(repositorio.buscar_no_historico("00000000020")["cpf"], "00000000020")
+        diario.fechar()
+
+        recuperado = DiarioPacientes(self.arquivo).abrir()
+        self.assertEqual(len(recuperado), 45)
+        self.assertEqual(len(recuperado.historico), 5)
+        self.assertEqual(recuperado.buscar("00000000001")["diagnosticos"], [{"diagnostico": "virose"}])
+
+    # Testa que a gravação do snapshot não impede o registro de eventos por outra thread
+    def test_compactacao_sem_trava(self):
+        diario = DiarioPacientes(self.arquivo, assincrono=True)
+        repositorio = diario.abrir()
+        gravando, liberar = threading.Event(), threading.Event()
+        gravar_temporario = diario._gravar_temporario
+
+        def gravar_devagar(*args):
+            gravando.set()
+            liberar.wait(5)
+            return gravar_temporario(*args)
+
+        def registrar():
+            with diario.transacao():
+                diario.registrar("checkin", paciente={"name": "Bia", "cpf": "49846716885"})
+                repositorio.adicionar({"name": "Bia", "cpf": "49846716885"})
+
+        with diario.transacao():
+            diario.registrar("checkin", paciente={"name": "Ana", "cpf": "12345678909"})
+            repositorio.adicionar({"name": "Ana", "cpf": "12345678909"})
+        with mock.patch.object(diario, "_gravar_temporario", side_effect=gravar_devagar):
+            diario.compactar()
+            self.assertTrue(gravando.wait(5))
+            outra = threading.Thread(target=registrar)
+            outra.start()
+            outra.join(5)
+            self.assertFalse(outra.is_alive())
+            liberar.set()
+            diario.esperar()
+        diario.fechar()
+
+        # O evento registrado durante a gravação continua no diário
+        with open(self.arquivo) as f:
+            self.assertEqual(json.load(f)["ultimo_evento"], 1)
+        with open(diario.arquivo_diario) as f:
+            self.assertEqual([json.loads(linha)["seq"] for linha in f], [2])
+        self.assertEqual(len(DiarioPacientes(self.arquivo).abrir()), 2)
+
+    # Testa que, se outra estação compacta durante a gravação, só as altas incluídas saem da memória
+    def test_compactacao_concorrente(self):
+        estacao = DiarioPacientes(self.arquivo)
+        repositorio = estacao.abrir()
+        for cpf in ("12345678909", "49846716885"):
+            with estacao.transacao():
+                estacao.registrar("checkin", paciente={"name": "Paciente", "cpf": cpf})
+                repositorio.adicionar({"name": "Paciente", "cpf": cpf})
+        with estacao.transacao():
+            estacao.registrar("alta", cpf="12345678909")
+            repositorio.dar_alta("12345678909")
+        outra = DiarioPacientes(self.arquivo)
+        outra.abrir()
+        gravar_temporario = estacao._gravar_temporario
+
+        def gravar_com_concorrencia(*args):
+            # Depois da captura, a outra estação compacta e esta dá mais uma alta
+            with outra.transacao():
+                outra.compactar()
+            with estacao.transacao():
+                estacao.registrar("alta", cpf="49846716885")
+                repositorio.dar_alta("49846716885")
+            return gravar_temporario(*args)
+
+        with mock.patch.object(estacao, "_gravar_temporario", side_effect=gravar_com_concorrencia):
+            estacao.compactar()
+
+        # A alta dada depois da captura não está no snapshot e continua em memória
+        self.assertEqual([p["cpf"] for p in repositorio.historico], ["12345678909", "49846716885"])
+        recuperado = DiarioPacientes(self.arquivo).abrir()
+        self.assertEqual(len(recuperado), 0)
+        self.assertEqual([p["cpf"] for p in recuperado.historico], ["12345678909", "49846716885"])
+
+# Executa os testes quando o arquivo é executado diretamente
+if __name__ == "__main__":
+    unittest.main()
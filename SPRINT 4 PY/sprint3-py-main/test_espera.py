@@ -0,0 +1,65 @@
+import random
+import unittest
+from espera import PAUSA_MAXIMA, EstimadorEspera, MediaMovel, QuantilP2, formatar_espera
+
+# Define uma classe de teste para a previsão do tempo de espera
+class TestEspera(unittest.TestCase):
+    # Testa que a média móvel parte da primeira observação e se aproxima das recentes
+    def test_media_movel(self):
+        media = MediaMovel(alfa=0.5)
+        self.assertIsNone(media.valor)
+        media.atualizar(10)
+        self.assertEqual(media.valor, 10)
+        media.atualizar(20)
+        self.assertEqual(media.valor, 15)
+
+    # Testa que o quantil estimado fica próximo do quantil exato das observações
+    def test_quantil(self):
+        gerador = random.Random(42)
+        quantil = QuantilP2(0.9)
+        self.assertIsNone(quantil.valor)
+        for valor in (3, 1, 2):
+            quantil.atualizar(valor)
+        self.assertEqual(quantil.valor, 3)
+
+        valores = [gerador.expovariate(1 / 600) for _ in range(20000)]
+        quantil = QuantilP2(0.9)
+        for valor in valores:
+            quantil.atualizar(valor)
+        exato = sorted(valores)[int(0.9 * len(valores))]
+        self.assertEqual(len(quantil), len(valores))
+        self.assertAlmostEqual(quantil.valor, exato, delta=0.03 * exato)
+
+    # Testa a previsão pela posição na fila e pelo intervalo médio entre chamadas
+    def test_previsao(self):
+        estimador = EstimadorEspera(alfa=0.5)
+        estimador.registrar_atendimento("Grave", 0, 300)
+        estimador.registrar_atendimento("Leve", 0, 600)
+        estimador.registrar_atendimento("Leve", 300, 1200)
+        self.assertEqual(estimador.intervalo, 450)
+        # Uma pausa longa no atendimento não altera o ritmo
+        estimador.registrar_atendimento("Leve", 1200 + PAUSA_MAXIMA, 1300 + 2 * PAUSA_MAXIMA)
+        self.assertEqual(estimador.intervalo, 450)
+
+        itens = [({}, "Grave"), ({}, "Leve"), ({}, "Leve")]
+        previsao = estimador.prever(itens)
+        self.assertEqual(previsao["Grave"]["previsao"], 450)
+        self.assertEqual(previsao["Leve"]["previsao"], 3 * 450)
+        self.assertEqual(previsao["Leve"]["pacientes"], 2)
+        self.assertEqual(previsao["Leve"]["atendidos"], 3)
+        self.assertEqual(previsao["Leve"]["espera_media"], 0.5 * 3700 + 0.25 * 900 + 0.25 * 600)
+
+        # Sem pacientes da gravidade na fila, vale a espera média observada
+        self.assertEqual(estimador.prever([])["Grave"]["previsao"], 300)
+        self.assertEqual(EstimadorEspera().prever([({}, "Leve")])["Leve"]["previsao"], None)
+
+    # Testa o texto exibido para cada espera
+    def test_formatar_espera(self):
+        self.assertEqual(formatar_espera(None), "sem dados")
+        self.assertEqual(formatar_espera(30), "menos de 1 min")
+        self.assertEqual(formatar_espera(12 * 60 + 5), "12 min")
+        self.assertEqual(formatar_espera(65 * 60), "1 h 05 min")
+
+# Executa os testes quando o arquivo é executado diretamente
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import date
+from unittest import mock
+from fila import FilaTriagem
+from logica import nascimento_limite
+from regras import ARQUIVO_REGRAS, MotorRegras
+
+CPFS = {"leve1": "11111111111", "perna": "22222222222", "grave1": "33333333333", "cabeca": "44444444444", "grave2": "55555555555"}
+
+def paciente(nome, **sintomas):
+    return {"name": nome, "cpf": CPFS[nome], "sintomas": sintomas}
+
+# Define uma classe de teste para a fila de triagem
+class TestFila(unittest.TestCase):
+    def setUp(self):
+        self.fila = FilaTriagem([
+            paciente("leve1", febre="Nenhuma", tempo_sintomas=1),
+            paciente("perna", lesao_fisica={"descricao": "queda", "local": "perna"}, tempo_sintomas=0),
+            paciente("grave1", febre="Alta", tempo_sintomas=1),
+            paciente("cabeca", lesao_fisica={"descricao": "batida", "local": "cabeça"}, tempo_sintomas=0),
+            paciente("grave2", falta_ar="Sim", tempo_sintomas=1),
+        ])
+
+    # Testa que a ordem segue as regras da triagem, com desempate por chegada
+    def test_ordem(self):
+        ordem = [p["name"] for p, _ in self.fila.itens()]
+        self.assertEqual(ordem, ["grave1", "grave2", "cabeca", "perna", "leve1"])
+        self.assertEqual(self.fila.gravidade(CPFS["grave2"]), "Grave")
+
+    # Testa que, com a mesma gravidade, idosos e depois crianças passam à frente dos adultos
+    def test_prioridade_por_idade(self):
+        hoje = date.today()
+        adulto = {"name": "adulto", "cpf": "66666666666", "sintomas": {}, "nascimento": nascimento_limite(30, hoje)}
+        idoso = {"name": "idoso", "cpf": "77777777777", "sintomas": {}, "nascimento": nascimento_limite(70, hoje)}
+        crianca = {"name": "crianca", "cpf": "88888888888", "sintomas": {}, "nascimento": nascimento_limite(5, hoje)}
+        fila = FilaTriagem([adulto, crianca, idoso, paciente("leve1", febre="Nenhuma")])
+        self.assertEqual([p["name"] for p, _ in fila.itens()], ["idoso", "crianca", "adulto", "leve1"])
+
+    # Testa a chamada do próximo paciente e a remoção na alta
+    def test_chamar_e_remover(self):
+        versao = self.fila.versao
+        self.assertEqual(self.fila.chamar_proximo()["name"], "grave1")
+        self.fila.remover(CPFS["grave2"])
+        self.fila.remover(CPFS["grave2"])
+        self.assertEqual(self.fila.versao, versao + 2)
+        self.assertEqual(self.fila.proximo()["name"], "cabeca")
+        self.assertEqual(len(self.fila), 3)
+        for _ in range(3):
+            self.fila.chamar_proximo()
+        self.assertIsNone(self.fila.chamar_proximo())
+
+    # Testa a reclassificação mantendo a ordem de chegada
+    def test_reclassificar(self):
+        atualizado = paciente("leve1", febre="Alta", tempo_sintomas=1)
+        self.fila.reclassificar(atualizado)
+        ordem = [p["name"] for p, _ in self.fila.itens()]
+        self.assertEqual(ordem, ["leve1", "grave1", "grave2", "cabeca", "perna"])
+        self.assertEqual(self.fila.chamar_proximo()["name"], "leve1")
+
+    # Testa a contagem por gravidade mantida a cada alteração da fila
+    def test_contagem(self):
+        self.assertEqual(self.fila.contagem(), {"Leve": 3, "Grave": 2})
+        self.fila.chamar_proximo()
+        self.fila.remover(CPFS["perna"])
+        self.fila.reclassificar(paciente("leve1", febre="Alta", tempo_sintomas=1))
+        self.assertEqual(self.fila.contagem(), {"Leve": 1, "Grave": 2})
+        self.fila.reordenar()
+        self.assertEqual(self.fila.contagem(), {"Leve": 1, "Grave": 2})
+
+    # Testa que a gravidade guardada no paciente só é recalculada quando as regras mudam
+    def test_gravidade_guardada(self):
+        with tempfile.TemporaryDirectory() as pasta:
+            arquivo = os.path.join(pasta, "regras.json")
+            shutil.copy(ARQUIVO_REGRAS, arquivo)
+            motor = MotorRegras(arquivo)
+            grave = paciente("grave1", febre="Alta", tempo_sintomas=1)
+            fila = FilaTriagem([grave], motor)
+            self.assertEqual(grave["triagem"], {"gravidade": "Grave", "prioridade": [False, True, True, True, True], "regras": motor.assinatura})
+
+            # Um paciente com a gravidade guardada não é classificado de novo
+            with mock.patch.object(motor, "chave_prioridade") as calcular:
+                FilaTriagem([grave], motor)
+                calcular.assert_not_called()
+
+            # Com outras regras, a gravidade guardada é descartada
+            with open(arquivo, "w", encoding="utf-8") as f:
+                f.write('{"gravidade_padrao": "Leve", "faixas_febre": [{"nivel": "Baixa"}]}')
+            motor.recarregar()
+            fila.reordenar()
+            self.assertEqual(fila.gravidade(CPFS["grave1"]), "Leve")
+            self.assertEqual(grave["triagem"]["regras"], motor.assinatura)
+
+# Executa os testes quando o arquivo é executado diretamente
+if __name__ == "__main__":
+    unittest.main()
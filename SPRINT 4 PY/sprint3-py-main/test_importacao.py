@@ -0,0 +1,143 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+from contexto import ContextoAplicacao
+from importacao import exportar, importar
+
+# Define uma classe de teste para a importação e a exportação em lote
+class TestImportacao(unittest.TestCase):
+    def setUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        self.arquivo = os.path.join(self.pasta.name, "dados_pacientes.json")
+        self.rejeitados = os.path.join(self.pasta.name, "rejeitados.csv")
+
+    def tearDown(self):
+        self.pasta.cleanup()
+
+    def caminho(self, nome, conteudo):
+        caminho = os.path.join(self.pasta.name, nome)
+        with open(caminho, "w", encoding="utf-8") as f:
+            f.write(conteudo)
+        return caminho
+
+    # Testa a importação de um CSV com ponto e vírgula e sintomas em colunas
+    def test_importar_csv(self):
+        entrada = self.caminho("clinica.csv", (
+            "name;cpf;birth_date;alergias;febre;falta_ar;tempo_sintomas\n"
+            "Ana;123.456.789-09;01/01/1990;;Alta;Não;2\n"
+            "Bruno;49846716885;31/02/1990;;Nenhuma;Não;1\n"
+            "Carla;12345678909;05/05/1985;camarão;Nenhuma;Não;1\n"
+        ))
+        contexto = ContextoAplicacao(self.arquivo)
+        resultado = importar(entrada, contexto, self.rejeitados, processos=1)
+        self.assertEqual((resultado["importados"], resultado["rejeitados"]), (1, 2))
+        paciente = contexto.repositorio.buscar("12345678909")
+        self.assertEqual(paciente["sintomas"], {"febre": "Alta", "falta_ar": "Não", "tempo_sintomas": 2})
+        self.assertEqual(paciente["triagem"]["gravidade"], "Grave")
+        with open(self.rejeitados, encoding="utf-8") as f:
+            self.assertEqual([linha["motivo"] for linha in csv.DictReader(f)], [
+                "Data de nascimento inválida. Use o formato DD/MM/AAAA.", "CPF repetido no arquivo."
+            ])
+        contexto.fechar()
+
+    # Testa a importação em processos, a gravação em uma única operação e a exportação
+    def test_importar_e_exportar(self):
+        linhas = [
+            {"name": "Ana", "cpf": "12345678909", "birth_date": "01/01/1990", "sintomas": {"dor": "intensa"}},
+            {"name": "Bruno", "cpf": "49846716885", "birth_date": "02/02/1980"},
+            {"name": "Samuel", "cpf": "00000000000", "birth_date": "03/03/2003"},
+        ]
+        entrada = self.caminho("clinica.jsonl", "\n".join(json.dumps(linha) for linha in linhas) + "\nnão é JSON\n")
+        contexto = ContextoAplicacao(self.arquivo)
+        contexto.registrar_checkin({"name": "Bruno", "cpf": "498.467.168-85", "birth_date": "02/02/1980", "sintomas": {}})
+        resultado = importar(entrada, contexto, self.rejeitados, processos=2, tamanho_lote=1)
+        self.assertEqual((resultado["lidos"], resultado["importados"], resultado["rejeitados"]), (4, 1, 3))
+        self.assertEqual(contexto.fila.contagem(), {"Leve": 1, "Moderado": 1})
+        contexto.fechar()
+
+        # Cada lote com pacientes aceitos vira um evento do diário; os lotes só com rejeitados não gravam nada
+        with open(os.path.join(self.pasta.name, "dados_pacientes.jsonl"), encoding="utf-8") as f:
+            self.assertEqual([json.loads(linha)["op"] for linha in f], ["checkin", "importacao"])
+
+        recuperado = ContextoAplicacao(self.arquivo)
+        saida = os.path.join(self.pasta.name, "exportados.csv")
+        self.assertEqual(exportar(recuperado.repositorio, saida), 2)
+        outro = ContextoAplicacao(os.path.join(self.pasta.name, "outro.db"))
+        self.assertEqual(importar(saida, outro, processos=1)["importados"], 2)
+        self.assertEqual(outro.repositorio.buscar("12345678909")["sintomas"], {"dor": "intensa"})
+        outro.fechar()
+        recuperado.fechar()
+
+    # Testa que linhas com sintomas de tipo errado vão para o relatório de rejeitados sem interromper a importação
+    def test_sintomas_com_tipo_errado(self):
+        entrada = self.caminho("clinica.csv", (
+            "name;cpf;birth_date;febre;tempo_sintomas\n"
+            "Ana;12345678909;01/01/1990;Nenhuma;3.5\n"
+            "Bruno;49846716885;02/02/1980;Nenhuma;três\n"
+        ))
+        contexto = ContextoAplicacao(self.arquivo)
+        self.assertEqual(importar(entrada, contexto, self.rejeitados, processos=1)["importados"], 1)
+        self.assertEqual(contexto.repositorio.buscar("12345678909")["sintomas"], {"febre": "Nenhuma", "tempo_sintomas": 3.5})
+        contexto.fechar()
+
+        linhas = [
+            {"name": "Carla", "cpf": "11144477735", "birth_date": "05/05/1985", "sintomas": {"tempo_sintomas": "3"}},
+            {"name": "Davi", "cpf": "52998224725", "birth_date": "06/06/1966", "sintomas": {"febre": ["Alta"]}},
+            {"name": "Eva", "cpf": "39053344705", "birth_date": "07/07/1977", "sintomas": {"febre": "Alta"}},
+        ]
+        entrada = self.caminho("clinica.jsonl", "\n".join(json.dumps(linha) for linha in linhas))
+        # Regras que comparam a febre com um número não aceitam a febre em texto
+        regras = self.caminho("regras.json", json.dumps({
+            "gravidade_padrao": "Leve",
+            "regras_gravidade": [{"nome": "febre_alta", "gravidade": "Grave", "condicoes": [{"campo": "febre", "maior_que": 38}]}],
+        }))
+        contexto = ContextoAplicacao(os.path.join(self.pasta.name, "outro.json"), arquivo_regras=regras)
+        resultado = importar(entrada, contexto, self.rejeitados, processos=1)
+        self.assertEqual((resultado["importados"], resultado["rejeitados"]), (0, 3))
+        with open(self.rejeitados, encoding="utf-8") as f:
+            self.assertEqual([linha["cpf"] for linha in csv.DictReader(f)], ["11144477735", "52998224725", "39053344705"])
+        self.assertEqual(len(contexto.repositorio), 0)
+        contexto.fechar()
+
+    # Testa que um CPF cadastrado por outra estação durante a importação vai para o relatório de rejeitados
+    def test_cpf_cadastrado_por_outra_estacao(self):
+        linhas = [
+            {"name": "Ana", "cpf": "12345678909", "birth_date": "01/01/1990"},
+            {"name": "Bruno", "cpf": "49846716885", "birth_date": "02/02/1980"},
+        ]
+        entrada = self.caminho("clinica.jsonl", "\n".join(json.dumps(linha) for linha in linhas))
+        contexto = ContextoAplicacao(self.arquivo)
+        self.assertEqual(len(contexto.repositorio), 0)
+        outra = ContextoAplicacao(self.arquivo)
+        outra.registrar_checkin({"name": "Bruno", "cpf": "49846716885", "sintomas": {}})
+        outra.fechar()
+
+        resultado = importar(entrada, contexto, self.rejeitados, processos=1, tamanho_lote=1)
+        self.assertEqual((resultado["importados"], resultado["rejeitados"]), (1, 1))
+        with open(self.rejeitados, encoding="utf-8") as f:
+            self.assertEqual(list(csv.DictReader(f)), [
+                {"linha": "2", "cpf": "49846716885", "motivo": "Este CPF já está cadastrado."}
+            ])
+        self.assertEqual(len(contexto.repositorio), 2)
+        contexto.fechar()
+        with open(os.path.join(self.pasta.name, "dados_pacientes.jsonl"), encoding="utf-8") as f:
+            self.assertEqual([json.loads(linha)["op"] for linha in f], ["checkin", "importacao"])
+
+    # Testa que um CPF já cadastrado impede a importação inteira
+    def test_importacao_atomica(self):
+        contexto = ContextoAplicacao(os.path.join(self.pasta.name, "dados.db"))
+        contexto.registrar_checkin({"name": "Ana", "cpf": "12345678909", "sintomas": {}})
+        pacientes = [{"name": "Bruno", "cpf": "49846716885", "sintomas": {}}, {"name": "Ana", "cpf": "12345678909"}]
+        with self.assertRaises(ValueError):
+            contexto.importar_pacientes(pacientes)
+        with self.assertRaises(ValueError):
+            contexto.armazenamento.registrar("importacao", pacientes=pacientes)
+        self.assertEqual(len(contexto.repositorio), 1)
+        self.assertEqual(len(contexto.armazenamento.abrir()), 1)
+        contexto.fechar()
+
+# Executa os testes quando o arquivo é executado diretamente
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import json
+import os
+import tempfile
+import unittest
+from leitura_incremental import HistoricoPreguicoso, carregar_dados_incremental
+from logica import salvar_dados
+from repositorio import RepositorioPacientes
+
+# Define uma classe de teste para a leitura incremental do arquivo de dados
+class TestLeituraIncremental(unittest.TestCase):
+    def setUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        self.arquivo = os.path.join(self.pasta.name, "dados_pacientes.json")
+        self.historico = [
+            {"name": f"João {i}", "cpf": f"{i:011d}", "alergias": "camarão", "diagnosticos": [{"diagnostico": "gripe"}]}
+            for i in range(50)
+        ]
+        self.historico.append({"name": "João 7", "cpf": "000.000.000-07", "diagnosticos": []})
+        salvar_dados(self.arquivo, {
+            "pacientes": [{"name": "Ana", "cpf": "12345678909"}],
+            "historico": self.historico,
+        })
+
+    def tearDown(self):
+        self.pasta.cleanup()
+
+    # Testa a abertura com blocos pequenos, que cortam valores e caracteres acentuados
+    def test_blocos_pequenos(self):
+        dados = carregar_dados_incremental(self.arquivo, tamanho_bloco=7)
+        self.assertEqual(dados["pacientes"][0]["name"], "Ana")
+        self.assertEqual(dados["pacientes"][0]["diagnosticos"], [])
+        self.assertIsInstance(dados["historico"], HistoricoPreguicoso)
+        self.assertEqual(list(dados["historico"]), self.historico)
+        self.assertEqual(len(dados["historico"]), 51)
+        self.assertEqual(dados["historico"].registros_do_cpf("00000000007"), [self.historico[7], self.historico[-1]])
+
+    # Testa o repositório com o histórico lido sob demanda
+    def test_repositorio(self):
+        repositorio = RepositorioPacientes.de_dados(carregar_dados_incremental(self.arquivo))
+        repositorio.dar_alta("12345678909")
+        self.assertEqual(repositorio.buscar_no_historico("00000000003")["name"], "João 3")
+        self.assertEqual(repositorio.buscar_em_todos("123.456.789-09")["name"], "Ana")
+        self.assertEqual(len(repositorio.historico), 52)
+
+    # Testa arquivos com o histórico antes dos pacientes e arquivos corrompidos
+    def test_outros_formatos(self):
+        with open(self.arquivo, "w") as f:
+            json.dump({"historico": self.historico[:2], "pacientes": [{"name": "Ana", "cpf": "1"}]}, f)
+        dados = carregar_dados_incremental(self.arquivo)
+        self.assertEqual(len(dados["pacientes"]), 1)
+        self.assertEqual(list(dados["historico"]), self.historico[:2])
+
+        with open(self.arquivo, "w") as f:
+            f.write('{"pacientes": [{"name": ')
+        self.assertEqual(carregar_dados_incremental(self.arquivo), {"pacientes": [], "historico": []})
+
+# Executa os testes quando o arquivo é executado diretamente
+if __name__ == "__main__":
+    unittest.main()
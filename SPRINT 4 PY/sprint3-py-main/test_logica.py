@@ -1,5 +1,9 @@
 import unittest
-from logica import validar_cpf, classificar_gravidade
+from datetime import date
+from logica import (
+    calcular_idade, classificar_gravidade, converter_data_nascimento, nascimento_limite, validar_cpf,
+    validar_data_formatada,
+)
 
 # Define uma classe de teste que herda de unittest.TestCase
 class TestLogica(unittest.TestCase):
@@ -14,6 +18,33 @@ class TestLogica(unittest.TestCase):
         # Verifica se a função retorna False para um CPF com caracteres inválidos
         self.assertFalse(validar_cpf("abcdefghijk"))  # CPF com letras
 
+    # Testa que validações repetidas do mesmo CPF usam o cache
+    def test_validar_cpf_cache(self):
+        validar_cpf("529.982.247-25")
+        acertos = validar_cpf.cache_info().hits
+        self.assertTrue(validar_cpf("529.982.247-25"))
+        self.assertEqual(validar_cpf.cache_info().hits, acertos + 1)
+
+    # Testa a conversão de datas DD/MM/AAAA, com os mesmos casos aceitos por strptime
+    def test_converter_data_nascimento(self):
+        self.assertEqual(converter_data_nascimento("15/08/1985"), date(1985, 8, 15).toordinal())
+        self.assertEqual(converter_data_nascimento("1/2/2000"), date(2000, 2, 1).toordinal())
+        for data in ("29/02/1900", "31/04/2020", "2000-01-01", "01/01/85", "01/01/0000", "１5/08/1985", None):
+            self.assertFalse(validar_data_formatada(data), data)
+        with self.assertRaises(ValueError):
+            converter_data_nascimento("32/01/2000")
+
+    # Testa o cálculo da idade, inclusive para quem nasceu em 29/02
+    def test_calcular_idade(self):
+        nascimento = converter_data_nascimento("29/02/2000")
+        self.assertEqual(calcular_idade(nascimento, date(2001, 2, 28)), 0)
+        self.assertEqual(calcular_idade(nascimento, date(2001, 3, 1)), 1)
+        # Quem nasceu até a data limite tem pelo menos a idade pedida
+        for hoje in (date(2001, 2, 28), date(2004, 2, 29), date(2024, 3, 1)):
+            limite = nascimento_limite(18, hoje)
+            self.assertEqual(calcular_idade(limite, hoje), 18)
+            self.assertEqual(calcular_idade(limite + 1, hoje), 17)
+
     # Testa a função classificar_gravidade
     def test_classificar_gravidade(self):
         # Verifica se a função classifica corretamente como "Grave"
@@ -0,0 +1,68 @@
+import json
+import os
+import tempfile
+import unittest
+from fila import FilaTriagem
+from contexto import registrar_medidores_fila
+from metricas import METRICAS, Metricas, cronometrado
+from regras import motor_padrao
+from repositorio import RepositorioPacientes
+
+# Define uma classe de teste para as métricas do sistema
+class TestMetricas(unittest.TestCase):
+    def setUp(self):
+        self.metricas = Metricas()
+
+    # Testa contadores, tempos e a exportação em texto do Prometheus
+    def test_prometheus(self):
+        self.metricas.incrementar("triagem_checkins", gravidade="Grave")
+        self.metricas.incrementar("triagem_checkins", 2, gravidade="Grave")
+        with self.assertRaises(ValueError):
+            with self.metricas.cronometrar("operacao"):
+                raise ValueError("falha")
+        self.metricas.registrar_medidor("fila", lambda: [({"gravidade": 'a"b'}, 3)], "Pacientes na fila.")
+        texto = self.metricas.para_prometheus()
+        self.assertIn('triagem_checkins_total{gravidade="Grave"} 3', texto)
+        self.assertIn("operacao_segundos_count 1", texto)
+        self.assertIn('fila{gravidade="a\\"b"} 3', texto)
+
+    # Testa a gravação em arquivo nos dois formatos
+    def test_gravar(self):
+        self.metricas.registrar_tempo("carregar", 0.5)
+        with tempfile.TemporaryDirectory() as pasta:
+            arquivo = os.path.join(pasta, "metricas.json")
+            self.metricas.gravar(arquivo)
+            with open(arquivo) as f:
+                self.assertEqual(json.load(f)["tempos"]["carregar"]["maximo"], 0.5)
+            arquivo = os.path.join(pasta, "metricas.prom")
+            self.metricas.gravar(arquivo)
+            with open(arquivo) as f:
+                self.assertIn("carregar_segundos_sum 0.500000000", f.read())
+
+    # Testa as funções cronometradas e os medidores da fila por gravidade
+    def test_funcoes_e_fila(self):
+        def chamadas(nome):
+            return METRICAS.para_dict()["tempos"].get(nome, {"chamadas": 0})["chamadas"]
+
+        antes = {nome: chamadas(nome) for nome in ("regras_classificar", "repositorio_buscar")}
+        motor_padrao().classificar({"febre": "Alta"}, 0)
+        RepositorioPacientes().buscar("12345678909")
+        self.assertEqual({nome: chamadas(nome) for nome in antes}, {nome: total + 1 for nome, total in antes.items()})
+        self.assertEqual(cronometrado("teste")(lambda x: x * 2)(21), 42)
+
+        fila = FilaTriagem([
+            {"cpf": "11111111111", "sintomas": {"febre": "Alta"}},
+            {"cpf": "22222222222", "sintomas": {"febre": "Nenhuma"}},
+            {"cpf": "33333333333", "sintomas": {"falta_ar": "Sim"}},
+        ])
+        registrar_medidores_fila(fila, self.metricas)
+        medidores = self.metricas.para_dict()["medidores"]
+        self.assertEqual(medidores["triagem_fila_pacientes"], [
+            {"rotulos": {"gravidade": "Grave"}, "valor": 2},
+            {"rotulos": {"gravidade": "Leve"}, "valor": 1},
+        ])
+        self.assertGreaterEqual(medidores["triagem_fila_espera_maxima_segundos"][0]["valor"], 0)
+
+# Executa os testes quando o arquivo é executado diretamente
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import json
+import unittest
+from registros import AUSENTE, Paciente, benchmark_memoria
+from repositorio import RepositorioPacientes
+
+# Define uma classe de teste para os registros compactos de pacientes
+class TestRegistros(unittest.TestCase):
+    # Testa que a conversão de ida e volta não perde nem inventa dados
+    def test_conversao_sem_perdas(self):
+        pacientes = [
+            {
+                "name": "Ana", "cpf": "12345678909", "birth_date": "01/01/1990",
+                "alergias": "Nenhuma alergia registrada.",
+                "sintomas": {"febre": "Alta", "dor": "moderada", "local_dor": "cabeça", "falta_ar": "Não",
+                             "cansaço": "Sim", "tempo_sintomas": 2},
+                "tempo_sintomas": 0,
+                "diagnosticos": [{"diagnostico": "virose", "observacoes": None, "medicacoes_preferidas": None,
+                                  "alergias": "Nenhuma alergia registrada."}],
+                "em_atendimento": True,
+            },
+            {"name": "Bruno", "cpf": "49846716885", "sintomas": {"lesao_fisica": {"descricao": "queda", "local": "perna"}}},
+            {"cpf": "1", "sintomas": None, "diagnosticos": "texto", "campo_novo": [1, 2]},
+        ]
+        for paciente in pacientes:
+            registro = Paciente.de_dict(json.loads(json.dumps(paciente)))
+            self.assertEqual(registro.para_dict(), paciente)
+        self.assertIs(Paciente.de_dict(pacientes[1]).alergias, AUSENTE)
+        self.assertFalse(hasattr(registro, "__dict__"))
+
+    # Testa que os textos repetidos dos sintomas são compartilhados
+    def test_textos_internados(self):
+        a = Paciente.de_dict(json.loads('{"sintomas": {"falta_ar": "Não"}}'))
+        b = Paciente.de_dict(json.loads('{"sintomas": {"falta_ar": "Não"}}'))
+        self.assertIs(a.sintomas.falta_ar, b.sintomas.falta_ar)
+
+    # Testa que o histórico do repositório fica em registros compactos
+    def test_historico_compacto(self):
+        repositorio = RepositorioPacientes([{"name": "Ana", "cpf": "12345678909", "diagnosticos": []}])
+        repositorio.dar_alta("12345678909")
+        self.assertIsInstance(repositorio.capturar()["historico"][0], Paciente)
+        self.assertEqual(repositorio.historico, [{"name": "Ana", "cpf": "12345678909", "diagnosticos": []}])
+
+    # Testa que os registros usam menos memória que os dicionários
+    def test_benchmark(self):
+        resultado = benchmark_memoria(20000)
+        self.assertLess(resultado["bytes_registro"], resultado["bytes_dict"])
+
+# Executa os testes quando o arquivo é executado diretamente
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import itertools
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from contexto import ContextoAplicacao
+from fila import FilaTriagem
+from regras import ARQUIVO_REGRAS, MotorRegras
+
+# Define uma classe de teste para o motor de regras de triagem
+class TestRegras(unittest.TestCase):
+    def setUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        self.arquivo = os.path.join(self.pasta.name, "regras_triagem.json")
+        shutil.copy(ARQUIVO_REGRAS, self.arquivo)
+        self.motor = MotorRegras(self.arquivo)
+
+    def tearDown(self):
+        self.pasta.cleanup()
+
+    def alterar_regras(self, alteracao):
+        with open(self.arquivo, encoding="utf-8") as f:
+            definicao = json.load(f)
+        alteracao(definicao)
+        with open(self.arquivo, "w", encoding="utf-8") as f:
+            json.dump(definicao, f)
+        # Garante que a data de modificação mude mesmo em sistemas de arquivos com pouca resolução
+        estado = os.stat(self.arquivo)
+        os.utime(self.arquivo, ns=(estado.st_atime_ns, estado.st_mtime_ns + 10**9))
+
+    # Testa que as regras padrão reproduzem o protocolo original de triagem
+    def test_regras_padrao(self):
+        def protocolo(sintomas, tempo_sintomas):
+            if sintomas.get("febre") in ["Alta", "Moderada"] or sintomas.get("falta_ar") == "Sim":
+                return "Grave"
+            elif sintomas.get("dor") in ["moderada", "intensa"] or tempo_sintomas > 3:
+                return "Moderado"
+            return "Leve"
+
+        casos = []
+        for febre, dor, falta_ar, tempo in itertools.product(
+                ["Nenhuma", "Baixa", "Moderada", "Alta", None], ["Nenhuma", "leve", "moderada", "intensa"],
+                ["Sim", "Não"], [0, 3, 4]):
+            sintomas = {"dor": dor, "falta_ar": falta_ar, "tempo_sintomas": tempo}
+            if febre:
+                sintomas["febre"] = febre
+            casos.append(sintomas)
+        esperado = [protocolo(s, s["tempo_sintomas"]) for s in casos]
+        self.assertEqual([self.motor.classificar(s) for s in casos], esperado)
+        self.assertEqual(self.motor.classificar_lote(casos), esperado)
+        self.assertEqual(sum(self.motor.contadores().values()), 2 * len(casos))
+        # A chave de prioridade em lote é a mesma calculada paciente a paciente, com ou sem idade
+        idades = [None, 5, 30, 70] * (len(casos) // 4) + [None] * (len(casos) % 4)
+        self.assertEqual(
+            self.motor.chave_prioridade_lote(casos, idades),
+            [self.motor.chave_prioridade(s, idade) for s, idade in zip(casos, idades)],
+        )
+
+    # Testa que nenhum acerto se perde com várias threads classificando ao mesmo tempo
+    def test_acertos_entre_threads(self):
+        intervalo = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            threads = [
+                threading.Thread(target=lambda: [self.motor.classificar({"falta_ar": "Sim"}) for _ in range(2000)])
+                for _ in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(intervalo)
+        self.assertEqual(self.motor.contadores(), {"falta_de_ar": 8 * 2000})
+
+    # Testa as faixas de temperatura da febre, incluindo os limites
+    def test_faixas_febre(self):
+        temperaturas = [36.0, 37.4, 37.5, 39.0, 39.1]
+        niveis = [self.motor.classificar_febre(t) for t in temperaturas]
+        self.assertEqual(niveis, ["Baixa", "Baixa", "Moderada", "Moderada", "Alta"])
+
+    # Testa a recarga do arquivo e que um arquivo inválido mantém as regras atuais
+    def test_recarga(self):
+        self.assertEqual(self.motor.classificar({"dor": "leve"}, 0), "Leve")
+        self.assertFalse(self.motor.recarregar_se_alterado())
+
+        self.alterar_regras(lambda d: d["regras_gravidade"].append(
+            {"nome": "dor_leve", "gravidade": "Moderado", "condicoes": [{"campo": "dor", "igual": "leve"}]}))
+        self.assertTrue(self.motor.recarregar_se_alterado())
+        self.assertEqual(self.motor.versao, 2)
+        self.assertEqual(self.motor.classificar({"dor": "leve"}, 0), "Moderado")
+        self.assertEqual(self.motor.contadores(), {"dor_leve": 1})
+
+        self.alterar_regras(lambda d: d["regras_gravidade"].append({"nome": "sem_condicoes", "gravidade": "Grave"}))
+        self.assertFalse(self.motor.recarregar_se_alterado())
+        self.assertEqual(self.motor.classificar({"dor": "leve"}, 0), "Moderado")
+
+    # Testa que o contexto reordena a fila quando as regras mudam
+    def test_reordenar_fila(self):
+        contexto = ContextoAplicacao(os.path.join(self.pasta.name, "dados_pacientes.json"), arquivo_regras=self.arquivo)
+        contexto.registrar_checkin({"name": "Ana", "cpf": "12345678909", "sintomas": {"febre": "Alta"}})
+        contexto.registrar_checkin({"name": "Bia", "cpf": "49846716885", "sintomas": {"cansaço": "Sim"}})
+        self.assertEqual([p["name"] for p, _ in contexto.fila.itens()], ["Ana", "Bia"])
+
+        self.alterar_regras(lambda d: d["prioridade_fila"].insert(
+            0, {"nome": "cansaco", "campo": "cansaço", "igual": "Sim"}))
+        self.assertTrue(contexto.verificar_regras())
+        self.assertEqual([p["name"] for p, _ in contexto.fila.itens()], ["Bia", "Ana"])
+        self.assertEqual(contexto.chamar_proximo()["name"], "Bia")
+
+    # Testa que, com envelhecimento, quem espera há muito tempo passa à frente de casos mais graves
+    def test_envelhecimento(self):
+        agora = time.time()
+        grave = {"name": "grave", "cpf": "12345678909", "sintomas": {"febre": "Alta"}, "chegada": agora}
+        leve_antigo = {"name": "leve_antigo", "cpf": "49846716885", "sintomas": {}, "chegada": agora - 3 * 3600}
+        leve_recente = {"name": "leve_recente", "cpf": "11144477735", "sintomas": {}, "chegada": agora - 3600}
+        fila = FilaTriagem([grave, leve_recente, leve_antigo], self.motor)
+        self.assertEqual([p["name"] for p, _ in fila.itens()], ["grave", "leve_recente", "leve_antigo"])
+
+        # A gravidade vale 16 postos, ou 160 minutos de espera com 10 minutos por posto
+        self.alterar_regras(lambda d: d.update(envelhecimento_minutos=10))
+        self.assertTrue(self.motor.recarregar_se_alterado())
+        self.assertEqual(self.motor.envelhecimento, 600)
+        fila.reordenar()
+        self.assertEqual([p["name"] for p, _ in fila.itens()], ["leve_antigo", "grave", "leve_recente"])
+        self.assertEqual(fila.chamar_proximo()["name"], "leve_antigo")
+
+        self.alterar_regras(lambda d: d.update(envelhecimento_minutos=0))
+        self.assertFalse(self.motor.recarregar_se_alterado())
+        self.assertEqual(self.motor.envelhecimento, 600)
+
+# Executa os testes quando o arquivo é executado diretamente
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+from datetime import date
+from logica import buscar_paciente_por_cpf, validar_dados_paciente
+from repositorio import RepositorioPacientes
+
+# Define uma classe de teste para o repositório de pacientes
+class TestRepositorio(unittest.TestCase):
+    def setUp(self):
+        self.repositorio = RepositorioPacientes.de_dados({
+            "pacientes": [{"name": "Ana", "cpf": "12345678909", "sintomas": {}, "diagnosticos": []}],
+            "historico": [
+                {"name": "Bruno", "cpf": "49846716885", "diagnosticos": []},
+                {"name": "Bruno", "cpf": "49846716885", "diagnosticos": [{"diagnostico": "gripe"}]},
+            ],
+        })
+
+    # Testa a busca por CPF com e sem pontuação
+    def test_buscar(self):
+        self.assertEqual(self.repositorio.buscar("123.456.789-09")["name"], "Ana")
+        self.assertIsNone(self.repositorio.buscar("49846716885"))
+        self.assertEqual(self.repositorio.buscar_em_todos("498.467.168-85")["name"], "Bruno")
+        self.assertEqual(len(self.repositorio.historico_do_paciente("49846716885")), 2)
+        # As funções de logica.py usam o índice quando recebem o repositório
+        self.assertIs(buscar_paciente_por_cpf("12345678909", self.repositorio), self.repositorio.buscar("12345678909"))
+
+    # Testa a verificação de duplicidade no cadastro
+    def test_duplicidade(self):
+        with self.assertRaises(ValueError):
+            self.repositorio.adicionar({"name": "Outra", "cpf": "123.456.789-09"})
+        with self.assertRaises(ValueError):
+            validar_dados_paciente("Outra", "12345678909", "01/01/2000", self.repositorio)
+        # Pacientes que já receberam alta podem fazer um novo check-in
+        self.repositorio.adicionar({"name": "Bruno", "cpf": "49846716885"})
+        self.assertIn("49846716885", self.repositorio)
+
+    # Testa a alta de um paciente
+    def test_dar_alta(self):
+        self.repositorio.adicionar_diagnostico("12345678909", {"diagnostico": "virose"})
+        paciente = self.repositorio.dar_alta("12345678909")
+        self.assertEqual(len(self.repositorio), 0)
+        self.assertEqual(self.repositorio.buscar_no_historico("12345678909"), paciente)
+        self.assertEqual(self.repositorio.para_dados()["historico"][-1]["diagnosticos"], [{"diagnostico": "virose"}])
+        with self.assertRaises(ValueError):
+            self.repositorio.dar_alta("12345678909")
+
+    # Testa as consultas por faixa etária sobre a lista ordenada por nascimento
+    def test_faixas_etarias(self):
+        hoje = date(2024, 6, 10)
+        for cpf, nascimento in (("52998224725", "10/06/2006"), ("11144477735", "11/06/2006"),
+                                ("49846716885", "10/06/1964"), ("98765432100", "01/01/1990")):
+            self.repositorio.adicionar({"name": cpf, "cpf": cpf, "birth_date": nascimento})
+        self.assertEqual(self.repositorio.buscar("52998224725")["nascimento"], date(2006, 6, 10).toordinal())
+        self.assertEqual(
+            self.repositorio.contagem_por_faixa_etaria(hoje), {"pediatrica": 1, "adulta": 2, "idosa": 1}
+        )
+        self.assertEqual(
+            [p["cpf"] for p in self.repositorio.pacientes_por_idade(18, None, hoje)],
+            ["52998224725", "98765432100", "49846716885"],
+        )
+        self.assertEqual(self.repositorio.contar_por_idade(18, 18, hoje), 1)
+        self.repositorio.dar_alta("49846716885")
+        self.assertEqual(self.repositorio.contar_por_idade(60, None, hoje), 0)
+        # Um paciente sem data de nascimento não entra em nenhuma faixa
+        self.assertEqual(self.repositorio.contar_por_idade(hoje=hoje), 3)
+
+# Executa os testes quando o arquivo é executado diretamente
+if __name__ == "__main__":
+    unittest.main()
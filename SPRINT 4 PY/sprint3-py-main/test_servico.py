@@ -0,0 +1,111 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from contexto import ContextoAplicacao
+from servico import ServicoTriagem, criar_servidor
+from teste_carga import cpf_valido, executar_carga
+
+# Define uma classe de teste para o serviço de triagem sem interface gráfica
+class TestServico(unittest.TestCase):
+    def setUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        self.servico = ServicoTriagem(ContextoAplicacao(os.path.join(self.pasta.name, "dados_pacientes.json")))
+        self.servidor = criar_servidor(self.servico, porta=0)
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.servidor.server_address[1]}"
+
+    def tearDown(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+        self.pasta.cleanup()
+
+    def requisitar(self, caminho, dados=None):
+        corpo = None if dados is None else json.dumps(dados).encode("utf-8")
+        try:
+            with urllib.request.urlopen(urllib.request.Request(self.url + caminho, data=corpo)) as resposta:
+                return resposta.status, json.loads(resposta.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    # Testa o fluxo completo de check-in, diagnóstico, chamada e alta
+    def test_fluxo(self):
+        paciente = {"name": "Ana", "cpf": "12345678909", "birth_date": "01/01/1990", "sintomas": {"falta_ar": "Sim"}}
+        self.assertEqual(self.requisitar("/checkin", paciente)[0], 201)
+        self.assertEqual(self.requisitar("/checkin", paciente), (400, {"erro": "Este CPF já está cadastrado."}))
+        self.assertEqual(self.requisitar("/classificar", {"sintomas": {"dor": "intensa"}}), (200, {"gravidade": "Moderado"}))
+        self.assertEqual(self.requisitar("/fila")[1]["fila"][0]["gravidade"], "Grave")
+        medidores = self.requisitar("/metricas.json")[1]["medidores"]
+        self.assertEqual(medidores["triagem_fila_pacientes"], [{"rotulos": {"gravidade": "Grave"}, "valor": 1}])
+        resposta = self.requisitar("/sintomas", {"cpf": "12345678909", "sintomas": {"dor": "intensa"}})
+        self.assertEqual(resposta, (200, {"cpf": "12345678909", "gravidade": "Moderado"}))
+        self.assertEqual(self.requisitar("/fila")[1]["fila"][0]["gravidade"], "Moderado")
+        self.assertEqual(self.requisitar("/sintomas", {"cpf": "00000000191", "sintomas": {}})[0], 404)
+        self.assertEqual(self.requisitar("/diagnosticos", {"cpf": "12345678909", "diagnostico": "asma"})[0], 201)
+        self.assertEqual(
+            self.requisitar("/busca?q=asm"), (200, {"resultados": [{"name": "Ana", "cpf": "12345678909", "ativo": True}]})
+        )
+        self.assertEqual(self.requisitar("/busca?q=123.456&limite=0"), (200, {"resultados": []}))
+        self.assertEqual(self.requisitar("/faixas_etarias")[1]["faixas"], {"pediatrica": 0, "adulta": 1, "idosa": 0})
+        self.assertEqual(self.requisitar("/faixas_etarias?faixa=adulta")[1]["pacientes"][0]["cpf"], "12345678909")
+        self.assertEqual(self.requisitar("/faixas_etarias?faixa=bebe")[0], 400)
+        self.assertEqual(self.requisitar("/espera")[1]["gravidades"]["Moderado"]["pacientes"], 1)
+        chamado = self.requisitar("/chamar", {})[1]["paciente"]
+        self.assertEqual(chamado["name"], "Ana")
+        self.assertGreaterEqual(chamado["atendimento"], chamado["chegada"])
+        self.assertEqual(self.requisitar("/espera")[1]["gravidades"]["Moderado"]["atendidos"], 1)
+        self.assertEqual(self.requisitar("/alta", {"cpf": "12345678909"})[0], 200)
+        self.assertEqual(self.requisitar("/alta", {"cpf": "12345678909"})[0], 404)
+        registro = self.requisitar("/pacientes/12345678909")[1]
+        self.assertEqual(registro["diagnosticos"][0]["diagnostico"], "asma")
+        self.assertGreaterEqual(registro["alta"], registro["atendimento"])
+
+    # Testa que sintomas com tipos inválidos são recusados sem cadastrar o paciente
+    def test_sintomas_invalidos(self):
+        paciente = {"name": "Ana", "cpf": "12345678909", "birth_date": "01/01/1990"}
+        for sintomas in (["febre"], {"tempo_sintomas": "3"}, {"febre": ["Alta"]}, {"lesao_fisica": {"local": {}}}):
+            with self.subTest(sintomas):
+                status, resposta = self.requisitar("/checkin", dict(paciente, sintomas=sintomas))
+                self.assertEqual(status, 400)
+                self.assertIn("erro", resposta)
+                self.assertEqual(len(self.servico.contexto.repositorio), 0)
+                self.assertEqual(len(self.servico.contexto.fila), 0)
+        self.assertEqual(self.requisitar("/checkin", dict(paciente, sintomas={"tempo_sintomas": 3}))[0], 201)
+        self.assertEqual(self.requisitar("/sintomas", {"cpf": "12345678909", "sintomas": {"tempo_sintomas": "5"}})[0], 400)
+        self.assertEqual(self.requisitar("/fila")[1]["fila"][0]["gravidade"], "Leve")
+
+    # Testa que campos com tipos inválidos no corpo JSON são recusados com 400
+    def test_tipos_invalidos(self):
+        for caminho, dados in (
+            ("/validar", {"name": "Ana", "cpf": ["12345678909"], "birth_date": "01/01/1990"}),
+            ("/validar", {"name": "Ana", "cpf": 12345678909, "birth_date": "01/01/1990"}),
+            ("/checkin", {"name": 5, "cpf": "12345678909", "birth_date": "01/01/1990"}),
+            ("/classificar", {"sintomas": ["febre"]}),
+            ("/classificar", {"sintomas": {}, "tempo_sintomas": "3"}),
+            ("/diagnosticos", {"cpf": {"numero": "12345678909"}, "diagnostico": "asma"}),
+            ("/alta", {"cpf": 12345678909}),
+        ):
+            with self.subTest(caminho=caminho, dados=dados):
+                self.assertEqual(self.requisitar(caminho, dados)[0], 400)
+
+    # Testa que o CPF no caminho é decodificado
+    def test_cpf_no_caminho(self):
+        paciente = {"name": "Ana", "cpf": "123.456.789-09", "birth_date": "01/01/1990", "sintomas": {}}
+        self.assertEqual(self.requisitar("/checkin", paciente)[0], 201)
+        self.assertEqual(self.requisitar("/pacientes/123%2E456%2E789-09")[1]["name"], "Ana")
+
+    # Testa check-ins concorrentes, incluindo CPFs repetidos entre clientes
+    def test_concorrencia(self):
+        resultado = executar_carga(self.url, total=200, clientes=8)
+        self.assertEqual(resultado["erros"], 0)
+        repetido = executar_carga(self.url, total=20, clientes=8)
+        self.assertEqual(repetido["erros"], 20)
+        self.assertEqual(len(self.servico.contexto.repositorio), 200)
+        self.assertTrue(self.servico.contexto.repositorio.buscar(cpf_valido(7)))
+
+# Executa os testes quando o arquivo é executado diretamente
+if __name__ == "__main__":
+    unittest.main()
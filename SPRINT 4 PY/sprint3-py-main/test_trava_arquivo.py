@@ -0,0 +1,68 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+import unittest
+from contexto import ContextoAplicacao
+from gerador_pacientes import cpf_valido
+from trava_arquivo import TravaArquivo
+
+# Número de check-ins feitos por cada estação no teste entre processos
+CHECKINS_POR_ESTACAO = 40
+
+
+def _estacao(arquivo, numero):
+    # Cada processo faz check-ins e compacta o diário no meio, como uma estação de triagem
+    contexto = ContextoAplicacao(arquivo)
+    for i in range(CHECKINS_POR_ESTACAO):
+        contexto.registrar_checkin({"name": f"Estação {numero} paciente {i}", "cpf": cpf_valido(numero * 1000 + i), "sintomas": {}})
+        if i % 10 == 9:
+            contexto.dar_alta(cpf_valido(numero * 1000 + i))
+            contexto.salvar()
+    contexto.fechar()
+
+# Define uma classe de teste para a trava entre processos
+class TestTravaArquivo(unittest.TestCase):
+    # Testa que a trava pode ser adquirida de novo pela mesma thread e bloqueia as demais
+    def test_reentrante(self):
+        with tempfile.TemporaryDirectory() as pasta:
+            trava = TravaArquivo(os.path.join(pasta, "dados.trava"))
+            adquirida = threading.Event()
+
+            def outra_thread():
+                with trava:
+                    adquirida.set()
+
+            with trava:
+                with trava:
+                    pass
+                thread = threading.Thread(target=outra_thread)
+                thread.start()
+                self.assertFalse(adquirida.wait(0.1))
+            thread.join(5)
+            self.assertTrue(adquirida.is_set())
+
+    # Testa que nenhum check-in se perde com várias estações gravando no mesmo arquivo ao mesmo tempo
+    def test_estacoes_simultaneas(self):
+        with tempfile.TemporaryDirectory() as pasta:
+            arquivo = os.path.join(pasta, "dados_pacientes.json")
+            processos = [
+                multiprocessing.get_context("spawn").Process(target=_estacao, args=(arquivo, numero))
+                for numero in range(1, 5)
+            ]
+            for processo in processos:
+                processo.start()
+            for processo in processos:
+                processo.join(60)
+                self.assertEqual(processo.exitcode, 0)
+
+            contexto = ContextoAplicacao(arquivo)
+            altas = len(processos) * CHECKINS_POR_ESTACAO // 10
+            self.assertEqual(len(contexto.repositorio), len(processos) * CHECKINS_POR_ESTACAO - altas)
+            self.assertEqual(len(contexto.fila), len(contexto.repositorio))
+            self.assertEqual(sum(1 for _ in contexto.repositorio.iterar_historico()), altas)
+            contexto.fechar()
+
+# Executa os testes quando o arquivo é executado diretamente
+if __name__ == "__main__":
+    unittest.main()
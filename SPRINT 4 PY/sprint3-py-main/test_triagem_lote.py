@@ -0,0 +1,35 @@
+import itertools
+import unittest
+from logica import classificar_gravidade
+
+try:
+    import numpy
+    from triagem_lote import classificar_pacientes
+except ImportError:
+    numpy = None
+
+# Define uma classe de teste para a classificação em lote
+@unittest.skipIf(numpy is None, "NumPy não está instalado")
+class TestTriagemLote(unittest.TestCase):
+    # Testa que o lote classifica igual à função individual em todas as combinações
+    def test_equivalencia(self):
+        pacientes = []
+        for febre, dor, falta_ar, tempo in itertools.product(
+            ["Nenhuma", "Baixa", "Moderada", "Alta", None],
+            ["Nenhuma", "leve", "moderada", "intensa", "Moderada", None],
+            ["Sim", "Não", None],
+            # Frações de dia são válidas e não podem ser truncadas no lote
+            [0, 3, 3.5, 4],
+        ):
+            sintomas = {"febre": febre, "dor": dor, "falta_ar": falta_ar, "tempo_sintomas": tempo}
+            pacientes.append({"sintomas": {k: v for k, v in sintomas.items() if v is not None}})
+        pacientes.append({"sintomas": {"lesao_fisica": {"local": "cabeça"}, "tempo_sintomas": 1}})
+
+        esperado = [
+            classificar_gravidade(p["sintomas"], p["sintomas"].get("tempo_sintomas", 0)) for p in pacientes
+        ]
+        self.assertEqual(classificar_pacientes(pacientes), esperado)
+
+# Executa os testes quando o arquivo é executado diretamente
+if __name__ == "__main__":
+    unittest.main()
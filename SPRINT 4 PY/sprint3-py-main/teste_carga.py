@@ -0,0 +1,94 @@
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from contexto import ContextoAplicacao
+from gerador_pacientes import cpf_valido
+from servico import META_REQUISICOES_POR_SEGUNDO, ServicoTriagem, criar_servidor
+
+
+def _enviar(url, dados):
+    requisicao = urllib.request.Request(
+        url, data=json.dumps(dados).encode("utf-8"), headers={"Content-Type": "application/json"}
+    )
+    try:
+        with urllib.request.urlopen(requisicao) as resposta:
+            return resposta.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def executar_carga(url, total=2000, clientes=16, inicio=1):
+    """
+    Envia check-ins concorrentes para uma instância do serviço de triagem.
+
+    Args:
+        url (str): Endereço base do serviço, por exemplo http://127.0.0.1:8080.
+        total (int): Número total de check-ins.
+        clientes (int): Número de clientes simultâneos.
+        inicio (int): Primeiro número usado para gerar os CPFs.
+
+    Returns:
+        dict: Total de requisições, erros, duração e requisições por segundo.
+    """
+    erros = []
+    proximo = iter(range(inicio, inicio + total))
+    trava = threading.Lock()
+
+    def cliente():
+        while True:
+            with trava:
+                numero = next(proximo, None)
+            if numero is None:
+                return
+            status = _enviar(f"{url}/checkin", {
+                "name": f"Paciente {numero}",
+                "cpf": cpf_valido(numero),
+                "birth_date": "01/01/1990",
+                "sintomas": {"febre": "Alta" if numero % 5 == 0 else "Nenhuma", "tempo_sintomas": numero % 7},
+            })
+            if status != 201:
+                erros.append(status)
+
+    threads = [threading.Thread(target=cliente) for _ in range(clientes)]
+    comeco = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duracao = time.perf_counter() - comeco
+    return {"requisicoes": total, "erros": len(erros), "duracao": duracao, "requisicoes_por_segundo": total / duracao}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do serviço de triagem.")
+    parser.add_argument("--url", help="Serviço já em execução. Padrão: inicia uma instância local temporária.")
+    parser.add_argument("--total", type=int, default=2000, help="Número total de check-ins.")
+    parser.add_argument("--clientes", type=int, default=16, help="Número de clientes simultâneos.")
+    argumentos = parser.parse_args()
+
+    servidor = None
+    if argumentos.url:
+        url = argumentos.url.rstrip("/")
+    else:
+        pasta = tempfile.mkdtemp()
+        servico = ServicoTriagem(ContextoAplicacao(os.path.join(pasta, "dados_pacientes.json")))
+        servidor = criar_servidor(servico, porta=0)
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{servidor.server_address[1]}"
+
+    resultado = executar_carga(url, argumentos.total, argumentos.clientes)
+    if servidor:
+        servidor.shutdown()
+        servidor.server_close()
+
+    print(f"{resultado['requisicoes']} check-ins em {resultado['duracao']:.2f}s, {resultado['erros']} erros")
+    print(f"{resultado['requisicoes_por_segundo']:.0f} requisições/s (meta: {META_REQUISICOES_POR_SEGUNDO})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+class TravaArquivo:
+    """
+    Trava exclusiva entre processos, feita sobre um arquivo de trava.
+
+    Usa flock no Linux e no macOS e msvcrt.locking no Windows. O sistema
+    operacional libera a trava se o processo terminar, mesmo em uma queda. Dentro
+    do processo, a trava também serve entre threads e pode ser adquirida de novo
+    pela thread que já a possui; o arquivo só é travado na primeira aquisição e
+    liberado na última.
+    """
+
+    def __init__(self, caminho):
+        """
+        Args:
+            caminho (str): Arquivo de trava; é criado se não existir.
+        """
+        self.caminho = caminho
+        self._trava = threading.RLock()
+        self._descritor = None
+        self._niveis = 0
+
+    def _travar(self):
+        descritor = os.open(self.caminho, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(descritor, fcntl.LOCK_EX)
+            else:
+                # LK_LOCK tenta por até 10 segundos antes de falhar
+                msvcrt.locking(descritor, msvcrt.LK_LOCK, 1)
+        except OSError:
+            os.close(descritor)
+            raise
+        return descritor
+
+    def __enter__(self):
+        self._trava.acquire()
+        if self._niveis == 0:
+            try:
+                self._descritor = self._travar()
+            except OSError:
+                self._trava.release()
+                raise
+        self._niveis += 1
+        return self
+
+    def __exit__(self, *excecao):
+        self._niveis -= 1
+        if self._niveis == 0:
+            descritor, self._descritor = self._descritor, None
+            try:
+                if fcntl is not None:
+                    fcntl.flock(descritor, fcntl.LOCK_UN)
+                else:
+                    os.lseek(descritor, 0, os.SEEK_SET)
+                    msvcrt.locking(descritor, msvcrt.LK_UNLCK, 1)
+            finally:
+                os.close(descritor)
+        self._trava.release()
@@ -0,0 +1,124 @@
+import time
+import numpy as np
+from logica import classificar_gravidade
+
+# Códigos numéricos usados nas colunas de sintomas
+FEBRE = {"Nenhuma": 0, "Baixa": 1, "Moderada": 2, "Alta": 3}
+DOR = {"Nenhuma": 0, "leve": 1, "moderada": 2, "intensa": 3}
+
+# Códigos de gravidade retornados pela classificação em lote
+LEVE, MODERADO, GRAVE = 0, 1, 2
+GRAVIDADES = ("Leve", "Moderado", "Grave")
+
+
+def tabela_sintomas(pacientes):
+    """
+    Converte os sintomas dos pacientes em uma tabela colunar de arrays NumPy.
+
+    Valores desconhecidos de febre e dor recebem o código 0, que, assim como na
+    classificação individual, não contribui para a gravidade.
+
+    Args:
+        pacientes (iterable): Pacientes no formato de dados_pacientes.json.
+
+    Returns:
+        dict: Arrays "febre", "dor", "falta_ar" e "tempo_sintomas", um valor por paciente.
+    """
+    febre, dor, falta_ar, tempo = [], [], [], []
+    for paciente in pacientes:
+        sintomas = paciente.get("sintomas", {})
+        febre.append(FEBRE.get(sintomas.get("febre"), 0))
+        dor.append(DOR.get(sintomas.get("dor"), 0))
+        falta_ar.append(sintomas.get("falta_ar") == "Sim")
+        tempo.append(sintomas.get("tempo_sintomas", 0))
+    return {
+        "febre": np.array(febre, dtype=np.int8),
+        "dor": np.array(dor, dtype=np.int8),
+        "falta_ar": np.array(falta_ar, dtype=bool),
+        "tempo_sintomas": np.array(tempo, dtype=np.float64),
+    }
+
+
+def classificar_gravidade_lote(febre, dor, falta_ar, tempo_sintomas):
+    """
+    Classifica a gravidade de vários pacientes de uma vez, com máscaras vetorizadas.
+
+    Aplica as regras padrão do arquivo regras_triagem.json a cada posição dos
+    arrays; com regras alteradas, use MotorRegras.classificar_lote.
+
+    Args:
+        febre (numpy.ndarray): Códigos de febre (ver FEBRE).
+        dor (numpy.ndarray): Códigos de intensidade da dor (ver DOR).
+        falta_ar (numpy.ndarray): True para pacientes com falta de ar.
+        tempo_sintomas (numpy.ndarray): Número de dias com os sintomas.
+
+    Returns:
+        numpy.ndarray: Códigos de gravidade (LEVE, MODERADO ou GRAVE) em int8.
+    """
+    febre = np.asarray(febre)
+    dor = np.asarray(dor)
+    grave = (febre >= FEBRE["Moderada"]) | np.asarray(falta_ar, dtype=bool)
+    moderado = (dor >= DOR["moderada"]) | (np.asarray(tempo_sintomas) > 3)
+    gravidades = np.full(febre.shape, LEVE, dtype=np.int8)
+    gravidades[moderado] = MODERADO
+    gravidades[grave] = GRAVE
+    return gravidades
+
+
+def classificar_pacientes(pacientes):
+    """
+    Classifica a gravidade de uma lista de pacientes em lote.
+
+    Args:
+        pacientes (list): Pacientes no formato de dados_pacientes.json.
+
+    Returns:
+        list: Gravidade de cada paciente ("Grave", "Moderado" ou "Leve").
+    """
+    codigos = classificar_gravidade_lote(**tabela_sintomas(pacientes))
+    return [GRAVIDADES[codigo] for codigo in codigos.tolist()]
+
+
+def benchmark(n=1_000_000, semente=42):
+    """
+    Compara a vazão da classificação individual com a classificação em lote.
+
+    Args:
+        n (int): Número de pacientes sintéticos.
+        semente (int): Semente do gerador aleatório.
+
+    Returns:
+        dict: Classificações por segundo de cada abordagem.
+    """
+    rng = np.random.default_rng(semente)
+    colunas = {
+        "febre": rng.integers(0, 4, n, dtype=np.int8),
+        "dor": rng.integers(0, 4, n, dtype=np.int8),
+        "falta_ar": rng.random(n) < 0.1,
+        "tempo_sintomas": rng.integers(0, 8, n),
+    }
+    nomes_febre = {codigo: nome for nome, codigo in FEBRE.items()}
+    nomes_dor = {codigo: nome for nome, codigo in DOR.items()}
+    sintomas = [
+        {"febre": nomes_febre[f], "dor": nomes_dor[d], "falta_ar": "Sim" if a else "Não"}
+        for f, d, a in zip(colunas["febre"].tolist(), colunas["dor"].tolist(), colunas["falta_ar"].tolist())
+    ]
+    tempos = colunas["tempo_sintomas"].tolist()
+
+    inicio = time.perf_counter()
+    individuais = [classificar_gravidade(s, t) for s, t in zip(sintomas, tempos)]
+    tempo_individual = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    codigos = classificar_gravidade_lote(**colunas)
+    tempo_lote = time.perf_counter() - inicio
+
+    assert individuais == [GRAVIDADES[c] for c in codigos.tolist()]
+    return {"individual": n / tempo_individual, "lote": n / tempo_lote}
+
+
+if __name__ == "__main__":
+    resultado = benchmark()
+    print(f"Individual: {resultado['individual']:,.0f} classificações/s")
+    print(f"Lote:       {resultado['lote']:,.0f} classificações/s")
+    print(f"Ganho:      {resultado['lote'] / resultado['individual']:.1f}x")